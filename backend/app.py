@@ -4,29 +4,69 @@ SQLite backend with Swagger API documentation.
 """
 
 import os
-from flask import Flask, jsonify, request
+import json
+import click
+from flask import Flask, Response, jsonify, request, current_app, stream_with_context, g
 from flask_cors import CORS
-from flask_restx import Api, Resource, fields, Namespace
-from flask_migrate import Migrate
+from flask_restx import Api, Resource, fields, Namespace, marshal
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 # Import local modules
-from models import db, User, Customer, UserRepository, CustomerRepository
+from models import db, User, Customer, UserRepository, CustomerRepository, VersionConflictError, ensure_schema
 from config.app_config import get_config
+from config.storage import engine_options, install_storage_profile, storage_report
+from search import install_search_index
+from bootstrap import schema_fingerprint, is_bootstrapped, stamp_bootstrap
+from export import ndjson_chunks, csv_chunks, EXPORT_MIMETYPES
+from outbox import init_outbox, OutboxDrainer
+from table_versions import init_table_versions
+from change_feed import init_change_feed, changes_since, latest_seq
+from events import init_event_stream, event_stream, EVENT_ENCODERS
+from http_cache import conditional, row_validators, collection_validators, row_etag, if_match_version, cache_headers
+from metrics import init_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from query_profiler import init_query_profiler, REPORT_SORTS
+from hashing import configure_hasher, HashingBusyError
+from tokens import (
+    issue_token, decode_token, revoke_token, revoke_user_tokens, token_required, TokenError
+)
+from serializers import USER_ENCODER, CUSTOMER_ENCODER
+from utils import (
+    encode_cursor, decode_cursor, parse_limit, parse_fields, parse_sort, parse_bool, parse_datetime, iter_ndjson
+)
 
-def create_app():
-    """Application factory"""
+def create_app(config_overrides=None, background=True):
+    """
+    Application factory. background=False leaves the password hashing pool
+    and the outbox drainer unstarted, for a pre-fork server that builds the
+    app once and starts them in each worker (see serve.py).
+    """
     app = Flask(__name__)
     
     # Load configuration
     config = get_config()
     app.config.from_object(config)
+    if config_overrides:
+        app.config.update(config_overrides)
     
-    # Initialize SQLAlchemy
+    # Initialize SQLAlchemy with the selected storage profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        app.config['STORAGE_PROFILE'],
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+    )
     db.init_app(app)
+    with app.app_context():
+        install_storage_profile(db.engine, app.config['STORAGE_PROFILE'])
+    
+    # Flask-Migrate imports alembic, a large share of import time; only the
+    # `flask db` commands need it, and they run inside a click context
+    if app.config['MIGRATIONS_ENABLED'] or click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     
-    # Initialize Flask-Migrate
-    migrate = Migrate(app, db)
+    # Password hashing runs on a process pool sized from config
+    configure_hasher(app.config, start=background)
     
     # Configure CORS
     CORS(app, resources={
@@ -42,16 +82,59 @@ def create_app():
         title='Customer Management API',
         description='A comprehensive API for managing customers and users with SQLite backend',
         doc='/docs/',
-        prefix='/api/v1'
+        prefix='/api/v1',
+        authorizations={
+            'Bearer': {'type': 'apiKey', 'in': 'header', 'name': 'Authorization',
+                       'description': 'Bearer <access_token> from /auth/login'}
+        },
+        security='Bearer'
     )
     
     # Create database tables
     with app.app_context():
-        db.create_all()
-        app.logger.info("Database tables created successfully")
+        app.logger.info(f"Storage settings: {storage_report(db.engine, app.config['STORAGE_PROFILE'])}")
+        
+        # Schema and seed steps run once per model change, then are skipped by stamp
+        fingerprint = schema_fingerprint()
+        bootstrap = not (app.config['BOOTSTRAP_STAMP_ENABLED'] and is_bootstrapped(db.engine, fingerprint))
+        if bootstrap:
+            db.create_all()
+            app.logger.info("Database tables created successfully")
+            
+            # Add columns and indexes declared since the tables were created
+            added = ensure_schema(db.engine)
+            if added:
+                app.logger.info(f"Added missing schema objects: {', '.join(added)}")
+        else:
+            app.logger.info("Database bootstrap already applied, skipping schema setup")
+        
+        # Full-text search index (SQLite FTS5); falls back to ilike elsewhere
+        if install_search_index(db.engine, create=bootstrap):
+            app.logger.info("Customer full-text search index ready")
+        
+        # Change counters behind the collection ETags
+        init_table_versions(app, seed=bootstrap)
         
-        # Create default admin user
-        create_default_admin()
+        # Change feed log behind /users/changes and /customers/changes
+        init_change_feed(app, seed=bootstrap)
+        
+        # Fan-out of the change log to /api/v1/stream subscribers
+        init_event_stream(app)
+        
+        # Queue Firebase mirror writes in the same transaction as each change
+        if init_outbox(app) and app.config['OUTBOX_DRAINER_ENABLED'] and background:
+            app.extensions['firebase_outbox'] = OutboxDrainer(app).start()
+            app.logger.info("Firebase outbox drainer started")
+        
+        # Create default admin user, then stamp the bootstrap as applied
+        if bootstrap and create_default_admin() and app.config['BOOTSTRAP_STAMP_ENABLED']:
+            stamp_bootstrap(db.engine, fingerprint)
+    
+    # Per-route latency, SQL and Firebase call metrics
+    init_metrics(app)
+    
+    # Slow-query log and EXPLAIN QUERY PLAN capture behind /api/v1/admin/queries
+    init_query_profiler(app)
     
     # Register API namespaces
     register_namespaces(api)
@@ -59,7 +142,7 @@ def create_app():
     return app
 
 def create_default_admin():
-    """Create default admin user if it doesn't exist"""
+    """Create default admin user if it doesn't exist; returns False on error"""
     try:
         existing_admin = UserRepository.get_by_email('admin@example.com')
         if not existing_admin:
@@ -70,8 +153,224 @@ def create_default_admin():
                 role='admin'
             )
             print("✅ Default admin user created")
+        return True
     except Exception as e:
         print(f"❌ Error creating default admin: {e}")
+        return False
+
+def get_page_args(ns):
+    """Read limit/after pagination arguments from the request, aborting with 400 if invalid"""
+    try:
+        limit = parse_limit(
+            request.args.get('limit'),
+            current_app.config['DEFAULT_PAGE_SIZE'],
+            current_app.config['MAX_PAGE_SIZE']
+        )
+        after = request.args.get('after')
+        after = decode_cursor(after) if after else None
+        if after is not None and not after:
+            raise ValueError('Invalid cursor')
+    except ValueError as e:
+        ns.abort(400, str(e))
+    return limit, after
+
+def get_sort_arg(ns, allowed):
+    """Read the sort argument, aborting with 400 on unknown fields"""
+    try:
+        return parse_sort(request.args.get('sort'), allowed)
+    except ValueError as e:
+        ns.abort(400, str(e))
+
+def get_filter_args(ns, parsers):
+    """Read whitelisted filter arguments, aborting with 400 if a value does not parse"""
+    filters = {}
+    for name, parse in parsers.items():
+        value = request.args.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            filters[name] = parse(value)
+        except ValueError as e:
+            ns.abort(400, f'Invalid {name}: {e}')
+    return filters
+
+def get_bulk_selection(ns, parsers, data):
+    """
+    ids and filters selecting the targets of a bulk write from a JSON body
+    ({"ids": [...], "filter": {...}}), aborting with 400 if invalid. Unlike
+    query filters, unknown filter names are rejected rather than ignored.
+    """
+    ids = data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            ns.abort(400, 'ids must be a list of integers')
+        if len(ids) > current_app.config['BULK_WRITE_MAX_ROWS']:
+            ns.abort(400, f"At most {current_app.config['BULK_WRITE_MAX_ROWS']} ids per call")
+    raw_filters = data.get('filter') or {}
+    if not isinstance(raw_filters, dict):
+        ns.abort(400, 'filter must be an object')
+    filters = {}
+    for name, value in raw_filters.items():
+        if name not in parsers:
+            ns.abort(400, f'Unknown filter: {name}')
+        # Values arrive as query strings would; JSON booleans are accepted for boolean filters
+        if isinstance(value, bool) and parsers[name] is parse_bool:
+            value = 'true' if value else 'false'
+        elif not isinstance(value, str):
+            ns.abort(400, f'Invalid {name}: expected a string' + (', not null' if value is None else ''))
+        try:
+            filters[name] = parsers[name](value)
+        except ValueError as e:
+            ns.abort(400, f'Invalid {name}: {e}')
+    if ids is None and not filters:
+        ns.abort(400, 'Select records with ids or a filter')
+    dry_run = data.get('dry_run', False)
+    if not isinstance(dry_run, bool):
+        ns.abort(400, 'dry_run must be true or false')
+    return ids, filters, dry_run
+
+def bulk_write_options(dry_run):
+    """Per-call cap and chunking for bulk writes"""
+    return {
+        'dry_run': dry_run,
+        'max_rows': current_app.config['BULK_WRITE_MAX_ROWS'],
+        'chunk_size': current_app.config['BULK_WRITE_CHUNK_SIZE']
+    }
+
+def get_fields_arg(ns, encoder):
+    """Encoder for the fields= query parameter, aborting with 400 on unknown fields"""
+    try:
+        return encoder.only(parse_fields(request.args.get('fields'), encoder.field_names))
+    except ValueError as e:
+        ns.abort(400, str(e))
+
+def json_response(body, model):
+    """
+    Return pre-encoded JSON. Requests with an X-Fields mask go through
+    flask-restx marshalling, which implements the mask syntax.
+    """
+    mask = request.headers.get(current_app.config.get('RESTX_MASK_HEADER', 'X-Fields'))
+    if mask:
+        return marshal(json.loads(body), model, mask=mask)
+    return Response(body, mimetype='application/json')
+
+def get_expected_version(ns, table, row_id):
+    """Version named by If-Match, or None; aborts with 412 if If-Match can never match"""
+    required, version = if_match_version(table, row_id)
+    if required and version is None:
+        ns.abort(412, 'If-Match does not name a version of this record')
+    return version
+
+def patched_response(table, record):
+    """A patched record with its new validators, for chaining conditional writes"""
+    last_modified = datetime.fromisoformat(record['updated_at'])
+    return record, 200, cache_headers(row_etag(table, record['id'], record['version']), last_modified)
+
+def page_response(encoder, rows, next_after, page_model):
+    """Serialize a page of Core rows to JSON in one pass"""
+    next_cursor = encode_cursor(*next_after) if next_after is not None else None
+    return json_response(encoder.encode_page(rows, next_cursor), page_model)
+
+def get_since_arg(ns, model):
+    """
+    Read the change feed cursor: absent means from the beginning, 'now' the
+    current end of the feed. Aborts with 400 on a malformed cursor.
+    """
+    since = request.args.get('since')
+    if since in (None, ''):
+        return 0
+    if since == 'now':
+        return latest_seq(model)
+    try:
+        values = decode_cursor(since)
+    except ValueError as e:
+        ns.abort(400, str(e))
+    if len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+        ns.abort(400, 'Invalid cursor')
+    return values[0]
+
+def changes_response(encoder, rows, next_seq, since, page_model):
+    """
+    Serialize a change feed page. next_cursor is where to resume (the last
+    seq returned, or `since` if nothing changed); has_more says whether more
+    changes are already waiting.
+    """
+    width = len(encoder.field_names)
+    changes = [
+        {
+            'seq': row[0],
+            'op': row[1],
+            'id': row[2],
+            'record': dict(zip(encoder.field_names, row[3:3 + width])) if row[1] == 'upsert' else None
+        }
+        for row in rows
+    ]
+    last_seq = rows[-1][0] if rows else since
+    body = encoder.encode({'changes': changes, 'next_cursor': encode_cursor(last_seq), 'has_more': next_seq is not None})
+    return json_response(body, page_model)
+
+def get_stream_args(ns):
+    """
+    Topics (tables) and Last-Event-ID (header, or last_event_id query
+    parameter) of an event stream request, aborting with 400 if invalid
+    """
+    topics = []
+    for topic in (request.args.get('topics') or ','.join(EVENT_ENCODERS)).split(','):
+        topic = topic.strip()
+        if topic and topic not in EVENT_ENCODERS:
+            ns.abort(400, f'Unknown topic: {topic}')
+        if topic and topic not in topics:
+            topics.append(topic)
+    if not topics:
+        ns.abort(400, 'topics must name at least one topic')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            ns.abort(400, 'Invalid Last-Event-ID')
+        last_event_id = int(last_event_id)
+    return topics, last_event_id
+
+FIELDS_PARAM = {
+    'fields': 'Comma-separated fields to return (default: all); unrequested columns are not read'
+}
+
+PAGE_PARAMS = dict(FIELDS_PARAM, **{
+    'limit': 'Maximum number of items to return',
+    'after': 'Opaque cursor from a previous response\'s next_cursor'
+})
+
+# List filters: query parameter -> value parser
+USER_FILTERS = {
+    'is_active': parse_bool,
+    'role': str,
+    'created_after': parse_datetime,
+    'created_before': parse_datetime,
+    'updated_after': parse_datetime,
+    'updated_before': parse_datetime
+}
+
+CUSTOMER_FILTERS = {
+    'is_active': parse_bool,
+    'company': str,
+    'created_after': parse_datetime,
+    'created_before': parse_datetime,
+    'updated_after': parse_datetime,
+    'updated_before': parse_datetime
+}
+
+CHANGES_PARAMS = dict(FIELDS_PARAM, **{
+    'since': 'next_cursor from a previous response; omit to start from the beginning, or "now" to skip history',
+    'limit': 'Maximum number of changes to return'
+})
+
+FILTER_PARAMS = {
+    'is_active': 'Only active (true) or inactive (false) records',
+    'created_after': 'Only records created after this ISO 8601 date/time',
+    'created_before': 'Only records created before this ISO 8601 date/time',
+    'updated_after': 'Only records last updated after this ISO 8601 date/time',
+    'updated_before': 'Only records last updated before this ISO 8601 date/time',
+    'sort': 'Comma-separated sort fields, prefix with - for descending, e.g. -created_at,name'
+}
 
 def register_namespaces(api):
     """Register API namespaces"""
@@ -92,18 +391,84 @@ def register_namespaces(api):
                 'database': 'SQLite'
             }
     
+    # Metrics namespace
+    metrics_ns = Namespace('metrics', description='Prometheus metrics of this worker process')
+    
+    @metrics_ns.route('')
+    class Metrics(Resource):
+        @metrics_ns.doc('metrics')
+        @metrics_ns.produces([METRICS_CONTENT_TYPE])
+        def get(self):
+            """Request, SQL and Firebase metrics in the Prometheus text format"""
+            registry = current_app.extensions.get('metrics')
+            if registry is None:
+                metrics_ns.abort(404, 'Metrics are disabled')
+            return Response(registry.render(), mimetype=METRICS_CONTENT_TYPE)
+    
+    # Admin namespace
+    admin_ns = Namespace('admin', description='Operational reports for administrators')
+    
+    @admin_ns.route('/queries')
+    class QueryReport(Resource):
+        method_decorators = [token_required(roles=['admin'], always=True)]
+        
+        @admin_ns.doc('query_report', params={
+            'limit': 'Statements to return (default 20)',
+            'sort': f"Order by: {', '.join(REPORT_SORTS)} (default total)",
+            'full_scans': 'Only statements whose plan scans a whole table'
+        })
+        def get(self):
+            """Top SQL statements of this worker process by time, with their query plans"""
+            profiler = current_app.extensions.get('query_profiler')
+            if profiler is None:
+                admin_ns.abort(404, 'Query profiler is disabled')
+            try:
+                limit = parse_limit(request.args.get('limit'), 20, 500)
+                full_scans = parse_bool(request.args.get('full_scans', 'false'))
+                return profiler.report(limit, request.args.get('sort', 'total'), full_scans)
+            except ValueError as e:
+                admin_ns.abort(400, str(e))
+        
+        @admin_ns.doc('reset_query_report')
+        def delete(self):
+            """Clear the statement totals and captured plans"""
+            profiler = current_app.extensions.get('query_profiler')
+            if profiler is None:
+                admin_ns.abort(404, 'Query profiler is disabled')
+            profiler.reset()
+            return {'message': 'Query statistics cleared'}
+    
     # Users namespace
     users_ns = Namespace('users', description='User management operations')
     
-    # User models for Swagger
+    # User models for Swagger (response fields are optional: fields= can omit any of them)
     user_model = users_ns.model('User', {
         'id': fields.Integer(description='User ID'),
-        'email': fields.String(required=True, description='User email'),
-        'username': fields.String(required=True, description='Username'),
-        'role': fields.String(required=True, description='User role', enum=['admin', 'user']),
+        'email': fields.String(description='User email'),
+        'username': fields.String(description='Username'),
+        'role': fields.String(description='User role', enum=['admin', 'user']),
         'is_active': fields.Boolean(description='User active status'),
         'created_at': fields.String(description='Creation timestamp'),
-        'updated_at': fields.String(description='Last update timestamp')
+        'updated_at': fields.String(description='Last update timestamp'),
+        'version': fields.Integer(description='Row version, incremented by every write')
+    })
+    
+    user_page = users_ns.model('UserPage', {
+        'items': fields.List(fields.Nested(user_model), description='Users on this page'),
+        'next_cursor': fields.String(description='Cursor for the next page, null on the last page')
+    })
+    
+    user_change = users_ns.model('UserChange', {
+        'seq': fields.Integer(description='Position in the change feed'),
+        'op': fields.String(description='upsert: created or updated; delete: tombstone', enum=['upsert', 'delete']),
+        'id': fields.Integer(description='User ID'),
+        'record': fields.Nested(user_model, allow_null=True, description='Current user, null for deletes')
+    })
+    
+    user_changes = users_ns.model('UserChangePage', {
+        'changes': fields.List(fields.Nested(user_change), description='Changes in feed order, latest per user'),
+        'next_cursor': fields.String(description='Pass as since= to get later changes'),
+        'has_more': fields.Boolean(description='More changes are waiting; fetch again right away')
     })
     
     user_input = users_ns.model('UserInput', {
@@ -123,13 +488,23 @@ def register_namespaces(api):
     
     @users_ns.route('')
     class UserList(Resource):
-        @users_ns.doc('get_users')
-        @users_ns.marshal_list_with(user_model)
+        method_decorators = [token_required]
+        
+        @users_ns.doc('get_users', params=dict(PAGE_PARAMS, **FILTER_PARAMS, role='Only users with this role'))
+        @users_ns.response(200, 'Success', user_page)
+        @conditional(collection_validators('users'))
         def get(self):
-            """Get all users"""
+            """Get a page of users"""
+            limit, after = get_page_args(users_ns)
+            encoder = get_fields_arg(users_ns, USER_ENCODER)
+            sort = get_sort_arg(users_ns, UserRepository.SORT_FIELDS)
+            filters = get_filter_args(users_ns, USER_FILTERS)
+            columns = encoder.select_columns(name for name, _ in sort)
             try:
-                users = UserRepository.get_all()
-                return [user.to_dict() for user in users]
+                rows, next_after = UserRepository.get_page_rows(columns, limit, after, sort, **filters)
+                return page_response(encoder, rows, next_after, user_page)
+            except ValueError as e:
+                users_ns.abort(400, str(e))
             except Exception as e:
                 users_ns.abort(500, f'Error retrieving users: {str(e)}')
         
@@ -138,74 +513,124 @@ def register_namespaces(api):
         @users_ns.marshal_with(user_model, code=201)
         def post(self):
             """Create a new user"""
+            data = request.json or {}
+            
+            # Validate required fields
+            required_fields = ['email', 'password', 'username', 'role']
+            for field in required_fields:
+                if not data.get(field):
+                    users_ns.abort(400, f'Missing required field: {field}')
+            
             try:
-                data = request.json
-                
-                # Validate required fields
-                required_fields = ['email', 'password', 'username', 'role']
-                for field in required_fields:
-                    if not data.get(field):
-                        users_ns.abort(400, f'Missing required field: {field}')
-                
-                # Check if email already exists
-                if UserRepository.get_by_email(data['email']):
-                    users_ns.abort(400, 'Email already exists')
-                
-                # Create user
+                # The unique index on email is the duplicate check
                 user = UserRepository.create(
                     email=data['email'],
                     password=data['password'],
                     username=data['username'],
                     role=data['role']
                 )
-                
                 return user.to_dict(), 201
                 
+            except IntegrityError:
+                db.session.rollback()
+                users_ns.abort(400, 'Email already exists')
+            except HashingBusyError as e:
+                users_ns.abort(503, str(e))
             except Exception as e:
                 users_ns.abort(500, f'Error creating user: {str(e)}')
     
+    @users_ns.route('/changes')
+    class UserChanges(Resource):
+        method_decorators = [token_required]
+        
+        @users_ns.doc('get_user_changes', params=CHANGES_PARAMS, description=(
+            'Users created, updated or deleted since a cursor, oldest change first. '
+            'Each user appears once, at its latest change.'
+        ))
+        @users_ns.response(200, 'Success', user_changes)
+        @conditional(collection_validators('users'))
+        def get(self):
+            """Get the user change feed"""
+            limit, _ = get_page_args(users_ns)
+            encoder = get_fields_arg(users_ns, USER_ENCODER)
+            since = get_since_arg(users_ns, User)
+            try:
+                rows, next_seq = changes_since(User, encoder.columns, since, limit)
+            except Exception as e:
+                users_ns.abort(500, f'Error retrieving user changes: {str(e)}')
+            return changes_response(encoder, rows, next_seq, since, user_changes)
+    
     @users_ns.route('/<int:user_id>')
     class UserResource(Resource):
-        @users_ns.doc('get_user')
-        @users_ns.marshal_with(user_model)
+        method_decorators = [token_required]
+        
+        @users_ns.doc('get_user', params=FIELDS_PARAM)
+        @users_ns.response(200, 'Success', user_model)
+        @conditional(row_validators(User, 'user_id'))
         def get(self, user_id):
             """Get a specific user"""
+            encoder = get_fields_arg(users_ns, USER_ENCODER)
             try:
-                user = UserRepository.get_by_id(user_id)
-                if not user:
-                    users_ns.abort(404, 'User not found')
-                return user.to_dict()
+                row = UserRepository.get_row(encoder.columns, user_id)
             except Exception as e:
                 users_ns.abort(500, f'Error retrieving user: {str(e)}')
+            if row is None:
+                users_ns.abort(404, 'User not found')
+            return json_response(encoder.encode_row(row), user_model)
         
-        @users_ns.doc('update_user')
+        @users_ns.doc('update_user', description=(
+            'Same as PATCH: only the fields sent are written, in one versioned UPDATE, '
+            'and If-Match is honored. id, version and timestamps cannot be set.'
+        ))
         @users_ns.expect(user_update)
-        @users_ns.marshal_with(user_model)
+        @users_ns.response(200, 'Success', user_model)
+        @users_ns.response(412, 'The user was modified since the If-Match version')
         def put(self, user_id):
             """Update a user"""
+            return self.patch(user_id)
+        
+        @users_ns.doc('patch_user', description=(
+            'Partial update in a single UPDATE statement. Send If-Match with the ETag '
+            'from a previous response to update only if nobody changed the user since; '
+            'a mismatch returns 412.'
+        ))
+        @users_ns.expect(user_update)
+        @users_ns.marshal_with(user_model)
+        @users_ns.response(412, 'The user was modified since the If-Match version')
+        def patch(self, user_id):
+            """Partially update a user with optimistic concurrency"""
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                users_ns.abort(400, 'Expected a JSON object')
+            expected_version = get_expected_version(users_ns, 'users', user_id)
+            
             try:
-                user = UserRepository.get_by_id(user_id)
-                if not user:
-                    users_ns.abort(404, 'User not found')
-                
-                data = request.json
-                
-                # Handle password separately
-                if 'password' in data:
-                    user.set_password(data.pop('password'))
-                
-                # Update other fields
-                updated_user = UserRepository.update(user_id, **data)
-                return updated_user.to_dict()
-                
+                user = UserRepository.patch(user_id, data, expected_version)
+            except ValueError as e:
+                users_ns.abort(400, str(e))
+            except VersionConflictError as e:
+                users_ns.abort(412, str(e))
+            except IntegrityError:
+                db.session.rollback()
+                users_ns.abort(400, 'Email already exists')
+            except HashingBusyError as e:
+                users_ns.abort(503, str(e))
             except Exception as e:
                 users_ns.abort(500, f'Error updating user: {str(e)}')
+            
+            if user is None:
+                users_ns.abort(404, 'User not found')
+            # Outstanding tokens carry the old role/credentials
+            if {'password', 'email', 'role', 'is_active'} & set(data):
+                revoke_user_tokens(user_id)
+            return patched_response('users', user)
         
         @users_ns.doc('delete_user')
         def delete(self, user_id):
             """Delete a user"""
             try:
                 if UserRepository.delete(user_id):
+                    revoke_user_tokens(user_id)
                     return {'message': 'User deleted successfully'}
                 else:
                     users_ns.abort(404, 'User not found')
@@ -215,17 +640,36 @@ def register_namespaces(api):
     # Customers namespace
     customers_ns = Namespace('customers', description='Customer management operations')
     
-    # Customer models for Swagger
+    # Customer models for Swagger (response fields are optional: fields= can omit any of them)
     customer_model = customers_ns.model('Customer', {
         'id': fields.Integer(description='Customer ID'),
-        'name': fields.String(required=True, description='Customer name'),
-        'email': fields.String(required=True, description='Customer email'),
+        'name': fields.String(description='Customer name'),
+        'email': fields.String(description='Customer email'),
         'phone': fields.String(description='Customer phone'),
         'company': fields.String(description='Customer company'),
         'notes': fields.String(description='Customer notes'),
         'is_active': fields.Boolean(description='Customer active status'),
         'created_at': fields.String(description='Creation timestamp'),
-        'updated_at': fields.String(description='Last update timestamp')
+        'updated_at': fields.String(description='Last update timestamp'),
+        'version': fields.Integer(description='Row version, incremented by every write')
+    })
+    
+    customer_page = customers_ns.model('CustomerPage', {
+        'items': fields.List(fields.Nested(customer_model), description='Customers on this page'),
+        'next_cursor': fields.String(description='Cursor for the next page, null on the last page')
+    })
+    
+    customer_change = customers_ns.model('CustomerChange', {
+        'seq': fields.Integer(description='Position in the change feed'),
+        'op': fields.String(description='upsert: created or updated; delete: tombstone', enum=['upsert', 'delete']),
+        'id': fields.Integer(description='Customer ID'),
+        'record': fields.Nested(customer_model, allow_null=True, description='Current customer, null for deletes')
+    })
+    
+    customer_changes = customers_ns.model('CustomerChangePage', {
+        'changes': fields.List(fields.Nested(customer_change), description='Changes in feed order, latest per customer'),
+        'next_cursor': fields.String(description='Pass as since= to get later changes'),
+        'has_more': fields.Boolean(description='More changes are waiting; fetch again right away')
     })
     
     customer_input = customers_ns.model('CustomerInput', {
@@ -245,19 +689,71 @@ def register_namespaces(api):
         'is_active': fields.Boolean(description='Customer active status')
     })
     
+    bulk_row_result = customers_ns.model('BulkRowResult', {
+        'index': fields.Integer(description='Position of the row in the request'),
+        'status': fields.String(description='Row outcome', enum=['created', 'error']),
+        'id': fields.Integer(description='Created customer ID'),
+        'error': fields.String(description='Why the row was rejected')
+    })
+    
+    bulk_import_result = customers_ns.model('BulkImportResult', {
+        'created': fields.Integer(description='Number of customers created'),
+        'failed': fields.Integer(description='Number of rows rejected'),
+        'results': fields.List(fields.Nested(bulk_row_result, skip_none=True), description='Per-row report in request order')
+    })
+    
+    customer_upsert = customers_ns.model('CustomerUpsert', {
+        'name': fields.String(required=True, description='Customer name'),
+        'phone': fields.String(description='Customer phone'),
+        'company': fields.String(description='Customer company'),
+        'notes': fields.String(description='Customer notes')
+    })
+    
+    bulk_upsert_row_result = customers_ns.model('BulkUpsertRowResult', {
+        'index': fields.Integer(description='Position of the row in the request'),
+        'status': fields.String(description='Row outcome', enum=['created', 'updated', 'unchanged', 'error']),
+        'id': fields.Integer(description='Customer ID'),
+        'error': fields.String(description='Why the row was rejected')
+    })
+    
+    bulk_upsert_result = customers_ns.model('BulkUpsertResult', {
+        'created': fields.Integer(description='Number of customers created'),
+        'updated': fields.Integer(description='Number of customers changed'),
+        'unchanged': fields.Integer(description='Number of customers already matching'),
+        'failed': fields.Integer(description='Number of rows rejected'),
+        'results': fields.List(fields.Nested(bulk_upsert_row_result, skip_none=True), description='Per-row report in request order')
+    })
+    
     @customers_ns.route('')
     class CustomerList(Resource):
-        @customers_ns.doc('get_customers')
-        @customers_ns.marshal_list_with(customer_model)
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('get_customers', params=dict(
+            PAGE_PARAMS, **FILTER_PARAMS,
+            search='Prefix search on name, email and company; without sort, a single page of best matches first',
+            company='Only customers of this company (exact match)'
+        ))
+        @customers_ns.response(200, 'Success', customer_page)
+        @conditional(collection_validators('customers'))
         def get(self):
-            """Get all customers"""
+            """Get a page of customers"""
+            limit, after = get_page_args(customers_ns)
+            encoder = get_fields_arg(customers_ns, CUSTOMER_ENCODER)
+            sort = get_sort_arg(customers_ns, CustomerRepository.SORT_FIELDS)
+            filters = get_filter_args(customers_ns, CUSTOMER_FILTERS)
+            columns = encoder.select_columns(name for name, _ in sort)
+            search_query = request.args.get('search', '')
             try:
-                search_query = request.args.get('search', '')
-                if search_query:
-                    customers = CustomerRepository.search(search_query)
+                if search_query and not sort:
+                    rows = CustomerRepository.search_rows(columns, search_query, limit, **filters)
+                    next_after = None
                 else:
-                    customers = CustomerRepository.get_all()
-                return [customer.to_dict() for customer in customers]
+                    rows, next_after = CustomerRepository.get_page_rows(
+                        columns, limit, after, sort, search=search_query, **filters
+                    )
+                return page_response(encoder, rows, next_after, customer_page)
+            except ValueError as e:
+                customers_ns.abort(400, str(e))
             except Exception as e:
                 customers_ns.abort(500, f'Error retrieving customers: {str(e)}')
         
@@ -266,20 +762,16 @@ def register_namespaces(api):
         @customers_ns.marshal_with(customer_model, code=201)
         def post(self):
             """Create a new customer"""
+            data = request.json or {}
+            
+            # Validate required fields
+            required_fields = ['name', 'email']
+            for field in required_fields:
+                if not data.get(field):
+                    customers_ns.abort(400, f'Missing required field: {field}')
+            
             try:
-                data = request.json
-                
-                # Validate required fields
-                required_fields = ['name', 'email']
-                for field in required_fields:
-                    if not data.get(field):
-                        customers_ns.abort(400, f'Missing required field: {field}')
-                
-                # Check if email already exists
-                if CustomerRepository.get_by_email(data['email']):
-                    customers_ns.abort(400, 'Email already exists')
-                
-                # Create customer
+                # The unique index on email is the duplicate check
                 customer = CustomerRepository.create(
                     name=data['name'],
                     email=data['email'],
@@ -287,42 +779,299 @@ def register_namespaces(api):
                     company=data.get('company'),
                     notes=data.get('notes')
                 )
-                
                 return customer.to_dict(), 201
                 
+            except IntegrityError:
+                db.session.rollback()
+                customers_ns.abort(400, 'Email already exists')
             except Exception as e:
                 customers_ns.abort(500, f'Error creating customer: {str(e)}')
     
+    @customers_ns.route('/bulk')
+    class CustomerBulkImport(Resource):
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('bulk_import_customers', description=(
+            'Accepts a JSON array of customers, or NDJSON (one customer per line) '
+            'with Content-Type: application/x-ndjson.'
+        ))
+        @customers_ns.expect([customer_input])
+        # Documented rather than marshalled: walking 200k report rows through
+        # marshal_with costs more than the import itself
+        @customers_ns.response(200, 'Import report', bulk_import_result)
+        def post(self):
+            """Import many customers in batched transactions"""
+            if request.mimetype == 'application/x-ndjson':
+                records = iter_ndjson(request.stream)
+            else:
+                records = request.get_json(silent=True)
+                if not isinstance(records, list):
+                    customers_ns.abort(400, 'Expected a JSON array of customers')
+            
+            try:
+                return CustomerRepository.bulk_create(
+                    records,
+                    batch_size=current_app.config['BULK_IMPORT_BATCH_SIZE']
+                )
+            except Exception as e:
+                customers_ns.abort(500, f'Error importing customers: {str(e)}')
+    
+    @customers_ns.route('/by-email/<string:email>')
+    class CustomerUpsert(Resource):
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('upsert_customer', description=(
+            'Create the customer with this email, or replace its name, phone, company '
+            'and notes. Omitted optional fields are cleared. Repeating a request is a '
+            'no-op (200, updated_at unchanged).'
+        ))
+        @customers_ns.expect(customer_upsert)
+        @customers_ns.marshal_with(customer_model)
+        @customers_ns.response(201, 'Customer created', customer_model)
+        def put(self, email):
+            """Create or update a customer by email in one statement"""
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                customers_ns.abort(400, 'Expected a JSON object')
+            try:
+                customer, status = CustomerRepository.upsert(dict(data, email=email))
+            except ValueError as e:
+                customers_ns.abort(400, str(e))
+            except IntegrityError:
+                # Only without ON CONFLICT: a concurrent request inserted the same email
+                db.session.rollback()
+                customers_ns.abort(409, 'Conflicting write, retry the request')
+            except Exception as e:
+                customers_ns.abort(500, f'Error upserting customer: {str(e)}')
+            return customer, 201 if status == 'created' else 200
+    
+    @customers_ns.route('/by-email')
+    class CustomerBulkUpsert(Resource):
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('bulk_upsert_customers', description=(
+            'Upsert a JSON array (or NDJSON stream) of customers keyed by email, '
+            'one statement per chunk of rows. Same field semantics as the single upsert.'
+        ))
+        @customers_ns.expect([customer_input])
+        @customers_ns.response(200, 'Upsert report', bulk_upsert_result)
+        def put(self):
+            """Create or update many customers by email"""
+            if request.mimetype == 'application/x-ndjson':
+                records = iter_ndjson(request.stream)
+            else:
+                records = request.get_json(silent=True)
+                if not isinstance(records, list):
+                    customers_ns.abort(400, 'Expected a JSON array of customers')
+            
+            try:
+                return CustomerRepository.bulk_upsert(
+                    records,
+                    batch_size=current_app.config['BULK_IMPORT_BATCH_SIZE']
+                )
+            except Exception as e:
+                customers_ns.abort(500, f'Error upserting customers: {str(e)}')
+    
+    bulk_selection = {
+        'ids': fields.List(fields.Integer, description='Customer IDs to select'),
+        'filter': fields.Raw(description=(
+            'List filters to select by (is_active, company, created_after, created_before, '
+            'updated_after, updated_before); combined with ids if both are given'
+        ), example={'is_active': False, 'updated_before': '2024-01-01'}),
+        'dry_run': fields.Boolean(description='Only count the customers that would change', default=False)
+    }
+    
+    bulk_delete_input = customers_ns.model('BulkDeleteInput', dict(bulk_selection, **{
+        'mode': fields.String(description='soft sets is_active=false, hard deletes the rows',
+                              enum=['soft', 'hard'], default='soft')
+    }))
+    
+    bulk_patch_input = customers_ns.model('BulkPatchInput', dict(bulk_selection, **{
+        'set': fields.Nested(customer_update, required=True, description='Fields to set on every selected customer (not email)')
+    }))
+    
+    bulk_write_result = customers_ns.model('BulkWriteResult', {
+        'matched': fields.Integer(description='Customers selected by this call (all matches for a dry run)'),
+        'affected': fields.Integer(description='Customers written'),
+        'has_more': fields.Boolean(description='More customers match than the per-call cap; call again'),
+        'dry_run': fields.Boolean(description='Whether this was a dry run')
+    })
+    
+    @customers_ns.route('/bulk-delete')
+    class CustomerBulkDelete(Resource):
+        # Set-based writes over whole filters: admins only, whatever AUTH_TOKENS_REQUIRED says
+        method_decorators = [token_required(roles=['admin'], always=True)]
+        
+        @customers_ns.doc('bulk_delete_customers', description=(
+            'Soft-delete (default) or delete the customers selected by ids and/or a filter, '
+            'with set-based statements over chunks of ids. At most BULK_WRITE_MAX_ROWS '
+            'customers are written per call; has_more says whether to call again.'
+        ))
+        @customers_ns.expect(bulk_delete_input)
+        @customers_ns.marshal_with(bulk_write_result)
+        def post(self):
+            """Delete or deactivate many customers"""
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                customers_ns.abort(400, 'Expected a JSON object')
+            ids, filters, dry_run = get_bulk_selection(customers_ns, CUSTOMER_FILTERS, data)
+            mode = data.get('mode', 'soft')
+            if mode not in ('soft', 'hard'):
+                customers_ns.abort(400, 'mode must be soft or hard')
+            
+            try:
+                return CustomerRepository.bulk_delete(ids, filters, hard=mode == 'hard', **bulk_write_options(dry_run))
+            except Exception as e:
+                db.session.rollback()
+                customers_ns.abort(500, f'Error deleting customers: {str(e)}')
+    
+    @customers_ns.route('/bulk-patch')
+    class CustomerBulkPatch(Resource):
+        # Set-based writes over whole filters: admins only, whatever AUTH_TOKENS_REQUIRED says
+        method_decorators = [token_required(roles=['admin'], always=True)]
+        
+        @customers_ns.doc('bulk_patch_customers', description=(
+            'Set the same fields on the customers selected by ids and/or a filter, with '
+            'set-based statements over chunks of ids. Customers that already have the values '
+            'are left alone. At most BULK_WRITE_MAX_ROWS customers are written per call.'
+        ))
+        @customers_ns.expect(bulk_patch_input)
+        @customers_ns.marshal_with(bulk_write_result)
+        def post(self):
+            """Partially update many customers"""
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                customers_ns.abort(400, 'Expected a JSON object')
+            ids, filters, dry_run = get_bulk_selection(customers_ns, CUSTOMER_FILTERS, data)
+            values = data.get('set')
+            if not isinstance(values, dict):
+                customers_ns.abort(400, 'set must be an object of fields to update')
+            
+            try:
+                return CustomerRepository.bulk_patch(values, ids, filters, **bulk_write_options(dry_run))
+            except ValueError as e:
+                customers_ns.abort(400, str(e))
+            except Exception as e:
+                db.session.rollback()
+                customers_ns.abort(500, f'Error updating customers: {str(e)}')
+    
+    @customers_ns.route('/export')
+    class CustomerExport(Resource):
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('export_customers', params=dict(
+            {name: doc for name, doc in FILTER_PARAMS.items() if name != 'sort'},
+            format='Export format: ndjson (default) or csv',
+            search='Same search filter as the list endpoint',
+            company='Only customers of this company (exact match)'
+        ))
+        @customers_ns.produces(list(EXPORT_MIMETYPES.values()))
+        @conditional(collection_validators('customers'))
+        def get(self):
+            """Stream every customer as NDJSON or CSV"""
+            export_format = request.args.get('format', 'ndjson')
+            if export_format not in EXPORT_MIMETYPES:
+                customers_ns.abort(400, f'Unsupported format: {export_format}')
+            
+            filters = get_filter_args(customers_ns, CUSTOMER_FILTERS)
+            search_query = request.args.get('search', '')
+            batch_size = current_app.config['EXPORT_BATCH_SIZE']
+            rows = (
+                customer.to_dict()
+                for customer in CustomerRepository.iter_all(search_query, batch_size, **filters)
+            )
+            if export_format == 'csv':
+                columns = [c.name for c in Customer.__table__.columns]
+                chunks = csv_chunks(rows, columns, batch_size)
+            else:
+                chunks = ndjson_chunks(rows, batch_size)
+            
+            return Response(
+                stream_with_context(chunks),
+                mimetype=EXPORT_MIMETYPES[export_format],
+                headers={'Content-Disposition': f'attachment; filename=customers.{export_format}'}
+            )
+    
+    @customers_ns.route('/changes')
+    class CustomerChanges(Resource):
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('get_customer_changes', params=CHANGES_PARAMS, description=(
+            'Customers created, updated or deleted since a cursor, oldest change first. '
+            'Each customer appears once, at its latest change.'
+        ))
+        @customers_ns.response(200, 'Success', customer_changes)
+        @conditional(collection_validators('customers'))
+        def get(self):
+            """Get the customer change feed"""
+            limit, _ = get_page_args(customers_ns)
+            encoder = get_fields_arg(customers_ns, CUSTOMER_ENCODER)
+            since = get_since_arg(customers_ns, Customer)
+            try:
+                rows, next_seq = changes_since(Customer, encoder.columns, since, limit)
+            except Exception as e:
+                customers_ns.abort(500, f'Error retrieving customer changes: {str(e)}')
+            return changes_response(encoder, rows, next_seq, since, customer_changes)
+    
     @customers_ns.route('/<int:customer_id>')
     class CustomerResource(Resource):
-        @customers_ns.doc('get_customer')
-        @customers_ns.marshal_with(customer_model)
+        method_decorators = [token_required]
+        
+        @customers_ns.doc('get_customer', params=FIELDS_PARAM)
+        @customers_ns.response(200, 'Success', customer_model)
+        @conditional(row_validators(Customer, 'customer_id'))
         def get(self, customer_id):
             """Get a specific customer"""
+            encoder = get_fields_arg(customers_ns, CUSTOMER_ENCODER)
             try:
-                customer = CustomerRepository.get_by_id(customer_id)
-                if not customer:
-                    customers_ns.abort(404, 'Customer not found')
-                return customer.to_dict()
+                row = CustomerRepository.get_row(encoder.columns, customer_id)
             except Exception as e:
                 customers_ns.abort(500, f'Error retrieving customer: {str(e)}')
+            if row is None:
+                customers_ns.abort(404, 'Customer not found')
+            return json_response(encoder.encode_row(row), customer_model)
         
-        @customers_ns.doc('update_customer')
+        @customers_ns.doc('update_customer', description=(
+            'Same as PATCH: only the fields sent are written, in one versioned UPDATE, '
+            'and If-Match is honored. id, version and timestamps cannot be set.'
+        ))
         @customers_ns.expect(customer_update)
-        @customers_ns.marshal_with(customer_model)
+        @customers_ns.response(200, 'Success', customer_model)
+        @customers_ns.response(412, 'The customer was modified since the If-Match version')
         def put(self, customer_id):
             """Update a customer"""
+            return self.patch(customer_id)
+        
+        @customers_ns.doc('patch_customer', description=(
+            'Partial update in a single UPDATE statement. Send If-Match with the ETag '
+            'from a previous response to update only if nobody changed the customer '
+            'since; a mismatch returns 412.'
+        ))
+        @customers_ns.expect(customer_update)
+        @customers_ns.marshal_with(customer_model)
+        @customers_ns.response(412, 'The customer was modified since the If-Match version')
+        def patch(self, customer_id):
+            """Partially update a customer with optimistic concurrency"""
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                customers_ns.abort(400, 'Expected a JSON object')
+            expected_version = get_expected_version(customers_ns, 'customers', customer_id)
+            
             try:
-                customer = CustomerRepository.get_by_id(customer_id)
-                if not customer:
-                    customers_ns.abort(404, 'Customer not found')
-                
-                data = request.json
-                updated_customer = CustomerRepository.update(customer_id, **data)
-                return updated_customer.to_dict()
-                
+                customer = CustomerRepository.patch(customer_id, data, expected_version)
+            except ValueError as e:
+                customers_ns.abort(400, str(e))
+            except VersionConflictError as e:
+                customers_ns.abort(412, str(e))
+            except IntegrityError:
+                db.session.rollback()
+                customers_ns.abort(400, 'Email already exists')
             except Exception as e:
                 customers_ns.abort(500, f'Error updating customer: {str(e)}')
+            
+            if customer is None:
+                customers_ns.abort(404, 'Customer not found')
+            return patched_response('customers', customer)
         
         @customers_ns.doc('delete_customer')
         def delete(self, customer_id):
@@ -343,38 +1092,152 @@ def register_namespaces(api):
         'password': fields.String(required=True, description='User password')
     })
     
+    refresh_input = auth_ns.model('RefreshInput', {
+        'refresh_token': fields.String(required=True, description='Refresh token from login')
+    })
+    
+    def token_pair(user):
+        """Access and refresh tokens for a user"""
+        return {
+            'access_token': issue_token(user, 'access'),
+            'refresh_token': issue_token(user, 'refresh'),
+            'token_type': 'Bearer',
+            'expires_in': current_app.config['ACCESS_TOKEN_TTL']
+        }
+    
     @auth_ns.route('/login')
     class Login(Resource):
         @auth_ns.doc('login')
         @auth_ns.expect(auth_input)
         def post(self):
-            """Authenticate user"""
+            """Authenticate user and issue access/refresh tokens"""
+            data = request.json or {}
+            if not data.get('email') or not data.get('password'):
+                auth_ns.abort(400, 'Email and password are required')
+            
             try:
-                data = request.json
-                
-                if not data.get('email') or not data.get('password'):
-                    auth_ns.abort(400, 'Email and password are required')
-                
                 user = UserRepository.authenticate(data['email'], data['password'])
-                if user:
-                    return {
-                        'status': 'success',
-                        'message': 'Login successful',
-                        'user': user.to_dict()
-                    }
-                else:
-                    auth_ns.abort(401, 'Invalid credentials')
-                    
+            except HashingBusyError as e:
+                auth_ns.abort(503, str(e))
             except Exception as e:
                 auth_ns.abort(500, f'Error during authentication: {str(e)}')
+            
+            if not user:
+                auth_ns.abort(401, 'Invalid credentials')
+            return dict({
+                'status': 'success',
+                'message': 'Login successful',
+                'user': user.to_dict()
+            }, **token_pair(user))
+    
+    @auth_ns.route('/refresh')
+    class Refresh(Resource):
+        @auth_ns.doc('refresh')
+        @auth_ns.expect(refresh_input)
+        def post(self):
+            """Exchange a refresh token for a new token pair"""
+            data = request.json or {}
+            try:
+                claims = decode_token(data.get('refresh_token') or '', 'refresh')
+            except TokenError as e:
+                auth_ns.abort(401, str(e))
+            
+            user = UserRepository.get_by_id(claims['sub'])
+            if not user or not user.is_active:
+                auth_ns.abort(401, 'User is no longer active')
+            # Refresh tokens are single use, across all workers: only the first claim succeeds
+            if not revoke_token(claims):
+                auth_ns.abort(401, 'Token revoked')
+            return token_pair(user)
+    
+    @auth_ns.route('/logout')
+    class Logout(Resource):
+        @auth_ns.doc('logout', security='Bearer')
+        @auth_ns.expect(refresh_input, validate=False)
+        @token_required(always=True)
+        def post(self):
+            """Revoke the current access token and, if given, the refresh token"""
+            revoke_token(g.token_claims)
+            refresh = (request.get_json(silent=True) or {}).get('refresh_token')
+            if refresh:
+                try:
+                    revoke_token(decode_token(refresh, 'refresh'))
+                except TokenError:
+                    pass
+            return {'message': 'Logged out'}
+    
+    @auth_ns.route('/me')
+    class Me(Resource):
+        @auth_ns.doc('me', security='Bearer')
+        @token_required(always=True)
+        def get(self):
+            """Claims of the current access token (no database access)"""
+            return {
+                'user_id': g.token_claims['sub'],
+                'role': g.token_claims['role'],
+                'expires_at': g.token_claims['exp']
+            }
+    
+    # Event stream namespace
+    stream_ns = Namespace('stream', description='Server-Sent Events for user and customer changes')
+    
+    @stream_ns.route('')
+    class EventStream(Resource):
+        # EventSource cannot send headers, so the token may also come as ?access_token=
+        method_decorators = [token_required(query_param='access_token')]
+        
+        @stream_ns.doc('stream_events', params={
+            'topics': 'Comma-separated tables to follow: users, customers (default: both)',
+            'last_event_id': 'Resume after this event id (browsers send the Last-Event-ID header on reconnect)',
+            'access_token': 'Access token, for clients that cannot send an Authorization header'
+        }, description=(
+            'text/event-stream of changes. Each event is named after its table, has the '
+            'change feed seq as its id and {"op", "id", "record"} as data. Reconnecting '
+            'with Last-Event-ID replays missed changes; a reset event means too many were '
+            'missed and the client should reload over REST.'
+        ))
+        @stream_ns.produces(['text/event-stream'])
+        def get(self):
+            """Stream user and customer changes"""
+            topics, last_event_id = get_stream_args(stream_ns)
+            broker = current_app.extensions['event_broker']
+            if broker.max_subscribers == 0:
+                stream_ns.abort(503, 'Event streams are not served by this worker class')
+            # Subscribe before replaying, so nothing committed in between is missed
+            subscriber = broker.subscribe(topics)
+            if subscriber is None:
+                stream_ns.abort(503, 'Too many open event streams')
+            
+            preamble = [f"retry: {current_app.config['SSE_RETRY_MS']}\n\n".encode('ascii')]
+            replayed_up_to = 0
+            if last_event_id is not None:
+                try:
+                    messages, replayed_up_to = broker.replay(
+                        topics, last_event_id, current_app.config['SSE_REPLAY_LIMIT']
+                    )
+                except Exception as e:
+                    broker.unsubscribe(subscriber)
+                    stream_ns.abort(500, f'Error replaying events: {str(e)}')
+                preamble.extend(messages)
+            
+            # The generator needs no app context, so the DB session is released before streaming
+            return Response(
+                event_stream(broker, subscriber, preamble, replayed_up_to, current_app.config['SSE_HEARTBEAT_INTERVAL']),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
     
     # Register namespaces
     api.add_namespace(health_ns, path='/health')
+    api.add_namespace(metrics_ns, path='/metrics')
+    api.add_namespace(admin_ns, path='/admin')
     api.add_namespace(users_ns, path='/users')
     api.add_namespace(customers_ns, path='/customers')
     api.add_namespace(auth_ns, path='/auth')
+    api.add_namespace(stream_ns, path='/stream')
 
 if __name__ == '__main__':
+    # Local runs only: run.py (development) and serve.py (production) are the entry points
     app = create_app()
     port = int(os.getenv('PORT', 5001))
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(host='127.0.0.1', port=port)
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the backend.
+
+Run from the backend directory, e.g. `python -m benchmarks.login_throughput`.
+Each benchmark creates its own throwaway SQLite database.
+"""
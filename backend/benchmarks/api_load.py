@@ -0,0 +1,251 @@
+"""
+End-to-end API load test against a seeded database.
+
+Seeds a throwaway database (benchmarks.seed) or reuses one given with
+--database, starts the API as a subprocess (serve.py, or run.py with
+--server dev), and drives each /api/v1 endpoint in turn at a fixed
+concurrency over keep-alive HTTP connections. Each endpoint reports
+requests/s, p50/p95/p99 latency and unexpected responses. Peak RSS is the
+largest sum of resident memory across the server's processes, sampled every
+SAMPLE_INTERVAL seconds (Linux /proc only). With --output the JSON
+artifact is also written to a file, so runs on two commits can be diffed.
+
+    python -m benchmarks.api_load --size 100k --requests 1000 --concurrency 16 --output before.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import BACKEND_DIR, free_port, start_server, run_concurrently, percentile, report
+from benchmarks.seed import FIRST_NAMES, LAST_NAMES, SEED_PASSWORD, parse_size, seed_database
+
+# Seconds between RSS samples of the server processes
+SAMPLE_INTERVAL = 0.2
+
+def endpoints(dataset, requests, login_requests, rng):
+    """
+    (name, request count, request(i) -> (method, path, body), expected
+    statuses) for every endpoint. Customer ids 1 .. customers are seeded; the
+    top `requests` ids are reserved for deletes so other calls keep finding
+    their rows.
+    """
+    customers, users = dataset['customer_ids'], dataset['user_ids']
+    readable = max(1, customers[1] - requests)
+    nonce = f'{int(time.time())}{os.getpid()}'
+    words = [name.lower()[:4] for name in FIRST_NAMES + LAST_NAMES]
+
+    def customer_id():
+        return rng.randint(customers[0], readable)
+
+    return [
+        ('health', requests, lambda i: ('GET', '/api/v1/health', None), {200}),
+        ('customers_list', requests, lambda i: ('GET', '/api/v1/customers?limit=50', None), {200}),
+        ('customers_search', requests,
+         lambda i: ('GET', f'/api/v1/customers?search={rng.choice(words)}&limit=20', None), {200}),
+        ('customers_get', requests, lambda i: ('GET', f'/api/v1/customers/{customer_id()}', None), {200}),
+        ('customers_create', requests, lambda i: ('POST', '/api/v1/customers', {
+            'name': f'Load Test {i}', 'email': f'load.{nonce}.{i}@example.com', 'company': 'Bench Inc'
+        }), {201}),
+        ('customers_update', requests, lambda i: ('PUT', f'/api/v1/customers/{customer_id()}', {
+            'notes': f'Updated by load test {i}'
+        }), {200}),
+        ('customers_patch', requests, lambda i: ('PATCH', f'/api/v1/customers/{customer_id()}', {
+            'notes': f'Patched by load test {i}'
+        }), {200}),
+        ('customers_delete', requests,
+         lambda i: ('DELETE', f'/api/v1/customers/{customers[1] - i}', None), {200}),
+        ('users_list', requests, lambda i: ('GET', '/api/v1/users?limit=50', None), {200}),
+        ('users_get', requests,
+         lambda i: ('GET', f'/api/v1/users/{rng.randint(users[0], users[1])}', None), {200}),
+        ('auth_login', login_requests, lambda i: ('POST', '/api/v1/auth/login', {
+            'email': dataset['login_email'], 'password': SEED_PASSWORD
+        }), {200}),
+    ]
+
+def drive(port, total, concurrency, make_request, expected):
+    """Send `total` requests from `concurrency` threads, one keep-alive connection each"""
+    local = threading.local()
+    errors = {}
+    lock = threading.Lock()
+
+    def call(i):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        method, path, body = make_request(i)
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            outcome = None if response.status in expected else str(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            outcome = type(e).__name__
+            conn.close()
+            local.conn = None
+        if outcome:
+            with lock:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    elapsed, latencies = run_concurrently(call, total, concurrency)
+    return {
+        'requests': total,
+        'requests_per_second': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': errors
+    }
+
+def process_tree(pid):
+    """pid and all its descendants, from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+def rss_bytes(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+class RssSampler:
+    """Background thread tracking the peak summed RSS of a process tree"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes(process_tree(self.pid)))
+            self._stop.wait(SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        if os.path.isdir('/proc'):
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+def describe_dataset(database_url):
+    """Id ranges and a login email of a seeded database"""
+    from app import create_app
+    from models import db, User, Customer
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'PASSWORD_HASH_WORKERS': 0,
+                      'FIREBASE_SYNC_ENABLED': False}, background=False)
+    with app.app_context():
+        customer_ids = db.session.execute(db.select(db.func.min(Customer.id), db.func.max(Customer.id))).one()
+        user_ids = db.session.execute(db.select(db.func.min(User.id), db.func.max(User.id))).one()
+        login_email = db.session.execute(
+            db.select(User.email).where(User.role == 'user').order_by(User.id).limit(1)
+        ).scalar()
+    if customer_ids[0] is None or login_email is None:
+        raise SystemExit('The database has no seeded customers or users; run benchmarks.seed first')
+    return {'customer_ids': tuple(customer_ids), 'user_ids': tuple(user_ids), 'login_email': login_email}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', default='10k', help='Customers to seed: 10k, 100k, 1m or a number')
+    parser.add_argument('--database', help='Use an already seeded database instead (it is modified)')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+    parser.add_argument('--login-requests', type=int, default=100,
+                        help='Requests for auth_login, which pays a full password hash each')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--server', choices=('serve', 'dev'), default='serve',
+                        help='serve.py (production launcher) or run.py (werkzeug dev server)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='serve.py workers')
+    parser.add_argument('--endpoints', help='Comma-separated subset of endpoint names')
+    parser.add_argument('--output', help='Also write the JSON artifact to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database
+        seeded = None
+        if not database_url:
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            customers = parse_size(args.size)
+            seeded = seed_database(database_url, customers, max(1, customers // 10))
+        dataset = describe_dataset(database_url)
+        if dataset['customer_ids'][1] - dataset['customer_ids'][0] < args.requests * 2:
+            raise SystemExit('Not enough customers for the deletes; seed more or lower --requests')
+
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port), WEB_BIND=f'127.0.0.1:{port}',
+                   WEB_WORKERS=str(args.workers), FIREBASE_SYNC_ENABLED='false', AUTH_TOKENS_REQUIRED='false',
+                   FLASK_DEBUG='false', FLASK_ENV='production', SECRET_KEY='bench')
+        command = [sys.executable, 'serve.py' if args.server == 'serve' else 'run.py']
+        process = start_server(command, env, port)
+        rng = random.Random(1)
+        selected = set(args.endpoints.split(',')) if args.endpoints else None
+        results = []
+        try:
+            with RssSampler(process.pid) as sampler:
+                for name, total, make_request, expected in endpoints(dataset, args.requests,
+                                                                     args.login_requests, rng):
+                    if selected and name not in selected:
+                        continue
+                    results.append(dict(endpoint=name, **drive(port, total, args.concurrency, make_request, expected)))
+        finally:
+            process.terminate()
+            process.wait(30)
+
+    artifact = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'server': f'{args.server} ({args.workers} workers)' if args.server == 'serve' else 'dev',
+        'concurrency': args.concurrency,
+        'dataset': {
+            'customers': dataset['customer_ids'][1] - dataset['customer_ids'][0] + 1,
+            'users': dataset['user_ids'][1] - dataset['user_ids'][0] + 1,
+            'seeding': seeded
+        },
+        'peak_rss_mb': round(sampler.peak / 2 ** 20, 1) if sampler.peak else None,
+        'endpoints': results
+    }
+    report('api_load', artifact)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': 'api_load', 'results': artifact}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
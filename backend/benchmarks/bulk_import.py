@@ -0,0 +1,95 @@
+"""
+Bulk customer import throughput across SQLite storage profiles.
+
+For each writable profile, imports --rows customers through
+CustomerRepository.bulk_create and again as NDJSON through
+POST /api/v1/customers/bulk, each into a fresh database. A plain sqlite3
+executemany into a bare customers-shaped table (no indexes, triggers or
+change feed) is reported as the floor the machine allows.
+
+    python -m benchmarks.bulk_import --rows 200000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.common import report
+from config.app_config import STORAGE_PROFILES
+
+def records(rows, prefix=''):
+    return [
+        {'name': f'Customer {i}', 'email': f'{prefix}customer{i}@example.com',
+         'company': f'Company {i % 500}', 'phone': '555-0100'}
+        for i in range(rows)
+    ]
+
+def raw_executemany(path, rows):
+    """Rows/s of a bare executemany: the ceiling for any import path"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, email TEXT, phone TEXT, company TEXT, '
+        'notes TEXT, is_active INTEGER, created_at TEXT, updated_at TEXT, version INTEGER)'
+    )
+    now = '2024-01-01 00:00:00'
+    values = [(r['name'], r['email'], r['phone'], r['company'], None, 1, now, now, 1) for r in records(rows)]
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(
+            'INSERT INTO customers (name, email, phone, company, notes, is_active, created_at, updated_at, version) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', values
+        )
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return rows / elapsed
+
+def run_profile(profile, tmp, args):
+    from app import create_app
+    from models import CustomerRepository
+
+    result = {'profile': profile}
+    for path_name in ('repository', 'api'):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, f'{profile}-{path_name}.db')}",
+            'STORAGE_PROFILE': profile,
+            'FIREBASE_SYNC_ENABLED': False,
+            'OUTBOX_DRAINER_ENABLED': False,
+            'QUERY_PROFILER_ENABLED': False,
+            'PASSWORD_HASH_WORKERS': 0
+        }, background=False)
+        if path_name == 'repository':
+            batch = records(args.rows)
+            with app.app_context():
+                start = time.perf_counter()
+                created = CustomerRepository.bulk_create(batch, batch_size=app.config['BULK_IMPORT_BATCH_SIZE'])['created']
+                elapsed = time.perf_counter() - start
+        else:
+            body = '\n'.join(json.dumps(record) for record in records(args.rows)).encode('utf-8')
+            client = app.test_client()
+            start = time.perf_counter()
+            response = client.post('/api/v1/customers/bulk', data=body, content_type='application/x-ndjson')
+            elapsed = time.perf_counter() - start
+            created = response.get_json()['created']
+        result[f'{path_name}_rows_per_second'] = round(created / elapsed)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--profiles', default=','.join(
+        name for name, profile in STORAGE_PROFILES.items() if profile['pragmas'].get('query_only') != 'ON'
+    ))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [{'profile': 'raw executemany',
+                    'repository_rows_per_second': round(raw_executemany(os.path.join(tmp, 'raw.db'), args.rows))}]
+        results.extend(run_profile(profile, tmp, args) for profile in args.profiles.split(','))
+
+    report('bulk_import', results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Shared helpers for benchmarks.
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Allow `python benchmarks/<name>.py` as well as `python -m benchmarks.<name>`
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+@contextmanager
+def temp_app(**config_overrides):
+    """Create the app on a throwaway SQLite database"""
+    from app import create_app
+    with tempfile.TemporaryDirectory() as tmp:
+        overrides = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'FIREBASE_SYNC_ENABLED': False
+        }
+        overrides.update(config_overrides)
+        app = create_app(overrides)
+        yield app
+
+def run_concurrently(fn, total, concurrency):
+    """
+    Call fn(i) for i in range(total) on `concurrency` threads.
+    Returns (elapsed seconds, per-call latencies in seconds).
+    """
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            fn(i)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(command, env, port, timeout=60, health_path='/api/v1/health'):
+    """Start a server subprocess and wait until its health check answers"""
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', health_path)
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'Server did not start: {" ".join(command)}')
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def report(name, results):
+    """Print benchmark results as JSON"""
+    print(json.dumps({'benchmark': name, 'results': results}, indent=2))
@@ -0,0 +1,102 @@
+"""
+Firebase mirroring cost against the in-memory fake database.
+
+Writes the same N customer records four ways through FirebaseConfig with
+FIREBASE_BACKEND=fake: one sync_data() call per record, a concurrent
+set_many() fan-out, a single multi-path update_paths(), and the outbox drainer
+shipping rows queued by a bulk import. Latency, jitter and failure rate are
+injected per call, so the numbers show how each path scales with round trips
+rather than with real network conditions.
+
+    python -m benchmarks.firebase_sync --records 200 --latency-ms 50 --failure-rate 0.05
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.common import temp_app, report
+
+def record(i):
+    return {'id': i, 'name': f'Customer {i}', 'email': f'customer{i}@example.com', 'is_active': True}
+
+def timed(name, records, fn):
+    start = time.perf_counter()
+    errors = fn()
+    elapsed = time.perf_counter() - start
+    return {
+        'path': name,
+        'records': records,
+        'seconds': round(elapsed, 3),
+        'records_per_second': round(records / elapsed, 1) if elapsed else None,
+        'errors': errors
+    }
+
+def outbox_drain(firebase, records, timeout=120):
+    """Queue records through a bulk import, then drain the outbox to the fake database"""
+    from models import CustomerRepository, OutboxEntry
+    from outbox import OutboxDrainer
+
+    with temp_app(FIREBASE_SYNC_ENABLED=True, OUTBOX_DRAINER_ENABLED=False, PASSWORD_HASH_WORKERS=0,
+                  OUTBOX_BASE_BACKOFF=0.01, OUTBOX_MAX_BACKOFF=0.1) as app:
+        with app.app_context():
+            CustomerRepository.bulk_create(
+                ({'name': f'Customer {i}', 'email': f'customer{i}@example.com'} for i in range(records)),
+                batch_size=5000
+            )
+            drainer = OutboxDrainer(app, send=firebase.update_paths)
+
+            def drain():
+                deadline = time.monotonic() + timeout
+                while OutboxEntry.query.count() and time.monotonic() < deadline:
+                    sent, wait = drainer.drain_once()
+                    if not sent:
+                        time.sleep(wait)
+                return drainer.failures
+
+            return timed('outbox drainer', records, drain)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=16, help='FIREBASE_MAX_CONCURRENCY for set_many')
+    args = parser.parse_args()
+
+    # Before config is first imported: its values are read from the environment once
+    os.environ.update(
+        FIREBASE_BACKEND='fake', FIREBASE_FAKE_SEED='1',
+        FIREBASE_FAKE_LATENCY_MS=str(args.latency_ms), FIREBASE_FAKE_JITTER_MS=str(args.jitter_ms),
+        FIREBASE_FAKE_FAILURE_RATE=str(args.failure_rate), FIREBASE_MAX_CONCURRENCY=str(args.concurrency),
+        FIREBASE_CACHE_ENABLED='false'
+    )
+    from config.firebase_config import FirebaseConfig
+
+    firebase = FirebaseConfig()
+    records = {f'customers/{i}': record(i) for i in range(args.records)}
+    results = [
+        timed('sync_data per record', args.records,
+              lambda: sum(not firebase.sync_data(path, data) for path, data in records.items())),
+        timed('set_many fan-out', args.records,
+              lambda: sum(result.error is not None for result in firebase.set_many(records))),
+    ]
+
+    def multi_path():
+        try:
+            firebase.update_paths(records)
+            return 0
+        except Exception:
+            return 1
+    results.append(timed('update_paths (one multi-path update)', args.records, multi_path))
+    results.append(outbox_drain(firebase, args.records))
+    firebase.close()
+
+    report('firebase_sync', {
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'failure_rate': args.failure_rate,
+        'concurrency': args.concurrency, 'fake_database': firebase.app.stats(), 'runs': results
+    })
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Login throughput versus password hashing pool size.
+
+Fires concurrent POST /api/v1/auth/login requests from a thread pool while
+varying PASSWORD_HASH_WORKERS (0 = hash inline on the request thread), and
+reports logins/s and latency percentiles for each pool size.
+
+    python -m benchmarks.login_throughput --requests 200 --concurrency 16
+"""
+
+import argparse
+import os
+import threading
+
+from benchmarks.common import temp_app, run_concurrently, percentile, report
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=max(8, cpus * 2))
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD to benchmark')
+    parser.add_argument('--workers', default=None,
+                        help='Comma-separated pool sizes (default: 0,1,2,4,... up to CPU count)')
+    args = parser.parse_args()
+
+    if args.workers:
+        pool_sizes = [int(w) for w in args.workers.split(',')]
+    else:
+        pool_sizes = [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cpus] + [cpus]
+
+    overrides = {'PASSWORD_HASH_MAX_PENDING': max(64, args.concurrency * 2)}
+    if args.method:
+        overrides['PASSWORD_HASH_METHOD'] = args.method
+
+    results = []
+    for workers in pool_sizes:
+        with temp_app(PASSWORD_HASH_WORKERS=workers, **overrides) as app:
+            clients = {}
+
+            def login(_):
+                client = clients.setdefault(threading.get_ident(), app.test_client())
+                response = client.post('/api/v1/auth/login', json={
+                    'email': 'admin@example.com',
+                    'password': 'admin123'
+                })
+                assert response.status_code == 200, response.get_data(as_text=True)
+
+            elapsed, latencies = run_concurrently(login, args.requests, args.concurrency)
+            results.append({
+                'hash_workers': workers,
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'logins_per_second': round(args.requests / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+            })
+
+    report('login_throughput', {'cpus': cpus, 'runs': results})
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Synthetic dataset for benchmarks: realistic customers and users, bulk inserted.
+
+Customers go through CustomerRepository.bulk_create, the same path as
+POST /customers/bulk, so the search index, change feed and table versions
+are maintained as in production. Users are inserted with one executemany
+per batch and share one precomputed password hash (SEED_PASSWORD), because
+hashing a million passwords would dominate the run. Generation is seeded, so
+the same --size and --seed produce the same rows. Rows are numbered after
+those already present, so seeding twice adds more rows rather than failing
+on duplicate emails.
+
+    python -m benchmarks.seed --size 100k --database sqlite:///bench.db
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import benchmarks.common  # noqa: F401  (puts the backend on sys.path)
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Password of every seeded user
+SEED_PASSWORD = 'bench-password'
+
+FIRST_NAMES = [
+    'Olivia', 'Liam', 'Emma', 'Noah', 'Amelia', 'Oliver', 'Ava', 'Elijah', 'Sophia', 'Mateo',
+    'Isabella', 'Lucas', 'Mia', 'Levi', 'Harper', 'Asher', 'Aiko', 'Ravi', 'Chen', 'Fatima',
+    'Jose', 'Ana', 'Ingrid', 'Kwame', 'Yusuf', 'Priya', 'Sven', 'Lucia', 'Tomas', 'Zara'
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+    'Martinez', 'Nguyen', 'Kim', 'Patel', 'Tanaka', 'Muller', 'Rossi', 'Silva', 'Kowalski',
+    'Okafor', 'Haddad', 'Larsen', 'Novak', 'Dubois', 'Ivanova', 'Moreno', 'Sato', 'Cohen', 'Singh'
+]
+COMPANY_WORDS = [
+    'Acme', 'Globex', 'Initech', 'Umbrella', 'Northwind', 'Contoso', 'Fabrikam', 'Stark', 'Wayne',
+    'Tyrell', 'Cyberdyne', 'Hooli', 'Vandelay', 'Soylent', 'Wonka', 'Oscorp', 'Pied Piper', 'Aperture'
+]
+COMPANY_SUFFIXES = ['Inc', 'LLC', 'Ltd', 'GmbH', 'Group', 'Labs', 'Holdings', 'Systems']
+DOMAINS = ['example.com', 'example.org', 'example.net', 'mail.test', 'corp.test']
+NOTES = [
+    None, None, None, 'Prefers email contact', 'Renewal due next quarter', 'Key account',
+    'Requested a product demo', 'Pays by invoice', 'Met at the trade show', 'Follow up in two weeks'
+]
+
+def parse_size(value: str) -> int:
+    """'10k', '100k', '1m' or a plain row count"""
+    key = value.strip().lower()
+    if key in SIZES:
+        return SIZES[key]
+    count = int(key)
+    if count < 0:
+        raise ValueError('Size must not be negative')
+    return count
+
+def _person(rng: random.Random, number: int):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email = f'{first}.{last}.{number}@{rng.choice(DOMAINS)}'.lower()
+    return f'{first} {last}', email
+
+def customer_records(rng: random.Random, start: int, count: int):
+    """Customer dicts numbered start .. start + count - 1"""
+    for number in range(start, start + count):
+        name, email = _person(rng, number)
+        yield {
+            'name': name,
+            'email': email,
+            'phone': f'+1-{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}' if rng.random() < 0.8 else None,
+            'company': f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}' if rng.random() < 0.7 else None,
+            'notes': rng.choice(NOTES)
+        }
+
+def seed_customers(count: int, rng: random.Random, batch_size: int = 5000) -> int:
+    """Insert `count` customers; returns how many were created"""
+    from models import db, Customer, CustomerRepository
+
+    start = db.session.execute(db.select(db.func.count()).select_from(Customer)).scalar()
+    created = 0
+    # One bulk_create call per batch keeps the per-row report small at 1M rows
+    for offset in range(0, count, batch_size):
+        records = customer_records(rng, start + offset, min(batch_size, count - offset))
+        created += CustomerRepository.bulk_create(records, batch_size=batch_size)['created']
+    return created
+
+def seed_users(count: int, rng: random.Random, batch_size: int = 5000) -> int:
+    """Insert `count` users with role 'user' and password SEED_PASSWORD; returns how many were created"""
+    from hashing import get_hasher
+    from models import db, User, executemany_insert, notify_bulk_write, bulk_write_listeners
+
+    table = User.__table__
+    password_hash = get_hasher().hash(SEED_PASSWORD)
+    start = db.session.execute(db.select(db.func.count()).select_from(User)).scalar()
+    created = 0
+    for offset in range(0, count, batch_size):
+        rows = []
+        for number in range(start + offset, start + min(offset + batch_size, count)):
+            name, email = _person(rng, number)
+            rows.append({'email': email, 'username': name})
+        now = datetime.utcnow()
+        executemany_insert(table, rows, password_hash=password_hash, role='user', is_active=True,
+                           created_at=now, updated_at=now, version=1)
+        if bulk_write_listeners:
+            ids = dict(db.session.execute(
+                db.select(table.c.email, table.c.id).where(table.c.email.in_([row['email'] for row in rows]))
+            ).all())
+            stamp = now.isoformat()
+            notify_bulk_write(User, [
+                (ids[row['email']], dict(row, id=ids[row['email']], role='user', is_active=True,
+                                         created_at=stamp, updated_at=stamp, version=1))
+                for row in rows
+            ])
+        db.session.commit()
+        created += len(rows)
+    return created
+
+def seed_database(database_url: str, customers: int, users: int, seed: int = 1,
+                  batch_size: int = 5000) -> dict:
+    """Create the schema on database_url and add the rows; returns counts and timings"""
+    from app import create_app
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'PASSWORD_HASH_WORKERS': 0,
+                      'FIREBASE_SYNC_ENABLED': False}, background=False)
+    rng = random.Random(seed)
+    with app.app_context():
+        start = time.perf_counter()
+        created_customers = seed_customers(customers, rng, batch_size)
+        customer_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        created_users = seed_users(users, rng, batch_size)
+        user_seconds = time.perf_counter() - start
+    return {
+        'customers': created_customers,
+        'customer_rows_per_second': round(created_customers / customer_seconds) if customer_seconds else None,
+        'users': created_users,
+        'user_rows_per_second': round(created_users / user_seconds) if user_seconds else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', default='10k', help='Customers to add: 10k, 100k, 1m or a number')
+    parser.add_argument('--users', type=int, default=None, help='Users to add (default: a tenth of --size)')
+    parser.add_argument('--database', required=True, help='SQLAlchemy URL, e.g. sqlite:///bench.db')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated rows')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    customers = parse_size(args.size)
+    users = args.users if args.users is not None else customers // 10
+    result = seed_database(args.database, customers, users, args.seed, args.batch_size)
+    benchmarks.common.report('seed', dict(result, database=args.database))
+
+if __name__ == '__main__':
+    main()
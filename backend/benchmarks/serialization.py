@@ -0,0 +1,101 @@
+"""
+List serialization: ORM objects + to_dict() + marshal vs Core rows + RowEncoder.
+
+Seeds a throwaway database, then serializes the same rows as one list page
+through each path, reporting rows/s (best of --repeat runs) and peak Python
+memory (tracemalloc, separate run).
+
+    python -m benchmarks.serialization --rows 100000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from flask_restx import fields, marshal
+
+from benchmarks.common import temp_app, report
+
+# Mirrors the Swagger Customer/CustomerPage models in app.py
+CUSTOMER_FIELDS = {
+    'id': fields.Integer,
+    'name': fields.String,
+    'email': fields.String,
+    'phone': fields.String,
+    'company': fields.String,
+    'notes': fields.String,
+    'is_active': fields.Boolean,
+    'created_at': fields.String,
+    'updated_at': fields.String,
+    'version': fields.Integer
+}
+PAGE_FIELDS = {
+    'items': fields.List(fields.Nested(CUSTOMER_FIELDS)),
+    'next_cursor': fields.String
+}
+
+def orm_marshal(limit):
+    """The previous path: ORM page, to_dict(), marshal_with, JSON dump"""
+    from models import db, Customer
+    customers = Customer.query.order_by(Customer.id).limit(limit).all()
+    body = json.dumps(marshal({'items': [c.to_dict() for c in customers], 'next_cursor': None}, PAGE_FIELDS)) + '\n'
+    db.session.remove()
+    return body.encode('utf-8')
+
+def core_encoder(limit):
+    """The fast path: Core rows of the API columns encoded in one pass"""
+    from models import db, CustomerRepository
+    from serializers import CUSTOMER_ENCODER
+    rows, _ = CustomerRepository.get_page_rows(CUSTOMER_ENCODER.columns, limit)
+    body = CUSTOMER_ENCODER.encode_page(rows, None)
+    db.session.remove()
+    return body
+
+def measure(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'rows_per_second': round(rows / best),
+        'seconds': round(best, 3),
+        'peak_memory_mb': round(peak / 1024 / 1024, 1),
+        'body_bytes': len(body)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Customers seeded and serialized')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import serializers
+    with temp_app(PASSWORD_HASH_WORKERS=0) as app, app.app_context():
+        from models import CustomerRepository
+        CustomerRepository.bulk_create(
+            ({'name': f'Customer {i}', 'email': f'customer{i}@example.com', 'company': f'Company {i % 100}'}
+             for i in range(args.rows)),
+            batch_size=5000
+        )
+
+        results = [dict(path='orm+to_dict+marshal', **measure(orm_marshal, args.rows, args.repeat))]
+        installed_orjson = serializers.orjson
+        if installed_orjson is not None:
+            results.append(dict(path='core+encoder (orjson)', **measure(core_encoder, args.rows, args.repeat)))
+        serializers.orjson = None
+        try:
+            results.append(dict(path='core+encoder (json)', **measure(core_encoder, args.rows, args.repeat)))
+        finally:
+            serializers.orjson = installed_orjson
+
+    report('serialization', results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Development server (run.py) versus the production launcher (serve.py).
+
+Seeds a throwaway database, starts each server as a subprocess on it, and
+fires keep-alive GET requests from a thread pool at a list page and the
+health check, reporting requests/s and latency percentiles per server.
+The load generator shares the machine, so compare servers against each
+other rather than reading the numbers as absolute capacity.
+
+    python -m benchmarks.server_comparison --requests 4000 --concurrency 32
+"""
+
+import argparse
+import http.client
+import os
+import sys
+import tempfile
+import threading
+
+from benchmarks.common import free_port, start_server, run_concurrently, percentile, report
+
+ENDPOINTS = {
+    'list': '/api/v1/customers?limit=50',
+    'health': '/api/v1/health'
+}
+
+def seed(database_url, customers):
+    """Create the schema and customers before any server starts"""
+    from app import create_app
+    from models import CustomerRepository
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'PASSWORD_HASH_WORKERS': 0,
+                      'FIREBASE_SYNC_ENABLED': False})
+    with app.app_context():
+        CustomerRepository.bulk_create(
+            ({'name': f'Customer {i}', 'email': f'customer{i}@example.com'} for i in range(customers)),
+            batch_size=5000
+        )
+
+def load(port, path, total, concurrency):
+    """Keep-alive GETs, one connection per client thread"""
+    local = threading.local()
+    errors = []
+
+    def request(_):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            local.conn = None
+
+    elapsed, latencies = run_concurrently(request, total, concurrency)
+    return {
+        'requests_per_second': round(total / elapsed),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'errors': len(errors)
+    }
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=4000, help='Requests per endpoint and server')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--customers', type=int, default=10000, help='Customers seeded')
+    parser.add_argument('--workers', type=int, default=cpus, help='serve.py worker processes')
+    parser.add_argument('--worker-classes', default='sync,gthread',
+                        help='Comma-separated serve.py worker classes (gevent needs the gevent package)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(database_url, args.customers)
+
+        base_env = dict(os.environ, DATABASE_URL=database_url, FIREBASE_SYNC_ENABLED='false',
+                        FLASK_DEBUG='false', FLASK_ENV='production', SECRET_KEY='bench')
+        servers = [('run.py (werkzeug dev server)', [sys.executable, 'run.py'], {})]
+        for worker_class in args.worker_classes.split(','):
+            servers.append((
+                f'serve.py ({args.workers} x {worker_class})', [sys.executable, 'serve.py'],
+                {'WEB_WORKERS': str(args.workers), 'WEB_WORKER_CLASS': worker_class}
+            ))
+
+        results = []
+        for name, command, extra_env in servers:
+            port = free_port()
+            env = dict(base_env, PORT=str(port), WEB_BIND=f'127.0.0.1:{port}', **extra_env)
+            process = start_server(command, env, port)
+            try:
+                for endpoint, path in ENDPOINTS.items():
+                    # Warm up connections and caches before measuring
+                    load(port, path, min(200, args.requests), args.concurrency)
+                    results.append(dict(server=name, endpoint=endpoint,
+                                        **load(port, path, args.requests, args.concurrency)))
+            finally:
+                process.terminate()
+                process.wait(30)
+
+    report('server_comparison', results)
+
+if __name__ == '__main__':
+    main()
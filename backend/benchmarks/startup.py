@@ -0,0 +1,92 @@
+"""
+Cold start: interpreter launch, `import app` and create_app() in fresh processes.
+
+Each run is a new Python process, so nothing is cached in memory. The first
+start scenario points every run at an empty database (full bootstrap,
+including the default admin's password hash). The restart scenario reuses a
+bootstrapped one, which is what a deploy or a worker recycle pays. Exits
+non-zero when the restart median exceeds --budget-ms, or when a module that
+should load lazily (alembic, Firebase) was imported during startup, so the
+benchmark can gate CI.
+
+    python -m benchmarks.startup --runs 7 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import BACKEND_DIR, report
+
+# Modules that only specific commands need; importing them at startup is a regression
+LAZY_MODULES = ('flask_migrate', 'alembic', 'firebase_admin')
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app({'PASSWORD_HASH_WORKERS': 0})
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'lazy_modules_loaded': sorted(name for name in %r if name in sys.modules)
+}))
+''' % (LAZY_MODULES,)
+
+def probe(database_url):
+    """Start one process; returns its timings plus the wall time seen from here"""
+    env = dict(os.environ, DATABASE_URL=database_url, FIREBASE_SYNC_ENABLED='false', FLASK_ENV='production',
+               SECRET_KEY='bench')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', _PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    result['wall_ms'] = wall_ms
+    return result
+
+def summarize(scenario, runs):
+    return {
+        'scenario': scenario,
+        'runs': len(runs),
+        'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 1),
+        'import_ms': round(statistics.median(run['import_ms'] for run in runs), 1),
+        'create_app_ms': round(statistics.median(run['create_app_ms'] for run in runs), 1),
+        'lazy_modules_loaded': sorted({name for run in runs for name in run['lazy_modules_loaded']})
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Processes per scenario (medians are reported)')
+    parser.add_argument('--budget-ms', type=float, default=1000,
+                        help='Maximum median wall time of a restart, in milliseconds')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = [probe(f"sqlite:///{os.path.join(tmp, f'first-{i}.db')}") for i in range(args.runs)]
+        database_url = f"sqlite:///{os.path.join(tmp, 'bootstrapped.db')}"
+        probe(database_url)
+        restart = [probe(database_url) for _ in range(args.runs)]
+
+    results = [summarize('first start (empty database)', first), summarize('restart (bootstrapped)', restart)]
+    report('startup', results)
+
+    failures = []
+    if results[1]['wall_ms'] > args.budget_ms:
+        failures.append(f"restart took {results[1]['wall_ms']} ms, budget is {args.budget_ms:g} ms")
+    loaded = sorted({name for result in results for name in result['lazy_modules_loaded']})
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
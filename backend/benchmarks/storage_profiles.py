@@ -0,0 +1,97 @@
+"""
+Write and read throughput across SQLite storage profiles.
+
+For each profile, seeds a throwaway database, then runs concurrent
+single-row creates (one commit each) and concurrent primary-key reads,
+counting "database is locked" failures.
+
+    python -m benchmarks.storage_profiles --rows 5000 --writes 2000 --reads 20000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.common import run_concurrently, percentile, report
+from config.app_config import STORAGE_PROFILES
+
+def run_profile(profile, db_path, args, seed):
+    from app import create_app
+    from models import db, CustomerRepository
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'STORAGE_PROFILE': profile,
+        'FIREBASE_SYNC_ENABLED': False,
+        'PASSWORD_HASH_WORKERS': 0
+    })
+    if seed:
+        with app.app_context():
+            CustomerRepository.bulk_create(
+                ({'name': f'Seed {i}', 'email': f'seed{i}@example.com'} for i in range(args.rows)),
+                batch_size=1000
+            )
+
+    errors = {'write': 0, 'read': 0}
+    read_only = STORAGE_PROFILES[profile]['pragmas'].get('query_only') == 'ON'
+
+    def write(i):
+        with app.app_context():
+            try:
+                CustomerRepository.create(name=f'Bench {i}', email=f'{profile}-{i}@bench.example.com')
+            except Exception:
+                db.session.rollback()
+                errors['write'] += 1
+
+    def read(i):
+        with app.app_context():
+            try:
+                CustomerRepository.get_by_id(random.randint(1, args.rows))
+            except Exception:
+                errors['read'] += 1
+
+    result = {'profile': profile}
+    if not read_only:
+        elapsed, latencies = run_concurrently(write, args.writes, args.concurrency)
+        result.update({
+            'writes_per_second': round(args.writes / elapsed, 1),
+            'write_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'write_errors': errors['write']
+        })
+    elapsed, latencies = run_concurrently(read, args.reads, args.concurrency)
+    result.update({
+        'reads_per_second': round(args.reads / elapsed, 1),
+        'read_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'read_errors': errors['read']
+    })
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='Rows seeded before measuring')
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--profiles', default=','.join(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # The read-only profile reuses the database seeded by the first profile
+        shared_path = None
+        for profile in args.profiles.split(','):
+            if STORAGE_PROFILES[profile]['pragmas'].get('query_only') == 'ON':
+                if shared_path is None:
+                    shared_path = os.path.join(tmp, 'seed.db')
+                    run_profile('durable', shared_path, argparse.Namespace(**dict(vars(args), writes=0, reads=0)), seed=True)
+                results.append(run_profile(profile, shared_path, args, seed=False))
+            else:
+                path = os.path.join(tmp, f'{profile}.db')
+                results.append(run_profile(profile, path, args, seed=True))
+                shared_path = shared_path or path
+
+    report('storage_profiles', results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+One-time database bootstrap, recorded with a stamp.
+
+create_all, the schema upgrades (ensure_schema), the search index, the
+table version rows, the change feed seed and the default admin are all
+idempotent, but each start used to pay their queries and DDL again. Once they
+have run, a bootstrap_stamp row records a fingerprint of the declared schema
+(tables, columns, indexes) plus BOOTSTRAP_REVISION. A later start that finds
+the same fingerprint reads that one row and skips the lot.
+
+Changing a model changes the fingerprint, so the next start bootstraps
+again. Bump BOOTSTRAP_REVISION when a step changes without a model change
+(new triggers, new seed data).
+"""
+
+import hashlib
+from datetime import datetime
+from sqlalchemy.exc import DBAPIError
+
+from models import db, BootstrapStamp
+
+# Bump to re-run the bootstrap on existing databases without a model change
+BOOTSTRAP_REVISION = 1
+
+_STAMP_NAME = 'schema'
+
+def schema_fingerprint(metadata=None) -> str:
+    """Hash of the declared tables, columns and indexes, and BOOTSTRAP_REVISION"""
+    metadata = metadata if metadata is not None else db.metadata
+    parts = [f'revision={BOOTSTRAP_REVISION}']
+    for table in metadata.sorted_tables:
+        parts.append(f'table {table.name}')
+        for column in table.columns:
+            parts.append(f'  column {column.name} {column.type!r} null={column.nullable} pk={column.primary_key}')
+        for index in sorted(table.indexes, key=lambda index: index.name or ''):
+            columns = ','.join(column.name for column in index.columns)
+            parts.append(f'  index {index.name} ({columns}) unique={index.unique}')
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+def is_bootstrapped(engine, fingerprint: str) -> bool:
+    """Check whether the database carries a stamp for this fingerprint"""
+    stamp = BootstrapStamp.__table__
+    try:
+        with engine.connect() as conn:
+            stored = conn.execute(
+                db.select(stamp.c.fingerprint).where(stamp.c.name == _STAMP_NAME)
+            ).scalar()
+    except DBAPIError:
+        # No stamp table yet: a new database, or one created before the stamp
+        return False
+    return stored == fingerprint
+
+def stamp_bootstrap(engine, fingerprint: str) -> bool:
+    """Record the fingerprint after a successful bootstrap; returns False if it could not be written"""
+    stamp = BootstrapStamp.__table__
+    try:
+        with engine.begin() as conn:
+            conn.execute(db.delete(stamp).where(stamp.c.name == _STAMP_NAME))
+            conn.execute(db.insert(stamp).values(
+                name=_STAMP_NAME, fingerprint=fingerprint, applied_at=datetime.utcnow()
+            ))
+    except DBAPIError as e:
+        # Read-only connections simply bootstrap (checks only) on every start
+        print(f"⚠️ Could not write bootstrap stamp: {e}")
+        return False
+    return True
@@ -0,0 +1,160 @@
+"""
+Incremental change feed for users and customers.
+
+Every transaction that creates, updates or deletes a User or Customer
+(through ORM flushes or bulk Core statements reported via notify_bulk_write)
+replaces that row's entry in change_log, on the same connection, with a new
+entry at the next sequence number. The log therefore holds one entry per
+row, deleted rows included (tombstones), ordered by when each row last
+changed. A client that remembers the highest seq it has seen reads only the
+entries after it, so resync cost follows the number of changed rows, not
+the table size. Seqs come from SQLite's AUTOINCREMENT and are never reused,
+so cursors stay valid across restarts.
+
+SQLite serializes writers, so seqs become visible in commit order and a
+cursor never skips a change that commits later with a lower seq.
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+
+from models import db, User, Customer, ChangeLogEntry, bulk_write_listeners, executemany_insert
+
+# Tables with a change feed, by model
+FEED_TABLES = {
+    User: User.__tablename__,
+    Customer: Customer.__tablename__
+}
+
+# Row ids per DELETE ... IN statement when replacing entries
+_REPLACE_CHUNK = 500
+
+# Set after a commit that logged changes, so followers (the event stream) wake up early
+changes_committed = threading.Event()
+
+def record(session, table: str, changes: Iterable[Tuple[int, bool]]) -> int:
+    """
+    Log (row id, deleted) changes to a table on the session's current
+    transaction, replacing each row's previous entry.
+    """
+    latest = {}
+    for row_id, deleted in changes:
+        latest.pop(row_id, None)  # keep the last change per row, in order
+        latest[row_id] = deleted
+    if not latest:
+        return 0
+
+    connection = session.connection()
+    log = ChangeLogEntry.__table__
+    insert = db.insert(log)
+    if connection.dialect.name == 'sqlite':
+        # REPLACE drops the row's old entry on the unique index and takes a new seq
+        insert = insert.prefix_with('OR REPLACE')
+    else:
+        ids = list(latest)
+        for start in range(0, len(ids), _REPLACE_CHUNK):
+            connection.execute(
+                db.delete(log).where(log.c.table_name == table, log.c.row_id.in_(ids[start:start + _REPLACE_CHUNK]))
+            )
+    executemany_insert(
+        log,
+        [{'row_id': row_id, 'op': 'delete' if deleted else 'upsert'} for row_id, deleted in latest.items()],
+        insert, table_name=table, changed_at=datetime.utcnow()
+    )
+    session.info['change_feed_pending'] = True
+    return len(latest)
+
+def _after_flush(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if type(obj) in FEED_TABLES:
+            changes.setdefault(type(obj), []).append((obj.id, False))
+    for obj in session.dirty:
+        if type(obj) in FEED_TABLES and session.is_modified(obj, include_collections=False):
+            changes.setdefault(type(obj), []).append((obj.id, False))
+    for obj in session.deleted:
+        if type(obj) in FEED_TABLES:
+            changes.setdefault(type(obj), []).append((obj.id, True))
+    for model, model_changes in changes.items():
+        record(session, FEED_TABLES[model], model_changes)
+
+def _after_bulk_write(session, model, changes):
+    if model in FEED_TABLES:
+        record(session, FEED_TABLES[model], ((row_id, data is None) for row_id, data in changes))
+
+def _after_commit(session):
+    if session.info.pop('change_feed_pending', False):
+        changes_committed.set()
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop('change_feed_pending', None)
+
+def _seed_log(app) -> None:
+    """Log every existing row of a table that has no entries yet (databases created before the feed)"""
+    log = ChangeLogEntry.__table__
+    for model, table in FEED_TABLES.items():
+        if db.session.execute(db.select(log.c.seq).where(log.c.table_name == table).limit(1)).first():
+            continue
+        source = model.__table__
+        seeded = db.session.execute(
+            db.insert(log).from_select(
+                ['table_name', 'row_id', 'op', 'changed_at'],
+                db.select(db.literal(table), source.c.id, db.literal('upsert'), source.c.updated_at)
+                .order_by(source.c.id)
+            )
+        ).rowcount
+        db.session.commit()
+        if seeded:
+            app.logger.info(f"Change feed seeded with {seeded} existing {table}")
+
+def init_change_feed(app, seed: bool = True) -> None:
+    """Register the write hooks, seeding the log first unless seed is False"""
+    if seed:
+        _seed_log(app)
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_soft_rollback)
+        bulk_write_listeners.append(_after_bulk_write)
+
+def changes_since(model, columns: List[Any], since: int, limit: int) -> Tuple[List[Any], Optional[int]]:
+    """
+    Entries of a table's change log after seq `since`, oldest first, joined
+    to the current row. Each row is (seq, op, row_id, *columns); columns are
+    None for tombstones. Returns the rows and the seq to resume after, or
+    None when this was the last page.
+    """
+    log = ChangeLogEntry.__table__
+    source = model.__table__
+    rows = db.session.execute(
+        db.select(log.c.seq, log.c.op, log.c.row_id, *columns)
+        .select_from(log.outerjoin(source, source.c.id == log.c.row_id))
+        .where(log.c.table_name == FEED_TABLES[model], log.c.seq > since)
+        .order_by(log.c.seq)
+        .limit(limit + 1)
+    ).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].seq
+    return rows, None
+
+def log_since(since: int, limit: int, tables: Optional[Iterable[str]] = None) -> List[Any]:
+    """
+    (seq, table_name, op, row_id) entries after seq `since` across tables
+    (default all), oldest first, without the rows themselves.
+    """
+    log = ChangeLogEntry.__table__
+    stmt = db.select(log.c.seq, log.c.table_name, log.c.op, log.c.row_id).where(log.c.seq > since)
+    if tables is not None:
+        stmt = stmt.where(log.c.table_name.in_(list(tables)))
+    return db.session.execute(stmt.order_by(log.c.seq).limit(limit)).all()
+
+def latest_seq(model=None) -> int:
+    """Highest seq in a table's change log, or in the whole log (0 if empty), to start following from now"""
+    log = ChangeLogEntry.__table__
+    stmt = db.select(db.func.coalesce(db.func.max(log.c.seq), 0))
+    if model is not None:
+        stmt = stmt.where(log.c.table_name == FEED_TABLES[model])
+    return db.session.execute(stmt).scalar()
@@ -8,6 +8,48 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# SQLite storage profiles: connect-time PRAGMAs plus SQLAlchemy pool settings.
+# cache_size is in KiB when negative; mmap_size and busy_timeout in bytes/ms.
+STORAGE_PROFILES = {
+    # WAL for reader/writer concurrency, still fsync on every commit
+    'durable': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'cache_size': -16000,
+            'temp_store': 'DEFAULT',
+            'mmap_size': 0,
+            'foreign_keys': 'ON'
+        },
+        'pool': {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30}
+    },
+    # WAL with fsync at checkpoints only; a power loss can drop the last commits
+    'throughput': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'cache_size': -64000,
+            'temp_store': 'MEMORY',
+            'mmap_size': 268435456,
+            'foreign_keys': 'ON'
+        },
+        'pool': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30}
+    },
+    # Read-only connections with a large page cache and memory map for reporting
+    'readonly-analytics': {
+        'pragmas': {
+            'query_only': 'ON',
+            'busy_timeout': 10000,
+            'cache_size': -256000,
+            'temp_store': 'MEMORY',
+            'mmap_size': 1073741824
+        },
+        'pool': {'pool_size': 10, 'max_overflow': 10, 'pool_timeout': 30}
+    }
+}
+
 class Config:
     """Base configuration class"""
     
@@ -18,10 +60,122 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STORAGE_PROFILE = os.getenv('STORAGE_PROFILE', 'durable')
+    
+    # Startup: skip the one-time database bootstrap once its stamp matches the
+    # models; load Flask-Migrate (alembic) outside the `flask` CLI too
+    BOOTSTRAP_STAMP_ENABLED = os.getenv('BOOTSTRAP_STAMP_ENABLED', 'True').lower() in ['true', '1', 'yes']
+    MIGRATIONS_ENABLED = os.getenv('MIGRATIONS_ENABLED', 'False').lower() in ['true', '1', 'yes']
     
     # CORS configuration
     CORS_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
     
+    # Pagination configuration
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+    
+    # Export configuration (rows fetched per server-side cursor batch)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    
+    # Bulk import configuration (rows per insert transaction)
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', 1000))
+    
+    # Bulk delete/patch configuration (rows written per call, ids per statement)
+    BULK_WRITE_MAX_ROWS = int(os.getenv('BULK_WRITE_MAX_ROWS', 10000))
+    BULK_WRITE_CHUNK_SIZE = int(os.getenv('BULK_WRITE_CHUNK_SIZE', 500))
+    
+    # Firebase mirror configuration (transactional outbox)
+    FIREBASE_SYNC_ENABLED = os.getenv('FIREBASE_SYNC_ENABLED', 'False').lower() in ['true', '1', 'yes']
+    OUTBOX_DRAINER_ENABLED = os.getenv('OUTBOX_DRAINER_ENABLED', 'True').lower() in ['true', '1', 'yes']
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1.0))
+    OUTBOX_BASE_BACKOFF = float(os.getenv('OUTBOX_BASE_BACKOFF', 1.0))
+    OUTBOX_MAX_BACKOFF = float(os.getenv('OUTBOX_MAX_BACKOFF', 300.0))
+    OUTBOX_LOCK_FILE = os.getenv('OUTBOX_LOCK_FILE') or None  # drainer election between workers; default per database in the temp dir
+    
+    # Firebase read cache configuration (TTLs are seconds per path prefix)
+    FIREBASE_CACHE_ENABLED = os.getenv('FIREBASE_CACHE_ENABLED', 'True').lower() in ['true', '1', 'yes']
+    FIREBASE_CACHE_MAX_ENTRIES = int(os.getenv('FIREBASE_CACHE_MAX_ENTRIES', 10000))
+    FIREBASE_CACHE_MAX_BYTES = int(os.getenv('FIREBASE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    FIREBASE_CACHE_DEFAULT_TTL = float(os.getenv('FIREBASE_CACHE_DEFAULT_TTL', 30))
+    FIREBASE_CACHE_TTLS = os.getenv('FIREBASE_CACHE_TTLS', 'users=300,customers=30,health_check=0')
+    FIREBASE_CACHE_LISTEN_PATHS = [p for p in os.getenv('FIREBASE_CACHE_LISTEN_PATHS', '').split(',') if p]
+    
+    # Firebase HTTP client: per-request timeout (seconds), keep-alive connections
+    # kept per host, concurrent calls in a fan-out and the deadline of a whole fan-out
+    FIREBASE_HTTP_TIMEOUT = float(os.getenv('FIREBASE_HTTP_TIMEOUT', 10))
+    FIREBASE_HTTP_POOL_SIZE = int(os.getenv('FIREBASE_HTTP_POOL_SIZE', 32))
+    FIREBASE_MAX_CONCURRENCY = int(os.getenv('FIREBASE_MAX_CONCURRENCY', 16))
+    FIREBASE_FANOUT_DEADLINE = float(os.getenv('FIREBASE_FANOUT_DEADLINE', 30))
+    FIREBASE_CONNECTION_TEST = os.getenv('FIREBASE_CONNECTION_TEST', 'False').lower() in ['true', '1', 'yes']
+    
+    # Firebase backend: 'sdk' (Admin SDK) or 'fake' (in-memory, config/firebase_fake.py)
+    # with injected latency and jitter (ms) and a failure probability per call
+    FIREBASE_BACKEND = os.getenv('FIREBASE_BACKEND', 'sdk')
+    FIREBASE_FAKE_LATENCY_MS = float(os.getenv('FIREBASE_FAKE_LATENCY_MS', 50))
+    FIREBASE_FAKE_JITTER_MS = float(os.getenv('FIREBASE_FAKE_JITTER_MS', 10))
+    FIREBASE_FAKE_FAILURE_RATE = float(os.getenv('FIREBASE_FAKE_FAILURE_RATE', 0))
+    FIREBASE_FAKE_SEED = int(os.getenv('FIREBASE_FAKE_SEED')) if os.getenv('FIREBASE_FAKE_SEED') else None
+    
+    # Password hashing configuration (Werkzeug method string, e.g. 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_SALT_LENGTH = int(os.getenv('PASSWORD_HASH_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS')) if os.getenv('PASSWORD_HASH_WORKERS') else None  # None = CPU count, 0 = inline
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+    
+    # Session token configuration (seconds); enforce tokens on data endpoints when required
+    ACCESS_TOKEN_TTL = int(os.getenv('ACCESS_TOKEN_TTL', 900))
+    REFRESH_TOKEN_TTL = int(os.getenv('REFRESH_TOKEN_TTL', 7 * 24 * 3600))
+    AUTH_TOKENS_REQUIRED = os.getenv('AUTH_TOKENS_REQUIRED', 'False').lower() in ['true', '1', 'yes']
+    # Share revocations between worker processes through the revoked_tokens table,
+    # read at most every TOKEN_REVOCATION_SYNC_INTERVAL seconds; off keeps them in
+    # this process's memory only (single-process deployments, no database reads)
+    TOKEN_REVOCATION_SHARED = os.getenv('TOKEN_REVOCATION_SHARED', 'True').lower() in ['true', '1', 'yes']
+    TOKEN_REVOCATION_SYNC_INTERVAL = float(os.getenv('TOKEN_REVOCATION_SYNC_INTERVAL', 1.0))
+    
+    # HTTP caching for conditional GETs (clients revalidate with ETag / Last-Modified)
+    HTTP_CACHE_CONTROL = os.getenv('HTTP_CACHE_CONTROL', 'private, no-cache')
+    
+    # Server-Sent Events (/api/v1/stream): per-subscriber queue, heartbeat and
+    # cross-process poll interval (seconds), replay cap for Last-Event-ID
+    SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', 256))
+    SSE_HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', 15))
+    SSE_POLL_INTERVAL = float(os.getenv('SSE_POLL_INTERVAL', 1.0))
+    SSE_BATCH_SIZE = int(os.getenv('SSE_BATCH_SIZE', 500))
+    SSE_REPLAY_LIMIT = int(os.getenv('SSE_REPLAY_LIMIT', 5000))
+    SSE_MAX_SUBSCRIBERS = int(os.getenv('SSE_MAX_SUBSCRIBERS', 10000))
+    # Streams a gthread worker may hold open, each pinning one of its WEB_THREADS
+    # (default: half of them); sync workers refuse streams, gevent workers are not capped
+    SSE_THREAD_WORKER_STREAMS = int(os.getenv('SSE_THREAD_WORKER_STREAMS')) if os.getenv('SSE_THREAD_WORKER_STREAMS') else None
+    SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 3000))
+    
+    # Production server (serve.py): worker processes (default CPU count), worker
+    # class (sync, gthread or gevent), threads or connections per worker, and
+    # seconds before a silent worker is killed / a stopping worker is forced out
+    WEB_BIND = os.getenv('WEB_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS')) if os.getenv('WEB_WORKERS') else None
+    WEB_WORKER_CLASS = os.getenv('WEB_WORKER_CLASS', 'gthread')
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 8))
+    WEB_WORKER_CONNECTIONS = int(os.getenv('WEB_WORKER_CONNECTIONS', 1000))
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 30))
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+    WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 5))
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', 0))
+    WEB_MAX_REQUESTS_JITTER = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 0))
+    WEB_PIDFILE = os.getenv('WEB_PIDFILE') or None
+    
+    # Prometheus metrics at /api/v1/metrics (per-route latency, SQL and Firebase call accounting)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in ['true', '1', 'yes']
+    
+    # Query profiler: log statements slower than SLOW_QUERY_MS, capture EXPLAIN QUERY PLAN
+    # on first sight to flag full scans of tables over QUERY_PROFILER_SMALL_TABLE_ROWS rows,
+    # report at /api/v1/admin/queries. Opt-in outside development
+    QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'False').lower() in ['true', '1', 'yes']
+    QUERY_PROFILER_EXPLAIN = os.getenv('QUERY_PROFILER_EXPLAIN', 'False').lower() in ['true', '1', 'yes']
+    QUERY_PROFILER_MAX_STATEMENTS = int(os.getenv('QUERY_PROFILER_MAX_STATEMENTS', 1000))
+    QUERY_PROFILER_SMALL_TABLE_ROWS = int(os.getenv('QUERY_PROFILER_SMALL_TABLE_ROWS', 1000))
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    
     # Swagger configuration
     SWAGGER_UI_DOC_EXPANSION = 'list'
     SWAGGER_UI_JSONEDITOR = True
@@ -29,6 +183,8 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'True').lower() in ['true', '1', 'yes']
+    QUERY_PROFILER_EXPLAIN = os.getenv('QUERY_PROFILER_EXPLAIN', 'True').lower() in ['true', '1', 'yes']
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -0,0 +1,146 @@
+"""
+Read-through cache for Firebase Realtime Database reads.
+
+Entries live in a bounded LRU keyed by normalized path, each with a TTL
+chosen by the longest matching path prefix. Writing or deleting a path
+invalidates it, everything below it and every cached ancestor, since a
+parent node's value contains its children.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+def normalize_path(path: str) -> str:
+    """Strip slashes so 'users/1', '/users/1/' and 'users//1' share a key"""
+    return '/'.join(part for part in str(path).split('/') if part)
+
+def parse_ttl_rules(spec: str) -> Dict[str, float]:
+    """Parse 'users=300,customers=30' into {prefix: ttl_seconds}"""
+    rules = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        prefix, _, ttl = item.partition('=')
+        rules[normalize_path(prefix)] = float(ttl)
+    return rules
+
+
+class FirebaseReadCache:
+    """Thread-safe LRU with per-prefix TTLs, size accounting and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: float = 30.0, ttl_rules: Dict[str, float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # Longest prefix first so the most specific rule wins
+        self.ttl_rules = sorted((ttl_rules or {}).items(), key=lambda rule: -len(rule[0]))
+        self._clock = clock
+        self._entries = OrderedDict()  # path -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a load racing a write is not cached
+        self._generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ttl_for(self, path: str) -> float:
+        """TTL of the longest rule prefix matching path"""
+        for prefix, ttl in self.ttl_rules:
+            if path == prefix or path.startswith(prefix + '/') or prefix == '':
+                return ttl
+        return self.default_ttl
+
+    def get_or_load(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Return the cached value for path, calling loader(path) on a miss.
+        Cached values are shared between callers and must not be mutated.
+        """
+        key = normalize_path(path)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+
+        value = loader(key)
+        self.put(key, value, generation)
+        return value
+
+    def put(self, path: str, value: Any, generation: int = None):
+        """
+        Store a value, evicting least recently used entries to stay in bounds.
+        Skipped if `generation` is given and an invalidation happened since.
+        """
+        key = normalize_path(path)
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return
+        size = len(key) + len(json.dumps(value, separators=(',', ':'), default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self._clock() + ttl, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, path: str):
+        """Drop path, its descendants and its cached ancestors"""
+        key = normalize_path(path)
+        with self._lock:
+            self._generation += 1
+            doomed = [
+                cached for cached in self._entries
+                if cached == key or cached.startswith(key + '/') or key == ''
+                or key.startswith(cached + '/') or cached == ''
+            ]
+            for cached in doomed:
+                self._remove(cached)
+            self.invalidations += len(doomed)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for tuning sizes and TTLs"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
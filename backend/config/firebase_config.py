@@ -1,24 +1,96 @@
 """
 Firebase configuration and initialization module.
 Handles Firebase Admin SDK setup using environment variables.
+
+The client is a process-wide singleton created once under a lock. Every
+reference shares one requests session whose keep-alive pool holds
+FIREBASE_HTTP_POOL_SIZE connections, and each HTTP call gives up after
+FIREBASE_HTTP_TIMEOUT seconds. fan_out() runs many path reads and writes on a
+bounded thread pool, so N calls take about one round trip of wall time
+instead of N.
+
+FIREBASE_BACKEND=fake swaps the SDK for the in-memory FakeDatabase
+(config/firebase_fake.py), with injected latency and failures; the Admin SDK
+is then never imported.
 """
 
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, db as firebase_db
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from dotenv import load_dotenv
+from config.app_config import get_config
+from config.firebase_cache import FirebaseReadCache, parse_ttl_rules
 
 # Load environment variables
 load_dotenv()
 
+# Values of FIREBASE_BACKEND
+FIREBASE_BACKENDS = ('sdk', 'fake')
+
+# Callbacks run as fn(op, seconds, error) after every database call (see metrics.py);
+# error is None on success
+call_listeners = []
+
+# Operations accepted by fan_out()
+FANOUT_OPERATIONS = ('get', 'set', 'update', 'delete')
+
+# Outcome of one fan_out() operation: the value read (get) or None, and the
+# exception raised, or a TimeoutError if the deadline passed first
+FanOutResult = namedtuple('FanOutResult', ['op', 'path', 'value', 'error'])
+
 class FirebaseConfig:
     """Firebase configuration manager"""
     
     def __init__(self):
+        config = get_config()
         self.app = None
         self.db_ref = None
+        self.backend = config.FIREBASE_BACKEND
+        self.http_timeout = config.FIREBASE_HTTP_TIMEOUT
+        self.pool_size = config.FIREBASE_HTTP_POOL_SIZE
+        self.max_concurrency = config.FIREBASE_MAX_CONCURRENCY
+        self.fanout_deadline = config.FIREBASE_FANOUT_DEADLINE
+        self.cache = self._create_cache()
+        self._cache_listeners = []
+        self._executor = None
+        self._executor_lock = threading.Lock()
         self._init_firebase()
+        self._start_cache_listeners()
+    
+    def _create_cache(self):
+        """Create the read-through cache from app configuration"""
+        config = get_config()
+        if not config.FIREBASE_CACHE_ENABLED:
+            return None
+        return FirebaseReadCache(
+            max_entries=config.FIREBASE_CACHE_MAX_ENTRIES,
+            max_bytes=config.FIREBASE_CACHE_MAX_BYTES,
+            default_ttl=config.FIREBASE_CACHE_DEFAULT_TTL,
+            ttl_rules=parse_ttl_rules(config.FIREBASE_CACHE_TTLS)
+        )
+    
+    def _start_cache_listeners(self):
+        """Invalidate cached paths on remote changes via RTDB listen() streams"""
+        if not self.cache or not self.db_ref:
+            return
+        for path in get_config().FIREBASE_CACHE_LISTEN_PATHS:
+            def on_event(event, base=path):
+                self.cache.invalidate(f"{base}/{event.path}")
+            try:
+                self._cache_listeners.append(self.db_ref.child(path).listen(on_event))
+                print(f"👂 Listening for changes on /{path}")
+            except Exception as e:
+                print(f"⚠️  Could not listen on /{path}, relying on TTL: {e}")
+    
+    def close_cache_listeners(self):
+        """Stop all listen() streams"""
+        for registration in self._cache_listeners:
+            registration.close()
+        self._cache_listeners = []
     
     def _get_credentials_from_env(self):
         """Create Firebase credentials from environment variables"""
@@ -44,6 +116,7 @@ class FirebaseConfig:
             if missing_fields:
                 raise ValueError(f"Missing required Firebase environment variables: {missing_fields}")
             
+            from firebase_admin import credentials
             return credentials.Certificate(service_account_info)
             
         except Exception as e:
@@ -52,11 +125,20 @@ class FirebaseConfig:
             raise
     
     def _init_firebase(self):
-        """Initialize Firebase Admin SDK"""
+        """Initialize Firebase Admin SDK, or the fake database"""
+        if self.backend not in FIREBASE_BACKENDS:
+            raise ValueError(f"FIREBASE_BACKEND must be one of {', '.join(FIREBASE_BACKENDS)}, not {self.backend!r}")
+        if self.backend == 'fake':
+            self._init_fake()
+            return
+        
+        import firebase_admin
+        from firebase_admin import db as firebase_db
         if firebase_admin._apps:
             # Already initialized
             self.app = firebase_admin.get_app()
             self.db_ref = firebase_db.reference()
+            self._tune_http_pool()
             return
         
         try:
@@ -70,18 +152,22 @@ class FirebaseConfig:
             if not database_url:
                 raise ValueError("FIREBASE_DATABASE_URL environment variable is required")
             
+            # httpTimeout bounds every HTTP call the SDK makes (connect and read)
             self.app = firebase_admin.initialize_app(cred, {
-                'databaseURL': database_url
+                'databaseURL': database_url,
+                'httpTimeout': self.http_timeout
             })
             
             # Get database reference
             self.db_ref = firebase_db.reference()
+            self._tune_http_pool()
             
             print("✅ Firebase initialized successfully")
             print(f"🔗 Connected to: {database_url}")
             
-            # Test connection
-            self._test_connection()
+            # Optional round trip; off by default so the first call is not slowed down
+            if get_config().FIREBASE_CONNECTION_TEST:
+                self._test_connection()
             
         except Exception as e:
             print(f"❌ Firebase initialization failed: {e}")
@@ -89,24 +175,42 @@ class FirebaseConfig:
             self.db_ref = None
             raise
     
+    def _init_fake(self):
+        """Point the client at an in-memory FakeDatabase configured from FIREBASE_FAKE_*"""
+        from config.firebase_fake import FakeDatabase
+        config = get_config()
+        self.app = FakeDatabase(
+            latency=config.FIREBASE_FAKE_LATENCY_MS / 1000.0,
+            jitter=config.FIREBASE_FAKE_JITTER_MS / 1000.0,
+            failure_rate=config.FIREBASE_FAKE_FAILURE_RATE,
+            seed=config.FIREBASE_FAKE_SEED
+        )
+        self.db_ref = self.app.reference()
+        print(f"🧪 Using in-memory fake Firebase ({config.FIREBASE_FAKE_LATENCY_MS:g}±{config.FIREBASE_FAKE_JITTER_MS:g} ms, "
+              f"{config.FIREBASE_FAKE_FAILURE_RATE:.0%} failures)")
+        if config.FIREBASE_CONNECTION_TEST:
+            self._test_connection()
+    
+    def _tune_http_pool(self):
+        """
+        Replace the default keep-alive pool (10 connections) of the session
+        shared by all references with one sized for concurrent fan-out, so
+        parallel calls reuse connections instead of opening and dropping them.
+        """
+        session = getattr(getattr(self.db_ref, '_client', None), 'session', None)
+        if session is None:
+            print("⚠️  Firebase HTTP session not found, keeping the default connection pool")
+            return
+        from requests.adapters import HTTPAdapter
+        for prefix in ('https://', 'http://'):
+            retries = session.get_adapter(prefix).max_retries
+            session.mount(prefix, HTTPAdapter(pool_maxsize=self.pool_size, max_retries=retries))
+    
     def _test_connection(self):
-        """Test Firebase connection"""
+        """Test Firebase connection with a single shallow read"""
         try:
-            test_ref = self.db_ref.child('health_check')
-            test_ref.set({
-                'status': 'connected',
-                'timestamp': firebase_db.ServerValue.TIMESTAMP
-            })
-            
-            # Read back to verify
-            data = test_ref.get()
-            if data and data.get('status') == 'connected':
-                print("✅ Firebase connection test passed")
-                # Clean up test data
-                test_ref.delete()
-            else:
-                raise Exception("Connection test failed - unable to read/write data")
-                
+            self.db_ref.child('health_check').get(shallow=True)
+            print("✅ Firebase connection test passed")
         except Exception as e:
             print(f"❌ Firebase connection test failed: {e}")
             raise
@@ -117,44 +221,194 @@ class FirebaseConfig:
             raise RuntimeError("Firebase not initialized")
         return self.db_ref
     
+    def get_data(self, path):
+        """Read data from Firebase, served from the read cache when fresh"""
+        ref = self.get_database_ref()
+        if self.cache is None:
+            return self._timed('get', ref.child(path).get)
+        return self.cache.get_or_load(path, lambda key: self._timed('get', ref.child(key).get))
+    
+    def _timed(self, op, call, *args):
+        """Make one database call, reporting its duration and outcome to call_listeners"""
+        if not call_listeners:
+            return call(*args)
+        error = None
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            for listener in call_listeners:
+                listener(op, seconds, error)
+    
+    def invalidate_cache(self, path):
+        """Drop cached data at, above and below a path"""
+        if self.cache is not None:
+            self.cache.invalidate(path)
+    
+    def cache_stats(self):
+        """Read cache counters, or None when caching is disabled"""
+        return self.cache.stats() if self.cache is not None else None
+    
     def sync_data(self, path, data):
         """Sync data to Firebase"""
         try:
             if self.db_ref:
-                self.db_ref.child(path).set(data)
+                self._timed('set', self.db_ref.child(path).set, data)
                 return True
         except Exception as e:
             print(f"❌ Firebase sync error for {path}: {e}")
+        finally:
+            self.invalidate_cache(path)
         return False
     
+    def update_paths(self, updates):
+        """
+        Apply a multi-path update atomically ({path: value}, None deletes).
+        Unlike sync_data this raises on failure so callers can retry.
+        """
+        if not self.db_ref:
+            raise RuntimeError("Firebase not initialized")
+        try:
+            self._timed('update', self.db_ref.update, updates)
+        finally:
+            for path in updates:
+                self.invalidate_cache(path)
+    
     def delete_data(self, path):
         """Delete data from Firebase"""
         try:
             if self.db_ref:
-                self.db_ref.child(path).delete()
+                self._timed('delete', self.db_ref.child(path).delete)
                 return True
         except Exception as e:
             print(f"❌ Firebase delete error for {path}: {e}")
+        finally:
+            self.invalidate_cache(path)
         return False
+    
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='firebase')
+            return self._executor
+    
+    def _call(self, op, path, value):
+        """Run one fan_out() operation; reads go through the read cache"""
+        if op == 'get':
+            return self.get_data(path)
+        ref = self.get_database_ref().child(path)
+        try:
+            if op == 'set':
+                self._timed('set', ref.set, value)
+            elif op == 'update':
+                self._timed('update', ref.update, value)
+            else:
+                self._timed('delete', ref.delete)
+        finally:
+            self.invalidate_cache(path)
+        return None
+    
+    def fan_out(self, operations: Iterable[Tuple[str, str, Any]],
+                deadline: Optional[float] = None) -> List[FanOutResult]:
+        """
+        Run (op, path, value) operations concurrently, at most
+        FIREBASE_MAX_CONCURRENCY at a time, and return their results in
+        order. op is one of FANOUT_OPERATIONS (value is ignored for get and
+        delete). Failures are returned, not raised. Operations still pending
+        after `deadline` seconds (default FIREBASE_FANOUT_DEADLINE) are
+        cancelled if not yet started and reported as TimeoutError; one that
+        is already running finishes in the background within the HTTP timeout.
+        """
+        operations = list(operations)
+        for op, path, _ in operations:
+            if op not in FANOUT_OPERATIONS:
+                raise ValueError(f"Unknown Firebase operation {op!r} for {path}")
+        if not operations:
+            return []
+        executor = self._get_executor()
+        futures = [executor.submit(self._call, op, path, value) for op, path, value in operations]
+        wait(futures, timeout=self.fanout_deadline if deadline is None else deadline)
+        results = []
+        for (op, path, _), future in zip(operations, futures):
+            if not future.done() or future.cancelled():
+                future.cancel()
+                results.append(FanOutResult(op, path, None, TimeoutError(f"Firebase {op} {path} missed its deadline")))
+            elif future.exception() is not None:
+                results.append(FanOutResult(op, path, None, future.exception()))
+            else:
+                results.append(FanOutResult(op, path, future.result(), None))
+        return results
+    
+    def get_many(self, paths: Iterable[str], deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Read many paths concurrently; raises the first error after all calls finish"""
+        results = self.fan_out([('get', path, None) for path in paths], deadline)
+        for result in results:
+            if result.error is not None:
+                raise result.error
+        return {result.path: result.value for result in results}
+    
+    def set_many(self, records: Dict[str, Any], deadline: Optional[float] = None) -> List[FanOutResult]:
+        """Write many paths concurrently ({path: data}, None deletes); returns per-path results"""
+        return self.fan_out(
+            [('delete', path, None) if data is None else ('set', path, data) for path, data in records.items()],
+            deadline
+        )
+    
+    def close(self):
+        """Stop the listen() streams and the fan-out threads"""
+        self.close_cache_listeners()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
 
-# Global Firebase instance
+# Global Firebase instance, created once by get_firebase()
 firebase_config = None
+_firebase_lock = threading.Lock()
 
 def get_firebase():
     """Get Firebase configuration instance"""
     global firebase_config
     if firebase_config is None:
-        firebase_config = FirebaseConfig()
+        # Concurrent first callers wait for a single initialization
+        with _firebase_lock:
+            if firebase_config is None:
+                firebase_config = FirebaseConfig()
     return firebase_config
 
 def get_db_ref():
     """Get Firebase database reference"""
     return get_firebase().get_database_ref()
 
+def get_from_firebase(path):
+    """Read data from Firebase through the read cache"""
+    return get_firebase().get_data(path)
+
+def get_firebase_cache_stats():
+    """Firebase read cache hit/miss counters"""
+    return get_firebase().cache_stats()
+
 def sync_to_firebase(path, data):
     """Sync data to Firebase"""
     return get_firebase().sync_data(path, data)
 
+def get_many_from_firebase(paths, deadline=None):
+    """Read many paths concurrently through the read cache"""
+    return get_firebase().get_many(paths, deadline)
+
+def sync_many_to_firebase(records, deadline=None):
+    """Write many paths concurrently ({path: data}, None deletes)"""
+    return get_firebase().set_many(records, deadline)
+
+def update_firebase_paths(updates):
+    """Apply a multi-path update to Firebase, raising on failure"""
+    return get_firebase().update_paths(updates)
+
 def delete_from_firebase(path):
     """Delete data from Firebase"""
     return get_firebase().delete_data(path)
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+In-memory stand-in for the Firebase Realtime Database.
+
+FakeDatabase keeps a JSON tree in process and hands out references with the
+subset of the Admin SDK's db.Reference API this app uses: child, get
+(shallow too), set, update (multi-path), delete and listen. Each call sleeps
+for an injected latency (plus uniform jitter) outside the lock, like a
+network round trip, so concurrent calls overlap. With probability
+failure_rate a call then fails with FakeFirebaseError instead of applying.
+Select it with FIREBASE_BACKEND=fake to benchmark or load-test the mirror
+paths without a project or a network.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, List, Optional
+
+from config.firebase_cache import normalize_path
+
+# What listen() callbacks receive, like firebase_admin.db.Event
+FakeEvent = namedtuple('FakeEvent', ['event_type', 'path', 'data'])
+
+
+class FakeFirebaseError(Exception):
+    """Injected failure of a fake database call"""
+
+
+def _copy(value: Any) -> Any:
+    """Deep copy through JSON, rejecting values the real database could not store"""
+    return json.loads(json.dumps(value))
+
+
+def _split(path: str) -> List[str]:
+    path = normalize_path(path)
+    return path.split('/') if path else []
+
+
+class FakeListenerRegistration:
+    """Handle returned by listen(); close() stops the callbacks"""
+
+    def __init__(self, database: 'FakeDatabase', path: str, callback: Callable[[FakeEvent], None]):
+        self._database = database
+        self.path = path
+        self.callback = callback
+
+    def close(self):
+        self._database._remove_listener(self)
+
+
+class FakeReference:
+    """A path in a FakeDatabase"""
+
+    def __init__(self, database: 'FakeDatabase', path: str = ''):
+        self._database = database
+        self.path = '/' + normalize_path(path)
+
+    @property
+    def key(self) -> Optional[str]:
+        parts = _split(self.path)
+        return parts[-1] if parts else None
+
+    def child(self, path: str) -> 'FakeReference':
+        if not path or not isinstance(path, str):
+            raise ValueError(f'Invalid path argument: {path!r}')
+        return FakeReference(self._database, f'{self.path}/{path}')
+
+    def get(self, etag: bool = False, shallow: bool = False) -> Any:
+        if etag:
+            raise NotImplementedError('etag reads are not supported by the fake database')
+        return self._database._call('get', self.path, shallow=shallow)
+
+    def set(self, value: Any):
+        if value is None:
+            raise ValueError('Value must not be None.')
+        self._database._call('set', self.path, value=value)
+
+    def update(self, value: Dict[str, Any]):
+        if not value or not isinstance(value, dict):
+            raise ValueError('Value argument must be a non-empty dictionary.')
+        if None in value.keys():
+            raise ValueError('Dictionary must not contain None keys.')
+        self._database._call('update', self.path, value=value)
+
+    def delete(self):
+        self._database._call('delete', self.path)
+
+    def listen(self, callback: Callable[[FakeEvent], None]) -> FakeListenerRegistration:
+        return self._database._add_listener(self.path, callback)
+
+
+class FakeDatabase:
+    """
+    Thread-safe in-memory JSON tree. latency and jitter are in seconds;
+    seed makes jitter and failures reproducible.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._root = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.calls = 0
+        self.failures = 0
+
+    def reference(self, path: str = '/') -> FakeReference:
+        return FakeReference(self, path)
+
+    def _delay_and_maybe_fail(self, op: str, path: str):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.failures += 1
+            raise FakeFirebaseError(f'Injected failure of {op} {path}')
+
+    def _call(self, op: str, path: str, value: Any = None, shallow: bool = False) -> Any:
+        self._delay_and_maybe_fail(op, path)
+        parts = _split(path)
+        if op == 'get':
+            with self._lock:
+                node = self._node(parts)
+                if shallow and isinstance(node, dict):
+                    return {key: True for key in node}
+                return _copy(node)
+        if op == 'set':
+            writes = {tuple(parts): _copy(value)}
+        elif op == 'delete':
+            writes = {tuple(parts): None}
+        else:
+            # Multi-path update: every key is a path relative to this reference
+            writes = {tuple(parts + _split(key)): _copy(data) for key, data in value.items()}
+        with self._lock:
+            for target, data in writes.items():
+                self._write(list(target), data)
+            listeners = list(self._listeners)
+        self._notify(listeners, writes)
+        return None
+
+    def _node(self, parts: List[str]) -> Any:
+        node = self._root
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def _write(self, parts: List[str], value: Any):
+        """Store value at parts (None or empty deletes), pruning emptied parents"""
+        if not parts:
+            self._root = value if isinstance(value, dict) else {}
+            return
+        trail = [self._root]
+        node = self._root
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                if value in (None, {}):
+                    return
+                child = node[part] = {}
+            node = child
+            trail.append(node)
+        if value in (None, {}):
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+        for depth in range(len(parts) - 1, 0, -1):
+            if trail[depth]:
+                break
+            trail[depth - 1].pop(parts[depth - 1], None)
+
+    def _add_listener(self, path: str, callback: Callable[[FakeEvent], None]) -> FakeListenerRegistration:
+        registration = FakeListenerRegistration(self, path, callback)
+        with self._lock:
+            self._listeners.append(registration)
+            data = _copy(self._node(_split(path)))
+        # Like the SDK, the first event carries the current value
+        callback(FakeEvent('put', '/', data))
+        return registration
+
+    def _remove_listener(self, registration: FakeListenerRegistration):
+        with self._lock:
+            if registration in self._listeners:
+                self._listeners.remove(registration)
+
+    def _notify(self, listeners: List[FakeListenerRegistration], writes: Dict[tuple, Any]):
+        """Send a put event to every listener at, above or below a written path"""
+        for registration in listeners:
+            base = _split(registration.path)
+            for target, data in writes.items():
+                target = list(target)
+                if target[:len(base)] == base:
+                    event = FakeEvent('put', '/' + '/'.join(target[len(base):]), data)
+                elif base[:len(target)] == target:
+                    with self._lock:
+                        event = FakeEvent('put', '/', _copy(self._node(base)))
+                else:
+                    continue
+                try:
+                    registration.callback(event)
+                except Exception as e:
+                    print(f"⚠️  Fake Firebase listener error on {registration.path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Call and injected failure counters"""
+        return {'calls': self.calls, 'failures': self.failures}
@@ -0,0 +1,71 @@
+"""
+SQLite storage profile support.
+
+Applies the PRAGMAs of a profile from app_config.STORAGE_PROFILES to every
+new DBAPI connection through a SQLAlchemy `connect` event, and reports the
+settings SQLite actually ended up with.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from config.app_config import STORAGE_PROFILES
+
+# PRAGMAs read back for the startup report
+REPORTED_PRAGMAS = [
+    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+    'temp_store', 'mmap_size', 'foreign_keys', 'query_only'
+]
+
+def get_profile(name):
+    """Look up a storage profile by name"""
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile '{name}', expected one of {sorted(STORAGE_PROFILES)}")
+    return STORAGE_PROFILES[name]
+
+def is_file_sqlite(uri):
+    """True for file-backed SQLite URLs, which use a QueuePool"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def engine_options(uri, profile_name, options=None):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS with the profile's pool settings merged under
+    any explicitly configured options. In-memory SQLite keeps its default
+    single-connection pool.
+    """
+    merged = {}
+    if make_url(uri).get_backend_name() != 'sqlite' or is_file_sqlite(uri):
+        merged.update(get_profile(profile_name)['pool'])
+    merged.update(options or {})
+    return merged
+
+def install_storage_profile(engine, profile_name):
+    """Run the profile's PRAGMAs on every new connection to a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return False
+    pragmas = get_profile(profile_name)['pragmas']
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+    return True
+
+def storage_report(engine, profile_name):
+    """The effective PRAGMA values and pool settings of an engine"""
+    report = {'profile': profile_name, 'dialect': engine.dialect.name, 'pool': type(engine.pool).__name__}
+    size = getattr(engine.pool, 'size', None)
+    if callable(size):
+        report['pool_size'] = size()
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            report['pragmas'] = {
+                name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                for name in REPORTED_PRAGMAS
+            }
+    return report
@@ -0,0 +1,255 @@
+"""
+Server-Sent Events fan-out of user and customer changes.
+
+One EventBroker per process follows the change log (change_feed) from a
+single background thread. It wakes on local commits, or every
+SSE_POLL_INTERVAL seconds to pick up writes from other processes. Each new
+entry is encoded to SSE bytes once and handed to every subscriber
+interested in its table. Subscribers hold a bounded queue and nothing else.
+Their stream generators only block on it, so under a cooperative worker
+(gevent) an idle dashboard costs a greenlet and a few kilobytes, not a
+thread or a database connection.
+
+Event ids are change log seqs. A client that reconnects with Last-Event-ID
+is first sent the entries it missed, straight from the log. A subscriber
+whose queue overflows is disconnected rather than silently losing events,
+and resumes the same way. A client too far behind gets a `reset` event
+telling it to reload over REST.
+"""
+
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import db, User, Customer
+from change_feed import FEED_TABLES, changes_committed, log_since, latest_seq
+from serializers import USER_ENCODER, CUSTOMER_ENCODER, dumps
+
+# Encoder of the record sent with each event, by table
+EVENT_ENCODERS = {
+    FEED_TABLES[User]: USER_ENCODER,
+    FEED_TABLES[Customer]: CUSTOMER_ENCODER
+}
+
+# Queue item that ends a subscriber's stream
+_CLOSE = (None, None)
+
+
+class Subscriber:
+    """One open stream: its tables and a bounded queue of (seq, event bytes)"""
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(max_queue + 1)  # + room for _CLOSE
+        self.max_queue = max_queue
+        self.dropped = False
+
+    def offer(self, item: Tuple[int, bytes]) -> bool:
+        """Queue an event; returns False (and closes the stream) if the subscriber has fallen behind"""
+        if self.queue.qsize() >= self.max_queue:
+            self.close()
+            self.dropped = True
+            return False
+        self.queue.put_nowait(item)
+        return True
+
+    def close(self):
+        try:
+            self.queue.put_nowait(_CLOSE)
+        except queue.Full:
+            pass
+
+
+def format_event(seq: Optional[int], event: str, data: Any) -> bytes:
+    """One SSE message"""
+    lines = []
+    if seq is not None:
+        lines.append(f'id: {seq}')
+    lines.append(f'event: {event}')
+    # Compact JSON has no newlines, so one data line suffices
+    return ('\n'.join(lines) + '\ndata: ').encode('utf-8') + dumps(data) + b'\n\n'
+
+
+def encode_entries(entries: List[Any]) -> List[Tuple[int, str, bytes]]:
+    """
+    Load the current rows of change log entries (one query per table) and
+    encode each entry as an SSE message. Returns (seq, table, bytes) in seq order.
+    """
+    ids_by_table = {}
+    for entry in entries:
+        if entry.op == 'upsert':
+            ids_by_table.setdefault(entry.table_name, []).append(entry.row_id)
+    records = {}
+    for table, ids in ids_by_table.items():
+        encoder = EVENT_ENCODERS[table]
+        id_column = encoder.model.__table__.c.id
+        rows = db.session.execute(db.select(*encoder.select_columns()).where(id_column.in_(ids))).all()
+        for row in rows:
+            records[table, row.id] = dict(zip(encoder.field_names, row))
+
+    messages = []
+    for entry in entries:
+        record = records.get((entry.table_name, entry.row_id)) if entry.op == 'upsert' else None
+        # A row deleted since its upsert entry was read is about to get a tombstone
+        if entry.op == 'upsert' and record is None:
+            continue
+        data = {'op': entry.op, 'id': entry.row_id, 'record': record}
+        messages.append((entry.seq, entry.table_name, format_event(entry.seq, entry.table_name, data)))
+    return messages
+
+
+class EventBroker:
+    """
+    Follows the change log and fans events out to subscribers. The
+    follower thread starts with the first subscriber.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.queue_size = app.config['SSE_QUEUE_SIZE']
+        self.poll_interval = app.config['SSE_POLL_INTERVAL']
+        self.batch_size = app.config['SSE_BATCH_SIZE']
+        self.max_subscribers = app.config['SSE_MAX_SUBSCRIBERS']
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cursor = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topics: Iterable[str]) -> Optional[Subscriber]:
+        """
+        Register a subscriber (call inside an app context), or return None at
+        SSE_MAX_SUBSCRIBERS. Events committed after this call are delivered.
+        """
+        subscriber = Subscriber(topics, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if self._cursor is None:
+                self._cursor = latest_seq()
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-broker', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the follower thread and end every open stream"""
+        self._stop.set()
+        changes_committed.set()
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+        for subscriber in subscribers:
+            subscriber.close()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    published = self.poll_once()
+            except Exception as e:
+                print(f"❌ Event broker error: {e}")
+                published = 0
+            if published >= self.batch_size:
+                continue
+            changes_committed.wait(self.poll_interval)
+            changes_committed.clear()
+
+    def poll_once(self) -> int:
+        """Publish log entries after the cursor; returns how many were read"""
+        with self._lock:
+            if not self._subscribers:
+                # Nobody to tell: skip the query and start from "now" next time
+                self._cursor = None
+                return 0
+            cursor = self._cursor
+        entries = log_since(cursor, self.batch_size)
+        if not entries:
+            return 0
+        self.publish(encode_entries(entries))
+        with self._lock:
+            if self._cursor is not None:
+                self._cursor = max(self._cursor, entries[-1].seq)
+        return len(entries)
+
+    def publish(self, messages: List[Tuple[int, str, bytes]]):
+        """Offer encoded events to the subscribers of their tables, dropping slow consumers"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        slow = []
+        for seq, table, message in messages:
+            for subscriber in subscribers:
+                if table in subscriber.topics and not subscriber.dropped:
+                    if not subscriber.offer((seq, message)):
+                        slow.append(subscriber)
+        self.published += len(messages)
+        if slow:
+            self.dropped += len(slow)
+            with self._lock:
+                self._subscribers.difference_update(slow)
+
+    def replay(self, topics: Iterable[str], last_event_id: int, limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Events after last_event_id for a reconnecting client (call inside an
+        app context). Returns the messages and the last seq replayed, or a
+        single reset event if more than `limit` entries were missed.
+        """
+        topics = list(topics)
+        entries = log_since(last_event_id, limit + 1, topics)
+        if len(entries) > limit:
+            latest = latest_seq()
+            return [format_event(latest, 'reset', {'reason': 'too many missed changes, reload'})], latest
+        if not entries:
+            return [], last_event_id
+        return [message for _, _, message in encode_entries(entries)], entries[-1].seq
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscriber count and broker counters"""
+        return {
+            'subscribers': len(self._subscribers),
+            'published': self.published,
+            'dropped': self.dropped
+        }
+
+
+def event_stream(broker: EventBroker, subscriber: Subscriber, preamble: List[bytes],
+                 replayed_up_to: int, heartbeat: float) -> Iterator[bytes]:
+    """
+    Body of an SSE response: the preamble (retry hint, replayed events),
+    then live events newer than replayed_up_to, with a comment line every
+    `heartbeat` seconds of silence so proxies keep the connection open.
+    Needs no app context.
+    """
+    try:
+        for chunk in preamble:
+            yield chunk
+        while True:
+            try:
+                seq, message = subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield b': heartbeat\n\n'
+                continue
+            if message is None:
+                if subscriber.dropped:
+                    yield format_event(None, 'dropped', {'reason': 'client too slow, reconnect with Last-Event-ID'})
+                return
+            if seq > replayed_up_to:
+                yield message
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+def init_event_stream(app) -> EventBroker:
+    """Create this process's broker; its thread starts with the first subscriber"""
+    broker = EventBroker(app)
+    app.extensions['event_broker'] = broker
+    return broker
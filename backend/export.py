@@ -0,0 +1,48 @@
+"""
+Streaming encoders for bulk data export.
+
+Each encoder takes an iterable of dicts and yields text chunks, buffering at
+most `chunk_rows` rows at a time so memory stays flat regardless of row count.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+def ndjson_chunks(rows: Iterable[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON"""
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(row, separators=(',', ':')))
+        if len(buffer) >= chunk_rows:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+def csv_chunks(rows: Iterable[Dict[str, Any]], columns: List[str], chunk_rows: int = 500) -> Iterator[str]:
+    """Encode rows as CSV with a header line, sent before any row is read"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    yield output.getvalue()
+    output.seek(0)
+    output.truncate()
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+            pending = 0
+    if pending:
+        yield output.getvalue()
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
@@ -0,0 +1,158 @@
+"""
+Password hashing service.
+
+PBKDF2/scrypt are CPU-bound and hold the GIL, so hashing and verification run
+in a bounded process pool; the request thread just waits on a future. A
+semaphore caps in-flight work so a login burst gets a fast "busy" error
+instead of an unbounded queue. The algorithm and cost come from
+app_config.Config, and needs_rehash() tells callers when a stored hash was
+made with older parameters.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when too many hash operations are already queued"""
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+def _verify(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """Runs Werkzeug password hashing on a bounded process pool"""
+
+    def __init__(self, method='scrypt:32768:8:1', salt_length=16, workers=None, max_pending=64):
+        self.method = method
+        self.salt_length = salt_length
+        # 0 workers hashes inline, which is cheaper for tests and scripts
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._method_prefix = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # fork keeps workers cheap and avoids re-importing __main__;
+                    # start() forks them up front, before server threads exist
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    def start(self):
+        """Create the pool and its worker processes now rather than on first use"""
+        if self.workers > 0:
+            pool = self._get_pool()
+            for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError('Too many password operations in progress, retry shortly')
+        try:
+            try:
+                return self._get_pool().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); rebuild the pool and retry once
+                with self._pool_lock:
+                    self._pool = None
+                return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different method or cost than configured"""
+        if self._method_prefix is None:
+            # Werkzeug fills in default parameters, so compare against a real hash
+            self._method_prefix = _hash('', self.method, 1).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _reset_after_fork(self):
+        # A forked child inherits the pool object but not its manager thread;
+        # drop it (the parent still owns the processes) and start fresh
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def _build_hasher(config):
+    get = config.get if isinstance(config, dict) else lambda key: getattr(config, key)
+    return PasswordHasher(
+        method=get('PASSWORD_HASH_METHOD'),
+        salt_length=get('PASSWORD_HASH_SALT_LENGTH'),
+        workers=get('PASSWORD_HASH_WORKERS'),
+        max_pending=get('PASSWORD_HASH_MAX_PENDING')
+    )
+
+def configure_hasher(config, start=True):
+    """
+    Replace the global hasher with one built from a config object or
+    mapping. start=False defers creating the pool to first use or start().
+    """
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+        _hasher = _build_hasher(config)
+        if start:
+            _hasher.start()
+    return _hasher
+
+def get_hasher():
+    """Get the global hasher, configured from app_config on first use"""
+    global _hasher
+    if _hasher is None:
+        from config.app_config import get_config
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = _build_hasher(get_config())
+    return _hasher
+
+@atexit.register
+def _shutdown_hasher():
+    if _hasher is not None:
+        _hasher.shutdown()
+
+def _after_fork_in_child():
+    global _hasher_lock
+    _hasher_lock = threading.Lock()
+    if _hasher is not None:
+        _hasher._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,124 @@
+"""
+Conditional request support for API resources.
+
+A validator function returns the (etag, last_modified) pair for the current
+request from one cheap indexed query: a row's version for single resources,
+or the table version counter for collections. When the client's
+If-None-Match / If-Modified-Since still matches, the view is never called and
+a bodyless 304 is returned; otherwise the view runs and the response carries
+ETag, Last-Modified and Cache-Control headers. Row ETags embed the row
+version, so writes can check If-Match without another lookup.
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import Response, current_app, request
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from models import db
+from table_versions import current_version
+
+Validators = Optional[Tuple[str, datetime]]
+
+def _variant() -> str:
+    mask_header = current_app.config.get('RESTX_MASK_HEADER', 'X-Fields')
+    return '|'.join((request.query_string.decode('latin-1'), request.headers.get(mask_header, '')))
+
+def make_etag(*parts: Any) -> str:
+    """
+    Strong ETag for a representation. The path, query string and field mask
+    header are included, since they change the body for the same data.
+    """
+    seed = '|'.join(str(part) for part in parts + (request.path, _variant()))
+    return hashlib.sha1(seed.encode('utf-8')).hexdigest()
+
+def row_etag(table: str, row_id: int, version: int) -> str:
+    """
+    Strong ETag for a row: readable 'table-id-vN', plus a digest of the query
+    string and field mask when they shape the body.
+    """
+    etag = f'{table}-{row_id}-v{version}'
+    variant = _variant()
+    if variant != '|':
+        etag += '-' + hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]
+    return etag
+
+def if_match_version(table: str, row_id: int) -> Tuple[bool, Optional[int]]:
+    """
+    Version required by the request's If-Match header for a row: (False, None)
+    without the header or for '*', (True, version) for one of our row ETags,
+    and (True, None) when no strong ETag names this row, which can never match.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return False, None
+    prefix = f'{table}-{row_id}-v'
+    for etag in if_match.as_set():
+        if etag.startswith(prefix):
+            version = etag[len(prefix):].split('-', 1)[0]
+            if version.isdigit():
+                return True, int(version)
+    return True, None
+
+def row_validators(model, id_arg: str) -> Callable[..., Validators]:
+    """Validators for a single row: primary key lookup of its version and updated_at"""
+    def validators(**kwargs) -> Validators:
+        row_id = kwargs[id_arg]
+        row = db.session.execute(
+            db.select(model.version, model.updated_at).where(model.id == row_id)
+        ).first()
+        if row is None:
+            return None
+        return row_etag(model.__tablename__, row_id, row.version), row.updated_at
+    return validators
+
+def collection_validators(table: str) -> Callable[..., Validators]:
+    """Validators for a collection: the table's version counter"""
+    def validators(*args, **kwargs) -> Validators:
+        version = current_version(table)
+        if version is None:
+            return None
+        return make_etag(table, version[0]), version[1]
+    return validators
+
+def cache_headers(etag: str, last_modified: datetime) -> Dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for a response"""
+    return {
+        'ETag': quote_etag(etag),
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': current_app.config['HTTP_CACHE_CONTROL']
+    }
+
+def conditional(validators: Callable[..., Validators]):
+    """
+    Decorator for GET views: answer 304 without calling the view when the
+    client's copy is current, otherwise add caching headers to a 200 response.
+    The view's keyword arguments are passed to `validators`; returning None
+    (e.g. row not found) skips conditional handling.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = validators(**kwargs)
+            if current is None:
+                return view(*args, **kwargs)
+            etag, last_modified = current
+            headers = cache_headers(etag, last_modified)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                return Response(status=304, headers=headers)
+
+            response = view(*args, **kwargs)
+            if isinstance(response, Response):
+                if response.status_code == 200:
+                    response.headers.extend(headers)
+                return response
+            if isinstance(response, tuple):
+                data, code, extra = response + (200, None)[len(response) - 1:]
+                if code != 200:
+                    return response
+                return data, code, dict(extra or {}, **headers)
+            return response, 200, headers
+        return wrapper
+    return decorator
@@ -0,0 +1,224 @@
+"""
+Request, SQL and Firebase instrumentation in the Prometheus text format.
+
+Flask before/after_request hooks time every request and label it with its
+method, URL rule (e.g. /api/v1/customers/<int:customer_id>, so ids do not
+blow up the label set) and status. SQLAlchemy before/after_cursor_execute
+hooks time every statement; inside a request the count and time are summed
+on flask.g and recorded once in after_request, so a query costs two
+perf_counter calls and no lock. Firebase calls are reported through
+config.firebase_config.call_listeners. Values live in this process only:
+behind serve.py each worker keeps its own, and a scrape sees the worker that
+answered it.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Sequence, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+from config.firebase_config import call_listeners
+
+# Flask appends the charset
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+# Histogram upper bounds: seconds for durations, statements for per-request query counts
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != float('inf') else '+Inf'
+    return str(value)
+
+
+class Counter:
+    """Monotonic values by label tuple; callers hold the registry lock"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield self.name, _labels(self.labels, labels), value
+
+
+class Histogram:
+    """Bucketed observations by label tuple; callers hold the registry lock"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label tuple -> [per-bucket counts (last slot is +Inf), sum]
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        bounds = [_number(float(bound)) for bound in self.buckets] + ['+Inf']
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _labels(self.labels, labels, f'le="{bound}"'), cumulative
+            yield f'{self.name}_sum', _labels(self.labels, labels), total
+            yield f'{self.name}_count', _labels(self.labels, labels), cumulative
+
+
+class MetricsRegistry:
+    """The process-wide metric set behind /api/v1/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('http_requests_total', 'HTTP requests by method, route and status',
+                                ('method', 'route', 'status'))
+        self.request_seconds = Histogram('http_request_duration_seconds', 'HTTP request latency',
+                                         ('method', 'route'))
+        self.request_queries = Histogram('http_request_sql_queries', 'SQL statements executed per HTTP request',
+                                         ('method', 'route'), QUERY_COUNT_BUCKETS)
+        self.request_sql_seconds = Histogram('http_request_sql_duration_seconds',
+                                             'Time spent in SQL per HTTP request', ('method', 'route'))
+        self.queries = Counter('sql_queries_total', 'SQL statements executed, by context', ('context',))
+        self.sql_seconds = Counter('sql_query_duration_seconds_total', 'Time spent in SQL, by context', ('context',))
+        self.firebase_calls = Counter('firebase_calls_total', 'Firebase database calls by operation and outcome',
+                                      ('op', 'outcome'))
+        self.firebase_seconds = Histogram('firebase_call_duration_seconds', 'Firebase database call latency', ('op',))
+        self.metrics = [
+            self.requests, self.request_seconds, self.request_queries, self.request_sql_seconds,
+            self.queries, self.sql_seconds, self.firebase_calls, self.firebase_seconds
+        ]
+        self.start_time = time.time()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        queries: int, sql_seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            self.request_seconds.observe(key, seconds)
+            self.request_queries.observe(key, queries)
+            self.request_sql_seconds.observe(key, sql_seconds)
+            if queries:
+                self.queries.inc(('request',), queries)
+                self.sql_seconds.inc(('request',), sql_seconds)
+
+    def observe_sql(self, seconds: float) -> None:
+        """A statement run outside any request (startup, outbox drainer, event poller)"""
+        with self._lock:
+            self.queries.inc(('background',))
+            self.sql_seconds.inc(('background',), seconds)
+
+    def observe_firebase(self, op: str, seconds: float, error) -> None:
+        with self._lock:
+            self.firebase_calls.inc((op, 'error' if error is not None else 'ok'))
+            self.firebase_seconds.observe((op,), seconds)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in metric.samples())
+        rss = _resident_memory()
+        if rss is not None:
+            lines.append('# HELP process_resident_memory_bytes Resident memory size in bytes')
+            lines.append('# TYPE process_resident_memory_bytes gauge')
+            lines.append(f'process_resident_memory_bytes {rss}')
+        lines.append('# HELP process_start_time_seconds Start time of the process since the epoch in seconds')
+        lines.append('# TYPE process_start_time_seconds gauge')
+        lines.append(f'process_start_time_seconds {_number(round(self.start_time, 3))}')
+        return '\n'.join(lines) + '\n'
+
+def _resident_memory():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return None
+
+# Metrics are per process, like the engine pool and the hashing pool
+registry = MetricsRegistry()
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_sql_seconds = 0.0
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        rule = request.url_rule
+        registry.observe_request(
+            request.method, rule.rule if rule is not None else 'unmatched', response.status_code,
+            time.perf_counter() - started, g.pop('metrics_queries', 0), g.pop('metrics_sql_seconds', 0.0)
+        )
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['metrics_query_start'].pop()
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_queries += 1
+        g.metrics_sql_seconds += seconds
+    else:
+        registry.observe_sql(seconds)
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('metrics_query_start'):
+        conn.info['metrics_query_start'].pop()
+
+def _on_firebase_call(op, seconds, error):
+    registry.observe_firebase(op, seconds, error)
+
+def init_metrics(app) -> bool:
+    """Register the request, SQL and Firebase hooks unless METRICS_ENABLED is off"""
+    if not app.config['METRICS_ENABLED']:
+        return False
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    if _on_firebase_call not in call_listeners:
+        call_listeners.append(_on_firebase_call)
+    app.extensions['metrics'] = registry
+    return True
@@ -1,13 +1,326 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Iterable
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.schema import CreateColumn
+from hashing import get_hasher
+from search import (
+    is_search_index_installed, search_customer_ids, matching_ids_subquery, rank_by_search, deferred_insert_indexing
+)
 
 db = SQLAlchemy()
 
+# Callbacks run as fn(session, model, changes) inside the transaction of
+# writes that bypass ORM flush events (bulk Core statements). `changes` is a
+# list of (id, to_dict()-shaped dict) pairs, with None as the dict for deletes.
+bulk_write_listeners = []
+
+
+def notify_bulk_write(model, changes: List[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+    """Report rows written by a bulk statement to bulk_write_listeners"""
+    for listener in bulk_write_listeners:
+        listener(db.session, model, changes)
+
+
+def sort_keys(model, sort: Optional[List[Tuple[str, bool]]] = None) -> List[Tuple[Any, bool]]:
+    """(column, descending) pairs for ORDER BY, ending with id as the tie-breaker"""
+    keys = [(model.__table__.c[name], descending) for name, descending in sort or []]
+    if not any(column.key == 'id' for column, _ in keys):
+        keys.append((model.__table__.c.id, False))
+    return keys
+
+
+def _cursor_value(column, value):
+    """Convert a value from a decoded cursor back to the column's Python type"""
+    if value is None or isinstance(value, (list, dict)):
+        raise ValueError('Invalid cursor')
+    if isinstance(column.type, db.DateTime):
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        return datetime.fromisoformat(value)
+    return value
+
+
+def keyset_condition(keys: List[Tuple[Any, bool]], values: List[Any]):
+    """WHERE clause for rows that sort after `values` in the order given by keys"""
+    if len(values) != len(keys):
+        raise ValueError('Cursor does not match the sort order')
+    values = [_cursor_value(column, value) for (column, _), value in zip(keys, values)]
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        # One direction: a row-value comparison, which SQLite can seek in an index
+        descending = directions.pop()
+        left = db.tuple_(*[column for column, _ in keys])
+        right = db.tuple_(*values)
+        return left < right if descending else left > right
+    # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        ties = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(db.and_(*ties, column < values[i] if descending else column > values[i]))
+    return db.or_(*clauses)
+
+
+def keyset_rows(stmt, model, limit: int, after: Optional[List[Any]] = None,
+                sort: Optional[List[Tuple[str, bool]]] = None) -> Tuple[List[Any], Optional[List[Any]]]:
+    """
+    Fetch one page of a Core select of columns using keyset pagination. The
+    select must include the sort columns and id. Returns the rows and the
+    JSON-ready sort values to resume after, or None on the last page.
+    """
+    keys = sort_keys(model, sort)
+    if after is not None:
+        stmt = stmt.where(keyset_condition(keys, after))
+    stmt = stmt.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        return rows, [
+            last[column].isoformat() if isinstance(last[column], datetime) else last[column]
+            for column, _ in keys
+        ]
+    return rows, None
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+def supports_upsert_statement() -> bool:
+    """Whether upsert_statement() works on the current engine"""
+    return db.engine.dialect.name in UPSERT_DIALECTS
+
+def upsert_statement(table, rows: List[Dict[str, Any]], conflict_columns: List[str],
+                     update_columns: List[str], **touch):
+    """
+    Multi-row INSERT ... ON CONFLICT (conflict_columns) DO UPDATE for SQLite
+    and PostgreSQL. Existing rows get update_columns from the new values, plus
+    the `touch` values (e.g. updated_at), but only when an update column
+    actually differs, so replaying the same data is a no-op. Add .returning()
+    to get the rows that were inserted or changed. Check
+    supports_upsert_statement() first on other databases.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f'Upsert is not supported on {dialect}')
+    stmt = insert(table).values(rows)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_=dict({column: excluded[column] for column in update_columns}, **touch),
+        where=db.or_(*[table.c[column].is_distinct_from(excluded[column]) for column in update_columns])
+    )
+
+
+class VersionConflictError(Exception):
+    """Raised when a conditional update finds the row at a different version"""
+    
+    def __init__(self, current_version: int):
+        super().__init__(f'Record was modified (current version is {current_version})')
+        self.current_version = current_version
+
+
+def validate_patch(record: Dict[str, Any], spec: Dict[str, Tuple[type, Optional[int], bool]]) -> Dict[str, Any]:
+    """
+    Check a partial update against spec ({field: (type, max length, nullable)}).
+    Returns the values to set; raises ValueError on unknown or invalid fields.
+    """
+    if not record:
+        raise ValueError('No fields to update')
+    values = {}
+    for field, value in record.items():
+        if field not in spec:
+            raise ValueError(f'Unknown field: {field}')
+        expected_type, max_length, nullable = spec[field]
+        if value is None or value == '':
+            if not nullable:
+                raise ValueError(f'Field {field} cannot be empty')
+            values[field] = None
+            continue
+        if not isinstance(value, expected_type):
+            raise ValueError(f'Field {field} must be a {expected_type.__name__}')
+        if max_length and len(value) > max_length:
+            raise ValueError(f'Field {field} exceeds {max_length} characters')
+        values[field] = value
+    return values
+
+
+def patch_row(model, row_id: int, values: Dict[str, Any], expected_version: Optional[int] = None,
+              columns: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Apply a partial update with a single UPDATE ... RETURNING that bumps the
+    row's version and updated_at, and commit. With expected_version the row
+    must still be at that version. Returns the updated row (`columns`,
+    default all) as a dict, None if the row does not exist, or raises
+    VersionConflictError.
+    """
+    table = model.__table__
+    stmt = (
+        db.update(table).where(table.c.id == row_id)
+        .values(**values, updated_at=datetime.utcnow(), version=table.c.version + 1)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(table.c.version == expected_version)
+    row = db.session.execute(stmt.returning(*(columns or table.c))).first()
+    if row is None:
+        # Only failed updates pay for a second lookup, to tell 404 from 412
+        current = db.session.execute(db.select(table.c.version).where(table.c.id == row_id)).scalar()
+        db.session.rollback()
+        if current is None:
+            return None
+        raise VersionConflictError(current)
+    record = row_to_dict(row)
+    if bulk_write_listeners:
+        notify_bulk_write(model, [(row_id, record)])
+    db.session.commit()
+    return record
+
+
+def bulk_write_rows(model, clauses: List[Any], values: Optional[Dict[str, Any]] = None, dry_run: bool = False,
+                    max_rows: int = 10000, chunk_size: int = 500,
+                    columns: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """
+    Set-based UPDATE (values given) or DELETE (values None) of the rows
+    matching clauses, in id order. At most max_rows rows are written per
+    call, chunk_size ids per statement and transaction. Updates skip rows
+    that already have the values and bump version and updated_at; every
+    chunk is reported to bulk_write_listeners (RETURNING `columns`, default
+    all). With dry_run nothing is written and `matched` counts every row
+    that would be.
+    """
+    table = model.__table__
+    if values:
+        # Rows that already hold the values are not rewritten (or re-versioned)
+        clauses = clauses + [db.or_(*[table.c[key].is_distinct_from(value) for key, value in values.items()])]
+    if dry_run:
+        matched = db.session.execute(db.select(db.func.count()).select_from(table).where(*clauses)).scalar()
+        return {'matched': matched, 'affected': 0, 'has_more': matched > max_rows, 'dry_run': True}
+    
+    ids = db.session.execute(
+        db.select(table.c.id).where(*clauses).order_by(table.c.id).limit(max_rows + 1)
+    ).scalars().all()
+    has_more = len(ids) > max_rows
+    ids = ids[:max_rows]
+    affected = 0
+    for start in range(0, len(ids), chunk_size):
+        # Re-applying the clauses skips rows changed since the id scan
+        where = [table.c.id.in_(ids[start:start + chunk_size])] + clauses
+        if values is None:
+            deleted = db.session.execute(db.delete(table).where(*where).returning(table.c.id)).scalars().all()
+            changes = [(row_id, None) for row_id in deleted]
+        else:
+            stmt = (
+                db.update(table).where(*where)
+                .values(**values, updated_at=datetime.utcnow(), version=table.c.version + 1)
+                .returning(*(columns or table.c))
+            )
+            changes = [(row.id, row_to_dict(row)) for row in db.session.execute(stmt)]
+        if changes and bulk_write_listeners:
+            notify_bulk_write(model, changes)
+        db.session.commit()
+        affected += len(changes)
+    return {'matched': len(ids), 'affected': affected, 'has_more': has_more, 'dry_run': False}
+
+
+def row_to_dict(row) -> Dict[str, Any]:
+    """A Core row as a to_dict()-shaped dict (datetimes in ISO format)"""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row._mapping.items()
+    }
+
+
+def list_filters(model, filters: Dict[str, Any]) -> List[Any]:
+    """
+    WHERE clauses for list filters: created_after / created_before and
+    updated_after / updated_before bound created_at and updated_at
+    (exclusive), any other key is an equality on that column.
+    """
+    clauses = []
+    for key, value in filters.items():
+        if key == 'created_after':
+            clauses.append(model.created_at > value)
+        elif key == 'created_before':
+            clauses.append(model.created_at < value)
+        elif key == 'updated_after':
+            clauses.append(model.updated_at > value)
+        elif key == 'updated_before':
+            clauses.append(model.updated_at < value)
+        else:
+            clauses.append(model.__table__.c[key] == value)
+    return clauses
+
+
+def ensure_schema(engine) -> List[str]:
+    """
+    Add columns and indexes declared on the models that an existing database
+    lacks; create_all() only creates whole tables. New columns need a server
+    default or must be nullable. Returns the names of what was added.
+    """
+    added = []
+    inspector = db.inspect(engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                try:
+                    with engine.begin() as connection:
+                        connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+                    added.append(f'{table.name}.{column.name}')
+                except OperationalError as e:
+                    print(f"⚠️ Could not add column {table.name}.{column.name}: {e}")
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                try:
+                    index.create(engine)
+                    added.append(index.name)
+                except OperationalError as e:
+                    print(f"⚠️ Could not create index {index.name}: {e}")
+    return added
+
+
+def executemany_insert(table, rows: List[Dict[str, Any]], statement=None, **shared) -> None:
+    """
+    Insert rows with one DBAPI executemany, skipping SQLAlchemy's per-row
+    parameter processing. Row values must already be driver-ready (strings,
+    numbers, None); values in `shared` are the same for every row and go
+    through the column's bind processor once. `statement` overrides the
+    plain insert(table), e.g. to add prefixes.
+    """
+    dialect = db.engine.dialect
+    for key, value in shared.items():
+        processor = table.c[key].type.dialect_impl(dialect).bind_processor(dialect)
+        shared[key] = processor(value) if processor else value
+    columns = list(rows[0].keys()) + list(shared.keys())
+    compiled = (statement if statement is not None else db.insert(table)).compile(dialect=dialect, column_keys=columns)
+    if compiled.positional:
+        shared_tail = tuple(shared.values())
+        params = [tuple(row.values()) + shared_tail for row in rows]
+        # positiontup follows column order of the table, not of `columns`
+        order = [columns.index(key) for key in compiled.positiontup]
+        if order != list(range(len(columns))):
+            params = [tuple(p[i] for i in order) for p in params]
+    else:
+        params = [dict(row, **shared) for row in rows]
+    db.session.connection().exec_driver_sql(compiled.string, params)
+
 class User(db.Model):
     """User model for SQLAlchemy"""
     __tablename__ = 'users'
+    __table_args__ = (
+        # List filters: role / is_active, optionally by creation date
+        db.Index('ix_users_role_created_at', 'role', 'created_at'),
+        db.Index('ix_users_is_active_created_at', 'is_active', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
@@ -17,6 +330,10 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Incremented by every write; the ORM checks it on UPDATE (optimistic locking)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def __init__(self, email: str, password: str, username: str, role: str = 'user'):
         self.email = email
@@ -26,11 +343,11 @@ class User(db.Model):
         
     def set_password(self, password: str):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hasher().hash(password)
         
     def check_password(self, password: str) -> bool:
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return get_hasher().verify(self.password_hash, password)
         
     def to_dict(self) -> Dict[str, Any]:
         """Convert user to dictionary"""
@@ -41,7 +358,8 @@ class User(db.Model):
             'role': self.role,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version': self.version
         }
         
     def __repr__(self):
@@ -51,6 +369,13 @@ class User(db.Model):
 class Customer(db.Model):
     """Customer model for SQLAlchemy"""
     __tablename__ = 'customers'
+    __table_args__ = (
+        # List filters and sorts; each index also ends in the rowid (id) tie-breaker
+        db.Index('ix_customers_is_active_created_at', 'is_active', 'created_at'),
+        db.Index('ix_customers_company', 'company'),
+        db.Index('ix_customers_created_at', 'created_at'),
+        db.Index('ix_customers_name', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -61,6 +386,10 @@ class Customer(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Incremented by every write; the ORM checks it on UPDATE (optimistic locking)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def __init__(self, name: str, email: str, phone: str = None, company: str = None, notes: str = None):
         self.name = name
@@ -80,13 +409,94 @@ class Customer(db.Model):
             'notes': self.notes,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version': self.version
         }
         
     def __repr__(self):
         return f'<Customer {self.name} ({self.email})>'
 
 
+class OutboxEntry(db.Model):
+    """Pending Firebase mirror write, committed with the change it describes"""
+    __tablename__ = 'firebase_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'set' or 'delete'
+    payload = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<OutboxEntry {self.op} {self.path}>'
+
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped once by each transaction that writes to it"""
+    __tablename__ = 'table_versions'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.name} {self.version}>'
+
+
+class ChangeLogEntry(db.Model):
+    """Latest change to a User/Customer row, in commit order; deletes are kept as tombstones"""
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        # One entry per row: a new change replaces the row's previous entry
+        db.Index('ix_change_log_table_row', 'table_name', 'row_id', unique=True),
+        # Change feed scans: entries of one table after a cursor
+        db.Index('ix_change_log_table_seq', 'table_name', 'seq'),
+        # Never reuse a seq, even after the newest entries are replaced
+        {'sqlite_autoincrement': True},
+    )
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<ChangeLogEntry {self.seq} {self.op} {self.table_name}/{self.row_id}>'
+
+
+class RevokedToken(db.Model):
+    """
+    A revoked token id, or a user's cutoff (tokens issued at or before
+    issued_before), shared by every worker process (see tokens.py)
+    """
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(32), unique=True, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    issued_before = db.Column(db.Float, nullable=True)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or f"user {self.user_id}"}>'
+
+
+class BootstrapStamp(db.Model):
+    """Fingerprint of the database bootstrap last applied (see bootstrap.py)"""
+    __tablename__ = 'bootstrap_stamp'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<BootstrapStamp {self.name} {self.fingerprint[:12]}>'
+
+
 class UserRepository:
     """Repository class for User operations"""
     
@@ -103,27 +513,43 @@ class UserRepository:
         """Get user by ID"""
         return User.query.get(user_id)
     
+    @staticmethod
+    def get_row(columns: List[Any], user_id: int) -> Optional[Any]:
+        """Get one user as a Core row of the given columns"""
+        return db.session.execute(db.select(*columns).where(User.id == user_id)).first()
+    
     @staticmethod
     def get_by_email(email: str) -> Optional[User]:
         """Get user by email"""
         return User.query.filter_by(email=email).first()
     
+    # Columns accepted by sort= (non-null, so keyset cursors stay well defined)
+    SORT_FIELDS = ('id', 'email', 'username', 'role', 'created_at', 'updated_at')
+    
     @staticmethod
-    def get_all() -> List[User]:
-        """Get all users"""
-        return User.query.all()
+    def get_page_rows(columns: List[Any], limit: int, after: Optional[List[Any]] = None,
+                      sort: Optional[List[Tuple[str, bool]]] = None, **filters) -> Tuple[List[Any], Optional[List[Any]]]:
+        """Get one filtered, sorted page of users as Core rows of the given columns"""
+        stmt = db.select(*columns).where(*list_filters(User, filters))
+        return keyset_rows(stmt, User, limit, after, sort)
+    
+    # Fields accepted by patch: (type, max length, nullable)
+    PATCH_FIELDS = {
+        'email': (str, 255, False),
+        'username': (str, 100, False),
+        'role': (str, 50, False),
+        'is_active': (bool, None, False),
+        'password': (str, None, False)
+    }
     
     @staticmethod
-    def update(user_id: int, **kwargs) -> Optional[User]:
-        """Update user"""
-        user = User.query.get(user_id)
-        if user:
-            for key, value in kwargs.items():
-                if hasattr(user, key):
-                    setattr(user, key, value)
-            user.updated_at = datetime.utcnow()
-            db.session.commit()
-        return user
+    def patch(user_id: int, record: Dict[str, Any], expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Partial update in one statement; see patch_row. A password is hashed first."""
+        values = validate_patch(record, UserRepository.PATCH_FIELDS)
+        if 'password' in values:
+            values['password_hash'] = get_hasher().hash(values.pop('password'))
+        columns = [column for column in User.__table__.c if column.key != 'password_hash']
+        return patch_row(User, user_id, values, expected_version, columns)
     
     @staticmethod
     def delete(user_id: int) -> bool:
@@ -140,8 +566,24 @@ class UserRepository:
         """Authenticate user"""
         user = UserRepository.get_by_email(email)
         if user and user.check_password(password):
+            UserRepository._upgrade_password_hash(user, password)
             return user
         return None
+    
+    @staticmethod
+    def _upgrade_password_hash(user: User, password: str) -> None:
+        """Re-hash with the current parameters if the stored hash is outdated"""
+        hasher = get_hasher()
+        if not hasher.needs_rehash(user.password_hash):
+            return
+        new_hash = hasher.hash(password)
+        # Core UPDATE so updated_at and the mirror/outbox hooks are untouched
+        db.session.execute(
+            db.update(User).where(User.id == user.id)
+            .values(password_hash=new_hash, updated_at=User.updated_at)
+        )
+        db.session.commit()
+        set_committed_value(user, 'password_hash', new_hash)
 
 
 class CustomerRepository:
@@ -155,32 +597,363 @@ class CustomerRepository:
         db.session.commit()
         return customer
     
+    # Columns accepted by bulk_create, with their maximum lengths
+    BULK_FIELDS = {'name': 255, 'email': 255, 'phone': 20, 'company': 255, 'notes': None}
+    
+    @staticmethod
+    def bulk_create(records: Iterable[Any], batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Validate and insert many customers, one transaction per batch.
+        
+        Each batch is checked against existing emails with a single IN query
+        and inserted with one executemany. Returns a per-row report in input
+        order; a record may also be an Exception (e.g. an unparsable NDJSON
+        line), which is reported as an error for that row.
+        """
+        results = []
+        seen_emails = set()
+        batch = []
+        
+        def flush():
+            if batch:
+                results.extend(CustomerRepository._insert_batch(batch, seen_emails))
+                batch.clear()
+        
+        for index, record in enumerate(records):
+            batch.append((index, record))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        
+        created = sum(1 for r in results if r['status'] == 'created')
+        return {
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }
+    
+    @staticmethod
+    def _validate_bulk_record(record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Normalize one bulk record, returning (values, None) or (None, error)"""
+        if isinstance(record, Exception):
+            return None, str(record)
+        if not isinstance(record, dict):
+            return None, 'Record must be a JSON object'
+        values = {}
+        for field, max_length in CustomerRepository.BULK_FIELDS.items():
+            value = record.get(field)
+            if value is None or value == '':
+                values[field] = None
+                continue
+            if not isinstance(value, str):
+                return None, f'Field {field} must be a string'
+            if max_length and len(value) > max_length:
+                return None, f'Field {field} exceeds {max_length} characters'
+            values[field] = value
+        for field in ('name', 'email'):
+            if not values[field]:
+                return None, f'Missing required field: {field}'
+        return values, None
+    
+    @staticmethod
+    def _insert_batch(batch: List[Tuple[int, Any]], seen_emails: set) -> List[Dict[str, Any]]:
+        """Validate, dedupe and insert one batch in a single transaction"""
+        results = {}
+        pending = []
+        for index, record in batch:
+            values, error = CustomerRepository._validate_bulk_record(record)
+            if error:
+                results[index] = {'index': index, 'status': 'error', 'error': error}
+            elif values['email'] in seen_emails:
+                results[index] = {'index': index, 'status': 'error', 'error': 'Duplicate email in request'}
+            else:
+                seen_emails.add(values['email'])
+                pending.append((index, values))
+        
+        if pending:
+            emails = [values['email'] for _, values in pending]
+            existing = set(db.session.execute(
+                db.select(Customer.email).where(Customer.email.in_(emails))
+            ).scalars())
+            rows = []
+            for index, values in pending:
+                if values['email'] in existing:
+                    results[index] = {'index': index, 'status': 'error', 'error': 'Email already exists'}
+                else:
+                    rows.append((index, values))
+            
+            if rows:
+                table = Customer.__table__
+                try:
+                    # Plain executemany with the search index updated once per
+                    # batch; ids are then read back with one indexed IN query
+                    now = datetime.utcnow()
+                    with deferred_insert_indexing(db.session):
+                        executemany_insert(
+                            table, [values for _, values in rows],
+                            is_active=True, created_at=now, updated_at=now, version=1
+                        )
+                    inserted = dict(db.session.execute(
+                        db.select(table.c.email, table.c.id).where(
+                            table.c.email.in_([values['email'] for _, values in rows])
+                        )
+                    ).all())
+                    if bulk_write_listeners:
+                        stamp = now.isoformat()
+                        notify_bulk_write(Customer, [
+                            (inserted[values['email']], dict(
+                                values, id=inserted[values['email']], is_active=True,
+                                created_at=stamp, updated_at=stamp, version=1
+                            ))
+                            for _, values in rows
+                        ])
+                    db.session.commit()
+                    for index, values in rows:
+                        results[index] = {'index': index, 'status': 'created', 'id': inserted[values['email']]}
+                except IntegrityError:
+                    # A concurrent writer took one of these emails; report the batch as failed
+                    db.session.rollback()
+                    for index, _ in rows:
+                        results[index] = {'index': index, 'status': 'error', 'error': 'Conflicting write, retry this row'}
+        
+        return [results[index] for index, _ in batch]
+    
+    # Fields replaced by an upsert; is_active is only set on insert
+    UPSERT_FIELDS = ('name', 'phone', 'company', 'notes')
+    
+    # Rows per upsert statement, keeping bound parameters under SQLite's limit
+    UPSERT_STATEMENT_ROWS = 500
+    
+    @staticmethod
+    def upsert(record: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """
+        Create or update the customer with record['email'] in one statement.
+        Returns the customer dict and 'created', 'updated' or 'unchanged';
+        raises ValueError if the record is invalid.
+        """
+        values, error = CustomerRepository._validate_bulk_record(record)
+        if error:
+            raise ValueError(error)
+        result = CustomerRepository._upsert_rows([values])[values['email']]
+        db.session.commit()
+        return result
+    
+    @staticmethod
+    def bulk_upsert(records: Iterable[Any], batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Upsert many customers by email: one transaction per batch and one
+        statement per UPSERT_STATEMENT_ROWS rows. Returns counts and a per-row
+        report in input order, like bulk_create.
+        """
+        results = []
+        seen_emails = set()
+        batch = []
+        
+        def flush():
+            if batch:
+                results.extend(CustomerRepository._upsert_batch(batch, seen_emails))
+                batch.clear()
+        
+        for index, record in enumerate(records):
+            batch.append((index, record))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        
+        counts = {status: 0 for status in ('created', 'updated', 'unchanged', 'error')}
+        for result in results:
+            counts[result['status']] += 1
+        return {
+            'created': counts['created'],
+            'updated': counts['updated'],
+            'unchanged': counts['unchanged'],
+            'failed': counts['error'],
+            'results': results
+        }
+    
+    @staticmethod
+    def _upsert_batch(batch: List[Tuple[int, Any]], seen_emails: set) -> List[Dict[str, Any]]:
+        """Validate, dedupe and upsert one batch in a single transaction"""
+        results = {}
+        rows = []
+        for index, record in batch:
+            values, error = CustomerRepository._validate_bulk_record(record)
+            if error:
+                results[index] = {'index': index, 'status': 'error', 'error': error}
+            elif values['email'] in seen_emails:
+                results[index] = {'index': index, 'status': 'error', 'error': 'Duplicate email in request'}
+            else:
+                seen_emails.add(values['email'])
+                rows.append((index, values))
+        
+        if rows:
+            upserted = CustomerRepository._upsert_rows([values for _, values in rows])
+            db.session.commit()
+            for index, values in rows:
+                customer, status = upserted[values['email']]
+                results[index] = {'index': index, 'status': status, 'id': customer['id']}
+        
+        return [results[index] for index, _ in batch]
+    
+    @staticmethod
+    def _upsert_rows(rows: List[Dict[str, Any]]) -> Dict[str, Tuple[Dict[str, Any], str]]:
+        """
+        Upsert rows (dicts of email plus UPSERT_FIELDS) with one statement in
+        the current transaction. Returns {email: (customer dict, status)}.
+        """
+        table = Customer.__table__
+        now = datetime.utcnow()
+        if not supports_upsert_statement():
+            return CustomerRepository._select_then_write_rows(rows, now)
+        upserted = {}
+        chunk_rows = CustomerRepository.UPSERT_STATEMENT_ROWS
+        for start in range(0, len(rows), chunk_rows):
+            stmt = upsert_statement(
+                table,
+                [dict(values, is_active=True, created_at=now, updated_at=now, version=1)
+                 for values in rows[start:start + chunk_rows]],
+                ['email'], list(CustomerRepository.UPSERT_FIELDS),
+                updated_at=now, version=table.c.version + 1
+            ).returning(*table.c)
+            for row in db.session.execute(stmt):
+                customer = row_to_dict(row)
+                # created_at only equals this statement's timestamp on insert
+                upserted[customer['email']] = (customer, 'created' if row.created_at == now else 'updated')
+        if upserted and bulk_write_listeners:
+            notify_bulk_write(Customer, [(customer['id'], customer) for customer, _ in upserted.values()])
+        
+        unchanged = [values['email'] for values in rows if values['email'] not in upserted]
+        if unchanged:
+            for row in db.session.execute(db.select(table).where(table.c.email.in_(unchanged))):
+                upserted[row.email] = (row_to_dict(row), 'unchanged')
+        return upserted
+    
+    @staticmethod
+    def _select_then_write_rows(rows: List[Dict[str, Any]], now: datetime) -> Dict[str, Tuple[Dict[str, Any], str]]:
+        """
+        _upsert_rows() for databases without ON CONFLICT: lock the existing
+        rows, insert the missing ones and update those that differ, all in
+        the current transaction. A concurrent insert of the same email raises
+        IntegrityError.
+        """
+        table = Customer.__table__
+        statuses = {}
+        chunk_rows = CustomerRepository.UPSERT_STATEMENT_ROWS
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start:start + chunk_rows]
+            existing = {
+                row.email: row for row in db.session.execute(
+                    db.select(table).where(table.c.email.in_([values['email'] for values in chunk])).with_for_update()
+                )
+            }
+            inserts = []
+            for values in chunk:
+                current = existing.get(values['email'])
+                if current is None:
+                    inserts.append(values)
+                    statuses[values['email']] = 'created'
+                elif any(getattr(current, field) != values.get(field) for field in CustomerRepository.UPSERT_FIELDS):
+                    db.session.execute(
+                        db.update(table).where(table.c.id == current.id).values(
+                            updated_at=now, version=table.c.version + 1,
+                            **{field: values.get(field) for field in CustomerRepository.UPSERT_FIELDS}
+                        )
+                    )
+                    statuses[values['email']] = 'updated'
+                else:
+                    statuses[values['email']] = 'unchanged'
+            if inserts:
+                executemany_insert(table, inserts, is_active=True, created_at=now, updated_at=now, version=1)
+        
+        upserted = {}
+        emails = list(statuses)
+        for start in range(0, len(emails), chunk_rows):
+            for row in db.session.execute(db.select(table).where(table.c.email.in_(emails[start:start + chunk_rows]))):
+                upserted[row.email] = (row_to_dict(row), statuses[row.email])
+        written = [(customer['id'], customer) for customer, status in upserted.values() if status != 'unchanged']
+        if written and bulk_write_listeners:
+            notify_bulk_write(Customer, written)
+        return upserted
+    
     @staticmethod
     def get_by_id(customer_id: int) -> Optional[Customer]:
         """Get customer by ID"""
         return Customer.query.get(customer_id)
     
+    @staticmethod
+    def get_row(columns: List[Any], customer_id: int) -> Optional[Any]:
+        """Get one customer as a Core row of the given columns"""
+        return db.session.execute(db.select(*columns).where(Customer.id == customer_id)).first()
+    
     @staticmethod
     def get_by_email(email: str) -> Optional[Customer]:
         """Get customer by email"""
         return Customer.query.filter_by(email=email).first()
     
+    # Columns accepted by sort= (non-null, so keyset cursors stay well defined)
+    SORT_FIELDS = ('id', 'name', 'email', 'created_at', 'updated_at')
+    
     @staticmethod
-    def get_all() -> List[Customer]:
-        """Get all customers"""
-        return Customer.query.all()
+    def get_page_rows(columns: List[Any], limit: int, after: Optional[List[Any]] = None,
+                      sort: Optional[List[Tuple[str, bool]]] = None, search: str = None,
+                      **filters) -> Tuple[List[Any], Optional[List[Any]]]:
+        """
+        Get one filtered, sorted page of customers as Core rows of the given
+        columns. `search` restricts to matches without ranking them.
+        """
+        stmt = db.select(*columns).where(*list_filters(Customer, filters))
+        if search:
+            matches = CustomerRepository._search_filter(search)
+            if matches is None:
+                return [], None
+            stmt = stmt.where(matches)
+        return keyset_rows(stmt, Customer, limit, after, sort)
+    
+    # Fields accepted by patch: (type, max length, nullable)
+    PATCH_FIELDS = {
+        'name': (str, 255, False),
+        'email': (str, 255, False),
+        'phone': (str, 20, True),
+        'company': (str, 255, True),
+        'notes': (str, None, True),
+        'is_active': (bool, None, False)
+    }
     
     @staticmethod
-    def update(customer_id: int, **kwargs) -> Optional[Customer]:
-        """Update customer"""
-        customer = Customer.query.get(customer_id)
-        if customer:
-            for key, value in kwargs.items():
-                if hasattr(customer, key):
-                    setattr(customer, key, value)
-            customer.updated_at = datetime.utcnow()
-            db.session.commit()
-        return customer
+    def patch(customer_id: int, record: Dict[str, Any], expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Partial update in one statement; see patch_row"""
+        values = validate_patch(record, CustomerRepository.PATCH_FIELDS)
+        return patch_row(Customer, customer_id, values, expected_version)
+    
+    @staticmethod
+    def bulk_delete(ids: Optional[List[int]] = None, filters: Optional[Dict[str, Any]] = None,
+                    hard: bool = False, **options) -> Dict[str, Any]:
+        """
+        Soft-delete (is_active=false) or, with hard, delete the customers
+        with the given ids and/or matching list filters; see bulk_write_rows
+        for options. Raises ValueError if neither ids nor filters are given.
+        """
+        clauses = CustomerRepository._bulk_clauses(ids, filters)
+        return bulk_write_rows(Customer, clauses, None if hard else {'is_active': False}, **options)
+    
+    @staticmethod
+    def bulk_patch(record: Dict[str, Any], ids: Optional[List[int]] = None,
+                   filters: Optional[Dict[str, Any]] = None, **options) -> Dict[str, Any]:
+        """Apply the same partial update to the selected customers; email is unique so cannot be set"""
+        spec = {key: value for key, value in CustomerRepository.PATCH_FIELDS.items() if key != 'email'}
+        values = validate_patch(record, spec)
+        clauses = CustomerRepository._bulk_clauses(ids, filters)
+        return bulk_write_rows(Customer, clauses, values, **options)
+    
+    @staticmethod
+    def _bulk_clauses(ids: Optional[List[int]], filters: Optional[Dict[str, Any]]) -> List[Any]:
+        """WHERE clauses selecting bulk targets; refuses an empty selection (the whole table)"""
+        if ids is None and not filters:
+            raise ValueError('Select customers with ids or a filter')
+        clauses = list_filters(Customer, filters or {})
+        if ids is not None:
+            clauses.append(Customer.id.in_(ids))
+        return clauses
     
     @staticmethod
     def delete(customer_id: int) -> bool:
@@ -193,13 +966,66 @@ class CustomerRepository:
         return False
     
     @staticmethod
-    def search(query: str) -> List[Customer]:
-        """Search customers by name, email, or company"""
-        search_term = f"%{query}%"
+    def search(query: str, limit: int = 50) -> List[Customer]:
+        """Search customers by name, email, or company, best matches first"""
+        if is_search_index_installed(db.engine):
+            ids = search_customer_ids(db.session, query, limit)
+            if not ids:
+                return []
+            customers = {c.id: c for c in Customer.query.filter(Customer.id.in_(ids))}
+            return [customers[i] for i in ids if i in customers]
+        
+        # Fallback for databases without FTS5: substring scan
         return Customer.query.filter(
-            db.or_(
-                Customer.name.ilike(search_term),
-                Customer.email.ilike(search_term),
-                Customer.company.ilike(search_term)
-            )
-        ).all()
\ No newline at end of file
+            CustomerRepository._substring_filter(query)
+        ).order_by(Customer.id).limit(limit).all()
+    
+    @staticmethod
+    def search_rows(columns: List[Any], query: str, limit: int = 50, **filters) -> List[Any]:
+        """search() returning filtered Core rows of the given columns"""
+        stmt = db.select(*columns).where(*list_filters(Customer, filters))
+        if is_search_index_installed(db.engine):
+            ranked = rank_by_search(stmt, Customer.id, query)
+            if ranked is None:
+                return []
+            return db.session.execute(ranked.limit(limit)).all()
+        
+        return db.session.execute(
+            stmt.where(CustomerRepository._substring_filter(query))
+            .order_by(Customer.id).limit(limit)
+        ).all()
+    
+    @staticmethod
+    def iter_all(search: str = None, batch_size: int = 1000, **filters) -> Iterator[Customer]:
+        """
+        Stream customers ordered by id, optionally restricted to a search and
+        the list endpoint's filters, fetching batch_size rows at a time from a
+        server-side cursor.
+        """
+        stmt = db.select(Customer).where(*list_filters(Customer, filters)).order_by(Customer.id)
+        if search:
+            matches = CustomerRepository._search_filter(search)
+            if matches is None:
+                return
+            stmt = stmt.where(matches)
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for customer in result.scalars():
+            yield customer
+    
+    @staticmethod
+    def _search_filter(query: str):
+        """Unranked filter for customers matching query, or None if nothing can match"""
+        if is_search_index_installed(db.engine):
+            ids = matching_ids_subquery(query)
+            return None if ids is None else Customer.id.in_(ids)
+        return CustomerRepository._substring_filter(query)
+    
+    @staticmethod
+    def _substring_filter(query: str):
+        """ilike filter over name, email and company"""
+        search_term = f"%{query}%"
+        return db.or_(
+            Customer.name.ilike(search_term),
+            Customer.email.ilike(search_term),
+            Customer.company.ilike(search_term)
+        )
\ No newline at end of file
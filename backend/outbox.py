@@ -0,0 +1,234 @@
+"""
+Transactional outbox for mirroring User/Customer writes to Firebase.
+
+Every flush that creates, updates or deletes a User or Customer also inserts
+firebase_outbox rows on the same connection, so the mirror entry commits or
+rolls back together with the change. A background OutboxDrainer reads the
+queue in id order, coalesces entries per path (last write wins) and sends
+each batch as one multi-path Firebase update(). On failure the batch stays
+queued and the head of the queue backs off exponentially, which keeps
+per-path ordering intact.
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+
+from models import db, User, Customer, OutboxEntry, bulk_write_listeners
+
+# Firebase node for each mirrored model
+MIRRORED_PATHS = {
+    User: 'users',
+    Customer: 'customers'
+}
+
+# Set after a commit that queued entries, so the drainer wakes up early
+_entries_committed = threading.Event()
+
+def mirror_path(model, record_id) -> str:
+    """Firebase path for a mirrored record"""
+    return f'{MIRRORED_PATHS[model]}/{record_id}'
+
+def enqueue(session, entries: Iterable[Tuple[str, Optional[Dict[str, Any]]]]) -> int:
+    """
+    Queue (path, payload) mirror writes on the session's current transaction.
+    A payload of None deletes the path.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            'path': path,
+            'op': 'delete' if payload is None else 'set',
+            'payload': None if payload is None else json.dumps(payload, separators=(',', ':')),
+            'attempts': 0,
+            'created_at': now
+        }
+        for path, payload in entries
+    ]
+    if rows:
+        session.connection().execute(db.insert(OutboxEntry.__table__), rows)
+        session.info['outbox_pending'] = True
+    return len(rows)
+
+def _after_flush(session, flush_context):
+    """Queue mirror writes for every User/Customer touched by this flush"""
+    entries = []
+    for obj in session.new:
+        if type(obj) in MIRRORED_PATHS:
+            entries.append((mirror_path(type(obj), obj.id), obj.to_dict()))
+    for obj in session.dirty:
+        if type(obj) in MIRRORED_PATHS and session.is_modified(obj, include_collections=False):
+            entries.append((mirror_path(type(obj), obj.id), obj.to_dict()))
+    for obj in session.deleted:
+        if type(obj) in MIRRORED_PATHS:
+            entries.append((mirror_path(type(obj), obj.id), None))
+    enqueue(session, entries)
+
+def _after_bulk_write(session, model, changes):
+    """Queue mirror writes for rows written by bulk Core statements"""
+    if model in MIRRORED_PATHS:
+        enqueue(session, ((mirror_path(model, record_id), data) for record_id, data in changes))
+
+def _after_commit(session):
+    if session.info.pop('outbox_pending', False):
+        _entries_committed.set()
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop('outbox_pending', None)
+
+def default_lock_path(database_uri: str) -> str:
+    """Per-database drainer lock file in the temp directory"""
+    digest = hashlib.sha1(database_uri.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'firebase-outbox-{digest}.lock')
+
+def init_outbox(app):
+    """Register the flush hooks when Firebase mirroring is enabled"""
+    if not app.config['FIREBASE_SYNC_ENABLED']:
+        return False
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_soft_rollback)
+        bulk_write_listeners.append(_after_bulk_write)
+    return True
+
+
+class OutboxDrainer:
+    """
+    Background thread that ships queued outbox entries to Firebase.
+
+    Run exactly one drainer per database; `send` receives a multi-path
+    update dict ({path: payload or None}) and must raise on failure.
+    """
+
+    def __init__(self, app, send: Callable[[Dict[str, Any]], None] = None):
+        self.app = app
+        self.batch_size = app.config['OUTBOX_BATCH_SIZE']
+        self.poll_interval = app.config['OUTBOX_POLL_INTERVAL']
+        self.base_backoff = app.config['OUTBOX_BASE_BACKOFF']
+        self.max_backoff = app.config['OUTBOX_MAX_BACKOFF']
+        self._send = send
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_path = None
+        self._lock_file = None
+        self.sent = 0
+        self.failures = 0
+
+    def send(self, updates: Dict[str, Any]):
+        if self._send is None:
+            from config.firebase_config import get_firebase
+            self._send = get_firebase().update_paths
+        self._send(updates)
+
+    def start(self, lock_path: Optional[str] = None):
+        """
+        Start draining in a daemon thread. With lock_path, the thread first
+        waits for an exclusive lock on that file, so that of several worker
+        processes sharing the database exactly one drains at a time; when it
+        exits the lock is released and another takes over.
+        """
+        if self._thread is None:
+            self._lock_path = lock_path
+            self._thread = threading.Thread(target=self._run, name='firebase-outbox', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the drainer thread"""
+        self._stop.set()
+        _entries_committed.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the lock for another process
+            self._lock_file = None
+
+    def _acquire_lock(self) -> bool:
+        """Block until this process holds the drainer lock file; False if stopped first"""
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): only single-process deployments are supported
+            return True
+        self._lock_file = open(self._lock_path, 'a')
+        while not self._stop.is_set():
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                self._stop.wait(self.poll_interval * 5)
+        return False
+
+    def _run(self):
+        if self._lock_path and not self._acquire_lock():
+            return
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    sent, wait = self.drain_once()
+            except Exception as e:
+                print(f"❌ Firebase outbox drainer error: {e}")
+                sent, wait = 0, self.poll_interval
+            if sent and wait == 0:
+                continue
+            _entries_committed.wait(wait)
+            _entries_committed.clear()
+
+    def drain_once(self) -> Tuple[int, float]:
+        """
+        Send one batch from the head of the queue.
+        Returns (entries sent, seconds to wait before the next attempt).
+        """
+        entries: List[OutboxEntry] = (
+            OutboxEntry.query.order_by(OutboxEntry.id).limit(self.batch_size).all()
+        )
+        if not entries:
+            return 0, self.poll_interval
+
+        now = datetime.utcnow()
+        head = entries[0]
+        if head.next_attempt_at and head.next_attempt_at > now:
+            return 0, min(self.poll_interval, (head.next_attempt_at - now).total_seconds())
+
+        # Coalesce in id order so the newest write to each path wins
+        updates = {}
+        for entry in entries:
+            updates[entry.path] = json.loads(entry.payload) if entry.op == 'set' else None
+
+        ids = [entry.id for entry in entries]
+        try:
+            self.send(updates)
+        except Exception as e:
+            attempts = head.attempts + 1
+            delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.8, 1.2)
+            db.session.execute(
+                db.update(OutboxEntry)
+                .where(OutboxEntry.id.in_(ids))
+                .values(attempts=attempts, next_attempt_at=now + timedelta(seconds=delay), last_error=str(e)[:1000])
+            )
+            db.session.commit()
+            self.failures += 1
+            print(f"❌ Firebase outbox send failed (attempt {attempts}), retrying in {delay:.1f}s: {e}")
+            return 0, delay
+
+        db.session.execute(db.delete(OutboxEntry).where(OutboxEntry.id.in_(ids)))
+        db.session.commit()
+        self.sent += len(ids)
+        return len(ids), 0 if len(entries) == self.batch_size else self.poll_interval
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and drainer counters"""
+        return {
+            'pending': OutboxEntry.query.count(),
+            'sent': self.sent,
+            'failures': self.failures
+        }
@@ -0,0 +1,294 @@
+"""
+Slow-query and full-scan detection.
+
+SQLAlchemy before/after_cursor_execute hooks time every statement and fold
+it into per-statement totals, keyed by the statement with whitespace
+collapsed, literals replaced by ? and IN lists shortened, so
+`IN (?, ?, ?)` and `IN (?, ?)` count as one statement. The first time a
+statement is seen on SQLite it is run once more under EXPLAIN QUERY PLAN on
+the same connection. Plain `SCAN <table>` steps (no index, not a virtual
+table) are sorted into three kinds: scans of tables with at most
+small_table_rows rows, scans cut short by a LIMIT in index order (keyset
+list pages), and full scans, which are logged once. Statements slower than
+SLOW_QUERY_MS are logged with their duration, parameter types and the
+repository method that issued them. Totals are kept per process, capped at
+QUERY_PROFILER_MAX_STATEMENTS distinct statements, and served by
+GET /api/v1/admin/queries.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from models import db
+
+# Report orderings accepted by QueryProfiler.report()
+REPORT_SORTS = ('total', 'mean', 'max', 'count', 'slow')
+
+# Statements worth explaining; INSERT ... VALUES and PRAGMA plans say nothing
+EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+# A plan step reading every row of a table, e.g. "SCAN customers" or "SCAN TABLE customers"
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?([^\s(]+)(.*)$')
+
+# A LIMIT clause; a scan under it stops early unless the rows are sorted first
+_LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Statement text with literals as ? and placeholder lists collapsed"""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(?, ...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the bound parameters, never their values, e.g. '(str, int)' or '500 x (str, str)'"""
+    if executemany:
+        rows = list(parameters or ())
+        return f'{len(rows)} x {parameter_shape(rows[0], False)}' if rows else '0 x ()'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in parameters or ()) + ')'
+
+def scanned_tables(plan: List[str]) -> List[str]:
+    """Tables read without an index by an EXPLAIN QUERY PLAN"""
+    tables = []
+    for step in plan:
+        match = FULL_SCAN.match(step)
+        if match and 'USING' not in match.group(2) and 'VIRTUAL TABLE' not in match.group(2):
+            if match.group(1) != 'CONSTANT':
+                tables.append(match.group(1))
+    return tables
+
+def find_caller() -> str:
+    """The repository method (or else the first app function) on the current stack"""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        path = code.co_filename
+        if path.startswith(_BACKEND_DIR) and 'site-packages' not in path and path != __file__:
+            qualname = getattr(code, 'co_qualname', code.co_name)
+            if 'Repository.' in qualname:
+                return qualname
+            if fallback is None:
+                module = os.path.splitext(os.path.relpath(path, _BACKEND_DIR))[0].replace(os.sep, '.')
+                fallback = f"{module}:{qualname.replace('<locals>.', '')}"
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+def explain(connection, statement: str, parameters: Any, executemany: bool) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, run on the raw DBAPI connection so no hooks fire"""
+    if executemany:
+        parameters = next(iter(parameters or ()), ())
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters or ())
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def count_rows_up_to(connection, table: str, limit: int) -> int:
+    """Rows in table, counting no further than limit + 1, so big tables cost no more than small ones"""
+    cursor = connection.connection.cursor()
+    try:
+        quoted = table.replace('"', '""')
+        cursor.execute(f'SELECT count(*) FROM (SELECT 1 FROM "{quoted}" LIMIT {int(limit) + 1})')
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+class StatementStats:
+    """Running totals of one normalized statement"""
+
+    __slots__ = ('statement', 'count', 'total', 'max', 'slow', 'callers', 'parameters', 'plan',
+                 'full_scans', 'bounded_scans', 'small_table_scans')
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.callers = []
+        self.parameters = None
+        self.plan = None
+        self.full_scans = []
+        self.bounded_scans = []
+        self.small_table_scans = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'slow_count': self.slow,
+            'callers': list(self.callers),
+            'parameters': self.parameters,
+            'plan': self.plan,
+            'full_scans': list(self.full_scans),
+            'bounded_scans': list(self.bounded_scans),
+            'small_table_scans': list(self.small_table_scans)
+        }
+
+
+class QueryProfiler:
+    """
+    Per-statement timing for one engine. slow_seconds is the logging
+    threshold; explain turns the EXPLAIN QUERY PLAN capture on or off; scans
+    of tables with at most small_table_rows rows are not flagged.
+    """
+
+    # Distinct callers remembered per statement
+    MAX_CALLERS = 5
+
+    def __init__(self, slow_seconds: float, explain: bool = True, max_statements: int = 1000,
+                 small_table_rows: int = 1000, logger: Optional[logging.Logger] = None):
+        self.slow_seconds = slow_seconds
+        self.explain = explain
+        self.max_statements = max_statements
+        self.small_table_rows = small_table_rows
+        self.logger = logger or logging.getLogger(__name__)
+        self.statements: Dict[str, StatementStats] = {}
+        self.untracked = 0
+        self._small_tables: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine) -> None:
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_profiler_start', []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_profiler_start'):
+            conn.info['query_profiler_start'].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_profiler_start'].pop()
+        key = normalize_statement(statement)
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            stats = self.statements.get(key)
+            first = stats is None
+            if first:
+                if len(self.statements) >= self.max_statements:
+                    self.untracked += 1
+                    stats = None
+                else:
+                    stats = self.statements[key] = StatementStats(key)
+            if stats is not None:
+                stats.count += 1
+                stats.total += seconds
+                stats.max = max(stats.max, seconds)
+                stats.slow += slow
+        if stats is None or not (first or slow):
+            return
+
+        # First sighting or a slow run: worth the stack walk and the plan
+        caller = find_caller()
+        shape = parameter_shape(parameters, executemany)
+        with self._lock:
+            stats.parameters = shape
+            if caller not in stats.callers and len(stats.callers) < self.MAX_CALLERS:
+                stats.callers.append(caller)
+        if first and self.explain and conn.dialect.name == 'sqlite' and EXPLAINABLE.match(statement):
+            try:
+                stats.plan = explain(conn, statement, parameters, executemany)
+            except Exception as e:
+                stats.plan = [f'EXPLAIN failed: {e}']
+            self._classify_scans(conn, stats, statement)
+            if stats.full_scans:
+                self.logger.warning('Full table scan of %s in %s: %s', ', '.join(stats.full_scans), caller, key)
+        if slow:
+            self.logger.warning('Slow query (%.1f ms) in %s, parameters %s: %s', seconds * 1000, caller, shape, key)
+
+    def _classify_scans(self, conn, stats: StatementStats, statement: str) -> None:
+        """Sort the plan's table scans into small-table, LIMIT-bounded and full scans"""
+        # Sorting for ORDER BY reads every row before the LIMIT applies
+        bounded = bool(_LIMIT.search(statement)) and not any('USE TEMP B-TREE' in step for step in stats.plan)
+        for table in scanned_tables(stats.plan):
+            if self._is_small_table(conn, table):
+                stats.small_table_scans.append(table)
+            elif bounded:
+                stats.bounded_scans.append(table)
+            else:
+                stats.full_scans.append(table)
+
+    def _is_small_table(self, conn, table: str) -> bool:
+        """Whether table had at most small_table_rows rows when first scanned"""
+        small = self._small_tables.get(table)
+        if small is None:
+            try:
+                small = count_rows_up_to(conn, table, self.small_table_rows) <= self.small_table_rows
+            except Exception:
+                small = False
+            self._small_tables[table] = small
+        return small
+
+    def report(self, limit: int = 20, sort: str = 'total', full_scans_only: bool = False) -> Dict[str, Any]:
+        """The top `limit` statements by `sort` (one of REPORT_SORTS)"""
+        if sort not in REPORT_SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(REPORT_SORTS)}")
+        order = {
+            'total': lambda s: s.total,
+            'mean': lambda s: s.total / s.count if s.count else 0.0,
+            'max': lambda s: s.max,
+            'count': lambda s: s.count,
+            'slow': lambda s: (s.slow, s.total)
+        }[sort]
+        with self._lock:
+            rows = [s for s in self.statements.values() if s.full_scans or not full_scans_only]
+            rows.sort(key=order, reverse=True)
+            top = [s.to_dict() for s in rows[:limit]]
+            return {
+                'slow_query_ms': self.slow_seconds * 1000,
+                'statements': len(self.statements),
+                'full_scan_statements': sum(1 for s in self.statements.values() if s.full_scans),
+                'untracked_executions': self.untracked,
+                'queries': top
+            }
+
+    def reset(self) -> None:
+        """Forget all totals and plans"""
+        with self._lock:
+            self.statements.clear()
+            self.untracked = 0
+            self._small_tables.clear()
+
+def init_query_profiler(app) -> Optional[QueryProfiler]:
+    """Attach a QueryProfiler to the app's engine unless QUERY_PROFILER_ENABLED is off"""
+    if not app.config['QUERY_PROFILER_ENABLED'] or 'query_profiler' in app.extensions:
+        return app.extensions.get('query_profiler')
+    profiler = QueryProfiler(
+        app.config['SLOW_QUERY_MS'] / 1000,
+        explain=app.config['QUERY_PROFILER_EXPLAIN'],
+        max_statements=app.config['QUERY_PROFILER_MAX_STATEMENTS'],
+        small_table_rows=app.config['QUERY_PROFILER_SMALL_TABLE_ROWS'],
+        logger=app.logger
+    )
+    with app.app_context():
+        profiler.install(db.engine)
+    app.extensions['query_profiler'] = profiler
+    return profiler
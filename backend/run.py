@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Simple run script for the Flask application.
+Development server for the Flask application (single process, reloader in
+debug mode). Use serve.py in production.
 """
 
 import os
@@ -14,7 +15,8 @@ load_dotenv()
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 if __name__ == "__main__":
-    from app import app
+    from app import create_app
+    app = create_app()
     
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'True').lower() in ['true', '1', 'yes']
@@ -0,0 +1,186 @@
+"""
+Full-text search for customers backed by an SQLite FTS5 index.
+
+The index is an external-content FTS5 table over customers(name, email, company),
+kept in sync by triggers so every INSERT/UPDATE/DELETE on customers (ORM or raw
+SQL) updates it in the same transaction. Bulk loaders can suspend the per-row
+insert trigger with deferred_insert_indexing() and index a whole batch in one
+set-based statement instead. On databases without FTS5 the repository falls
+back to the ilike scan.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import List, Optional
+from sqlalchemy import column, table, text
+from sqlalchemy.exc import OperationalError
+
+FTS_TABLE = 'customers_fts'
+
+# Relative bm25 weights for the name, email and company columns
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_INDEX_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, email, company,
+        content='customers', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {FTS_TABLE}_control (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        deferred INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"INSERT OR IGNORE INTO {FTS_TABLE}_control (id, deferred) VALUES (1, 0)",
+    # Recreated on every install so older databases pick up the WHEN clause
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON customers
+    WHEN (SELECT deferred FROM {FTS_TABLE}_control WHERE id = 1) = 0
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email, company)
+        VALUES (new.id, new.name, new.email, new.company);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON customers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, company)
+        VALUES ('delete', old.id, old.name, old.email, old.company);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, email, company ON customers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email, company)
+        VALUES ('delete', old.id, old.name, old.email, old.company);
+        INSERT INTO {FTS_TABLE}(rowid, name, email, company)
+        VALUES (new.id, new.name, new.email, new.company);
+    END
+    """,
+]
+
+# Engines (by URL) on which the FTS index has been installed
+_fts_engines = set()
+
+def _index_exists(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first() is not None
+
+def install_search_index(engine, create: bool = True) -> bool:
+    """
+    Create the FTS5 table and sync triggers if they don't exist, and backfill
+    the index from existing rows the first time. With create=False only look
+    for an index installed earlier. Returns False when the database is not
+    SQLite or SQLite was built without FTS5.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    if create:
+        try:
+            with engine.begin() as conn:
+                existed = _index_exists(conn)
+                for statement in _INDEX_DDL:
+                    conn.execute(text(statement))
+                if not existed:
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        except OperationalError as e:
+            # Read-only connections can still query an index created earlier
+            with engine.connect() as conn:
+                existing = _index_exists(conn)
+            if not existing:
+                print(f"⚠️  Full-text search unavailable, falling back to ilike: {e}")
+                return False
+    else:
+        with engine.connect() as conn:
+            if not _index_exists(conn):
+                return False
+    _fts_engines.add(str(engine.url))
+    return True
+
+def is_search_index_installed(engine) -> bool:
+    """Check whether install_search_index succeeded for this engine"""
+    return str(engine.url) in _fts_engines
+
+@contextmanager
+def deferred_insert_indexing(session):
+    """
+    Suspend the per-row insert trigger for the current transaction and index
+    every customer inserted inside the block with one INSERT ... SELECT.
+    The caller commits; on rollback the suspension is rolled back with it.
+    """
+    if not is_search_index_installed(session.get_bind()):
+        yield
+        return
+    # The UPDATE takes the write lock, so no other connection can insert
+    # between it and the end of the transaction. Only then is max(id) read:
+    # SQLite assigns new rowids above it, so everything past this id was
+    # inserted inside the block and has not been indexed by the trigger.
+    session.execute(text(f"UPDATE {FTS_TABLE}_control SET deferred = 1"))
+    start_id = session.execute(text("SELECT coalesce(max(id), 0) FROM customers")).scalar()
+    yield
+    session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, email, company) "
+            f"SELECT id, name, email, company FROM customers WHERE id > :start_id"
+        ),
+        {'start_id': start_id}
+    )
+    session.execute(text(f"UPDATE {FTS_TABLE}_control SET deferred = 0"))
+
+def build_match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text from the search box into an FTS5 MATCH expression where
+    every word is a quoted prefix term, e.g. 'jo acme' -> '"jo"* "acme"*'.
+    """
+    terms = re.findall(r'\w+', query, re.UNICODE)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def search_customer_ids(session, query: str, limit: int) -> List[int]:
+    """Return ids of customers matching query, best bm25 rank first"""
+    expression = build_match_expression(query)
+    if expression is None:
+        return []
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    rows = session.execute(
+        text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :expression "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT :limit"
+        ),
+        {'expression': expression, 'limit': limit}
+    )
+    return [row[0] for row in rows]
+
+def rank_by_search(stmt, id_column, query: str):
+    """
+    Join a Core select to the index so it returns only rows matching query,
+    best bm25 rank first; any WHERE clauses already on stmt still apply.
+    Returns None for an empty query.
+    """
+    expression = build_match_expression(query)
+    if expression is None:
+        return None
+    fts = table(FTS_TABLE, column('rowid'))
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    return (
+        stmt.join(fts, fts.c.rowid == id_column)
+        .where(text(f"{FTS_TABLE} MATCH :expression").bindparams(expression=expression))
+        .order_by(text(f"bm25({FTS_TABLE}, {weights})"))
+    )
+
+def matching_ids_subquery(query: str):
+    """
+    Unranked SELECT of the rowids matching query, for use in an IN (...)
+    filter when streaming every match. Returns None for an empty query.
+    """
+    expression = build_match_expression(query)
+    if expression is None:
+        return None
+    return text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :expression"
+    ).bindparams(expression=expression).columns(column('rowid'))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Production server: a pre-fork gunicorn master around the preloaded app.
+
+The master builds the app once, which runs create_all, the schema upgrades,
+the search index and the default admin a single time. It then forks
+WEB_WORKERS workers (default: CPU count) that share the loaded code
+copy-on-write. Right after the fork each worker opens its own database
+connections and password hashing pool, and the workers elect a single
+outbox drainer through a lock file.
+
+    python serve.py                          # start (settings: WEB_* in app_config)
+    python serve.py --rolling-restart        # replace workers one at a time
+    kill -HUP <master pid>                   # replace all workers at once, gracefully
+
+Workers are forked from the preloaded app, so new code needs a full restart
+(or gunicorn's USR2 binary upgrade); worker replacement picks up nothing new.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+# Add current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.app_config import get_config
+
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+def gunicorn_options(config) -> dict:
+    """gunicorn settings from the WEB_* configuration"""
+    worker_class = config.WEB_WORKER_CLASS
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"WEB_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, not {worker_class!r}")
+    return {
+        'bind': config.WEB_BIND,
+        'workers': config.WEB_WORKERS or os.cpu_count() or 1,
+        'worker_class': worker_class,
+        'threads': config.WEB_THREADS,
+        'worker_connections': config.WEB_WORKER_CONNECTIONS,
+        'timeout': config.WEB_TIMEOUT,
+        'graceful_timeout': config.WEB_GRACEFUL_TIMEOUT,
+        'keepalive': config.WEB_KEEPALIVE,
+        'max_requests': config.WEB_MAX_REQUESTS,
+        'max_requests_jitter': config.WEB_MAX_REQUESTS_JITTER,
+        'pidfile': config.WEB_PIDFILE,
+        'preload_app': True,
+        'accesslog': '-',
+        'errorlog': '-'
+    }
+
+def stream_limit(worker_class: str, threads: int, configured=None):
+    """
+    Event streams one worker may hold open, or None for no limit beyond
+    SSE_MAX_SUBSCRIBERS. A stream blocks a thread until the client leaves:
+    under gthread that is one of the worker's threads, so some are kept for
+    regular requests; under sync it is the whole worker, which the timeout
+    would then kill, so streams are refused. gevent streams are greenlets.
+    (gunicorn runs sync with more than one thread as gthread.)
+    """
+    if worker_class == 'gevent':
+        return None
+    if worker_class == 'sync' and threads <= 1:
+        return 0
+    return configured if configured is not None else threads // 2
+
+def build_app():
+    """
+    Create the app in the master: one-time database bootstrap, no
+    background services, and no connections or pools left open to fork.
+    """
+    from app import create_app
+    from hashing import get_hasher
+    from models import db
+
+    app = create_app(background=False)
+    get_hasher().shutdown()
+    with app.app_context():
+        db.engine.dispose()
+    return app
+
+def post_fork(server, worker):
+    """Per-worker setup, before the worker starts serving"""
+    from hashing import get_hasher
+    from models import db
+    from outbox import OutboxDrainer, default_lock_path
+
+    app = server.app.application
+    with app.app_context():
+        # Pooled connections must never be shared across processes
+        db.engine.dispose(close=False)
+    # Fork the hashing pool now, before the worker has threads
+    get_hasher().start()
+    limit = stream_limit(server.cfg.worker_class_str, server.cfg.threads, app.config['SSE_THREAD_WORKER_STREAMS'])
+    if limit is not None:
+        broker = app.extensions['event_broker']
+        broker.max_subscribers = min(broker.max_subscribers, limit)
+    if app.config['FIREBASE_SYNC_ENABLED'] and app.config['OUTBOX_DRAINER_ENABLED']:
+        lock_path = app.config.get('OUTBOX_LOCK_FILE') or default_lock_path(app.config['SQLALCHEMY_DATABASE_URI'])
+        app.extensions['firebase_outbox'] = OutboxDrainer(app).start(lock_path)
+
+def rolling_restart(pid: int, workers: int, step_delay: float):
+    """
+    Replace every worker of a running master one at a time: add a worker
+    (TTIN), give it step_delay seconds to boot, then retire the oldest
+    (TTOU, a graceful stop). Capacity never drops below `workers`.
+    """
+    for step in range(workers):
+        os.kill(pid, signal.SIGTTIN)
+        time.sleep(step_delay)
+        os.kill(pid, signal.SIGTTOU)
+        print(f"🔄 Replaced worker {step + 1}/{workers}")
+        time.sleep(step_delay)
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rolling-restart', action='store_true',
+                        help='Replace the workers of the running server one at a time')
+    parser.add_argument('--pid', type=int, help='Master pid for --rolling-restart (default: read WEB_PIDFILE)')
+    parser.add_argument('--step-delay', type=float, default=2.0,
+                        help='Seconds for a new worker to boot during --rolling-restart')
+    args = parser.parse_args()
+    options = gunicorn_options(config)
+
+    if args.rolling_restart:
+        pid = args.pid
+        if pid is None:
+            if not options['pidfile']:
+                parser.error('--rolling-restart needs --pid or WEB_PIDFILE')
+            with open(options['pidfile']) as f:
+                pid = int(f.read().strip())
+        rolling_restart(pid, options['workers'], args.step_delay)
+        return
+
+    if options['worker_class'] == 'gevent':
+        # Patch before the app (and its locks, queues and sockets) is imported
+        from gevent import monkey
+        monkey.patch_all()
+
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            self.application = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set('post_fork', post_fork)
+
+        def load(self):
+            if self.application is None:
+                self.application = build_app()
+            return self.application
+
+    print(f"🚀 Starting {options['workers']} {options['worker_class']} workers on {options['bind']}")
+    limit = stream_limit(options['worker_class'], options['threads'], config.SSE_THREAD_WORKER_STREAMS)
+    if limit == 0:
+        print("⚠️ sync workers refuse /api/v1/stream; use WEB_WORKER_CLASS=gevent for event streams")
+    elif limit is not None:
+        print(f"⚠️ At most {limit} open /api/v1/stream clients per worker; use WEB_WORKER_CLASS=gevent for more")
+    if options['workers'] > 1 and not config.TOKEN_REVOCATION_SHARED:
+        print("⚠️ TOKEN_REVOCATION_SHARED is off: a logout or used refresh token is only seen by the worker that handled it")
+    ProductionServer(options).run()
+
+if __name__ == "__main__":
+    main()
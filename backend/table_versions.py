@@ -0,0 +1,83 @@
+"""
+Per-table change counters for cheap collection validators.
+
+Any transaction that creates, updates or deletes a User or Customer (through
+ORM flushes or bulk Core statements reported via notify_bulk_write) bumps
+that table's row in table_versions once, inside the same transaction. Reading
+the counter is a primary key lookup, so "has anything changed?" costs one
+indexed query no matter how large the table is.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from models import db, User, Customer, TableVersion, bulk_write_listeners
+
+# Tables whose versions are tracked, by model
+TRACKED_TABLES = {
+    User: User.__tablename__,
+    Customer: Customer.__tablename__
+}
+
+def bump(session, tables) -> None:
+    """Bump the given tables once per transaction"""
+    bumped = session.info.setdefault('table_versions_bumped', set())
+    pending = set(tables) - bumped
+    if not pending:
+        return
+    session.connection().execute(
+        db.update(TableVersion)
+        .where(TableVersion.name.in_(pending))
+        .values(version=TableVersion.version + 1, changed_at=datetime.utcnow())
+    )
+    bumped.update(pending)
+
+def _after_flush(session, flush_context):
+    tables = {
+        TRACKED_TABLES[type(obj)]
+        for obj in list(session.new) + list(session.deleted)
+        if type(obj) in TRACKED_TABLES
+    }
+    tables.update(
+        TRACKED_TABLES[type(obj)]
+        for obj in session.dirty
+        if type(obj) in TRACKED_TABLES and session.is_modified(obj, include_collections=False)
+    )
+    if tables:
+        bump(session, tables)
+
+def _after_bulk_write(session, model, changes):
+    if model in TRACKED_TABLES and changes:
+        bump(session, [TRACKED_TABLES[model]])
+
+def _after_transaction_done(session, *args):
+    session.info.pop('table_versions_bumped', None)
+
+def init_table_versions(app, seed: bool = True) -> None:
+    """Create missing counter rows (unless seed is False) and register the write hooks"""
+    missing = []
+    if seed:
+        existing = set(db.session.execute(db.select(TableVersion.name)).scalars())
+        missing = [name for name in TRACKED_TABLES.values() if name not in existing]
+    if missing:
+        try:
+            db.session.add_all(TableVersion(name=name, version=0) for name in missing)
+            db.session.commit()
+        except OperationalError as e:
+            # Read-only connections can still serve validators once a writer creates the rows
+            db.session.rollback()
+            print(f"⚠️ Could not create table version rows: {e}")
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_transaction_done)
+        event.listen(db.session, 'after_soft_rollback', _after_transaction_done)
+        bulk_write_listeners.append(_after_bulk_write)
+
+def current_version(table: str) -> Optional[Tuple[int, datetime]]:
+    """(version, changed_at) for a tracked table"""
+    row = db.session.execute(
+        db.select(TableVersion.version, TableVersion.changed_at).where(TableVersion.name == table)
+    ).first()
+    return tuple(row) if row else None
@@ -0,0 +1,63 @@
+"""
+Shared fixtures: an app on a fresh SQLite file per test, its test client and
+tokens for the default admin.
+"""
+
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tokens
+from app import create_app
+from models import db, RevokedToken
+
+ADMIN_EMAIL = 'admin@example.com'
+ADMIN_PASSWORD = 'admin123'
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Revocations live in the revoked_tokens table plus a per-process copy;
+    # start each test with both empty, so no test sees another's revocations
+    monkeypatch.setattr(tokens, 'revocations', tokens.TokenRevocationList())
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'PASSWORD_HASH_WORKERS': 0,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'OUTBOX_DRAINER_ENABLED': False,
+        'QUERY_PROFILER_ENABLED': False,
+        'TOKEN_REVOCATION_SYNC_INTERVAL': 0
+    }, background=False)
+    with app.app_context():
+        db.session.execute(db.delete(RevokedToken))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def login(client):
+    """Log in as the default admin; returns the token pair"""
+    def login():
+        response = client.post('/api/v1/auth/login', json={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+    return login
+
+@pytest.fixture
+def create_customer(client):
+    """Create a customer through the API; returns its JSON"""
+    def create_customer(**fields):
+        response = client.post('/api/v1/customers', json=dict({'name': 'Ada', 'email': 'ada@example.com'}, **fields))
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()
+    return create_customer
@@ -0,0 +1,55 @@
+"""Bulk import: batched inserts and the deferred search index update"""
+
+import sqlite3
+
+from sqlalchemy import event, text
+
+from models import db
+from search import FTS_TABLE, deferred_insert_indexing
+
+def integrity_check(app):
+    """Fail if the search index disagrees with the customers table"""
+    with app.app_context():
+        # rank = 1 also compares the index with its external content table
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)"))
+        db.session.rollback()
+
+def test_imported_customers_are_searchable(app, client):
+    response = client.post('/api/v1/customers/bulk', json=[
+        {'name': 'Ada Lovelace', 'email': 'ada@example.com', 'company': 'Analytical'},
+        {'name': 'Grace Hopper', 'email': 'grace@example.com'},
+        {'name': 'No Email'}
+    ])
+
+    report = response.get_json()
+    assert response.status_code == 200
+    assert (report['created'], report['failed']) == (2, 1)
+    items = client.get('/api/v1/customers', query_string={'search': 'analyt'}).get_json()['items']
+    assert [item['email'] for item in items] == ['ada@example.com']
+    integrity_check(app)
+
+def test_concurrent_insert_is_indexed_once(app, tmp_path):
+    def insert(conn, name):
+        conn.execute(
+            "INSERT INTO customers (name, email, is_active, created_at, updated_at, version) "
+            f"VALUES ('{name}', '{name.lower()}@example.com', 1, '2024-01-01', '2024-01-01', 1)"
+        )
+
+    def other_writer(conn, cursor, statement, parameters, context, executemany):
+        # Another connection commits a row just before the block suspends the
+        # trigger; the trigger indexes it, so the block must not index it again
+        if statement.startswith(f'UPDATE {FTS_TABLE}_control SET deferred = 1'):
+            other = sqlite3.connect(str(tmp_path / 'test.db'))
+            with other:
+                insert(other, 'Grace')
+            other.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', other_writer)
+        try:
+            with deferred_insert_indexing(db.session):
+                insert(db.session.connection().connection.driver_connection, 'Ada')
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', other_writer)
+    integrity_check(app)
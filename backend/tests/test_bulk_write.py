@@ -0,0 +1,45 @@
+"""Bulk delete and patch: admin-only set-based writes"""
+
+def admin_headers(login):
+    return {'Authorization': f"Bearer {login()['access_token']}"}
+
+def test_bulk_writes_need_a_token(client, create_customer):
+    create_customer()
+
+    assert client.post('/api/v1/customers/bulk-delete', json={'filter': {'is_active': True}}).status_code == 401
+    assert client.post('/api/v1/customers/bulk-patch',
+                       json={'filter': {'is_active': True}, 'set': {'company': 'Acme'}}).status_code == 401
+    assert client.get('/api/v1/customers').get_json()['items'][0]['is_active'] is True
+
+def test_bulk_writes_need_the_admin_role(client, create_customer):
+    create_customer()
+    assert client.post('/api/v1/users', json={
+        'email': 'user@example.com', 'username': 'user', 'password': 'secret123', 'role': 'user'
+    }).status_code == 201
+    pair = client.post('/api/v1/auth/login', json={'email': 'user@example.com', 'password': 'secret123'}).get_json()
+
+    response = client.post('/api/v1/customers/bulk-delete', json={'filter': {'is_active': True}},
+                           headers={'Authorization': f"Bearer {pair['access_token']}"})
+
+    assert response.status_code == 403
+
+def test_bulk_delete_soft_deletes_the_selection(client, login, create_customer):
+    ada = create_customer()
+    grace = create_customer(email='grace@example.com')
+
+    response = client.post('/api/v1/customers/bulk-delete', json={'ids': [ada['id']]}, headers=admin_headers(login))
+
+    assert response.status_code == 200
+    assert response.get_json()['affected'] == 1
+    assert client.get(f"/api/v1/customers/{ada['id']}").get_json()['is_active'] is False
+    assert client.get(f"/api/v1/customers/{grace['id']}").get_json()['is_active'] is True
+
+def test_bulk_patch_skips_rows_that_already_match(client, login, create_customer):
+    create_customer(company='Acme')
+    create_customer(email='grace@example.com')
+
+    response = client.post('/api/v1/customers/bulk-patch', json={'filter': {'is_active': True}, 'set': {'company': 'Acme'}},
+                           headers=admin_headers(login))
+
+    assert response.status_code == 200
+    assert (response.get_json()['matched'], response.get_json()['affected']) == (1, 1)
@@ -0,0 +1,63 @@
+"""GET /customers/changes: resuming from a `since` cursor"""
+
+URL = '/api/v1/customers/changes'
+
+def changes(client, **params):
+    response = client.get(URL, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_feed_without_since_returns_every_customer(client, create_customer):
+    ada = create_customer()
+    grace = create_customer(email='grace@example.com')
+
+    feed = changes(client)
+
+    assert [(change['op'], change['id']) for change in feed['changes']] == [('upsert', ada['id']), ('upsert', grace['id'])]
+    assert feed['changes'][0]['record']['email'] == 'ada@example.com'
+    assert feed['has_more'] is False
+
+def test_since_returns_only_later_changes(client, create_customer):
+    ada = create_customer()
+    grace = create_customer(email='grace@example.com')
+    cursor = changes(client)['next_cursor']
+
+    client.patch(f"/api/v1/customers/{ada['id']}", json={'company': 'Acme'})
+    client.delete(f"/api/v1/customers/{grace['id']}")
+    feed = changes(client, since=cursor)
+
+    assert [(change['op'], change['id']) for change in feed['changes']] == [('upsert', ada['id']), ('delete', grace['id'])]
+    assert feed['changes'][0]['record']['company'] == 'Acme'
+    assert feed['changes'][1]['record'] is None
+    assert changes(client, since=feed['next_cursor'])['changes'] == []
+
+def test_unchanged_feed_keeps_its_cursor(client, create_customer):
+    create_customer()
+    cursor = changes(client)['next_cursor']
+
+    feed = changes(client, since=cursor)
+
+    assert feed['changes'] == []
+    assert feed['next_cursor'] == cursor
+
+def test_since_now_skips_existing_changes(client, create_customer):
+    create_customer()
+    cursor = changes(client, since='now')['next_cursor']
+    grace = create_customer(email='grace@example.com')
+
+    feed = changes(client, since=cursor)
+
+    assert [change['id'] for change in feed['changes']] == [grace['id']]
+
+def test_feed_pages_with_has_more(client, create_customer):
+    for i in range(3):
+        create_customer(email=f'customer{i}@example.com')
+
+    first = changes(client, limit=2)
+    rest = changes(client, limit=2, since=first['next_cursor'])
+
+    assert len(first['changes']) == 2 and first['has_more'] is True
+    assert len(rest['changes']) == 1 and rest['has_more'] is False
+
+def test_malformed_since_is_400(client):
+    assert client.get(URL, query_string={'since': 'not-a-cursor'}).status_code == 400
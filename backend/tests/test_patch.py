@@ -0,0 +1,78 @@
+"""PATCH and PUT with If-Match: single-statement updates guarded by the row version"""
+
+def test_patch_with_current_etag_bumps_version(client, create_customer):
+    customer = create_customer()
+    etag = client.get(f"/api/v1/customers/{customer['id']}").headers['ETag']
+
+    response = client.patch(f"/api/v1/customers/{customer['id']}", json={'company': 'Acme'},
+                            headers={'If-Match': etag})
+
+    assert response.status_code == 200
+    assert response.get_json()['company'] == 'Acme'
+    assert response.get_json()['version'] == customer['version'] + 1
+    assert response.headers['ETag'] != etag
+
+def test_patch_with_stale_etag_is_412(client, create_customer):
+    customer = create_customer()
+    etag = client.get(f"/api/v1/customers/{customer['id']}").headers['ETag']
+    assert client.patch(f"/api/v1/customers/{customer['id']}", json={'company': 'Acme'},
+                        headers={'If-Match': etag}).status_code == 200
+
+    # A second writer still holding the first ETag loses
+    response = client.patch(f"/api/v1/customers/{customer['id']}", json={'company': 'Other'},
+                            headers={'If-Match': etag})
+
+    assert response.status_code == 412
+    assert client.get(f"/api/v1/customers/{customer['id']}").get_json()['company'] == 'Acme'
+
+def test_patch_with_etag_of_another_row_is_412(client, create_customer):
+    first = create_customer()
+    second = create_customer(email='grace@example.com')
+    etag = client.get(f"/api/v1/customers/{first['id']}").headers['ETag']
+
+    response = client.patch(f"/api/v1/customers/{second['id']}", json={'company': 'Acme'},
+                            headers={'If-Match': etag})
+
+    assert response.status_code == 412
+
+def test_patch_without_if_match_is_unconditional(client, create_customer):
+    customer = create_customer()
+
+    response = client.patch(f"/api/v1/customers/{customer['id']}", json={'phone': '555-0100'})
+
+    assert response.status_code == 200
+    assert response.get_json()['phone'] == '555-0100'
+
+def test_patch_missing_customer_is_404(client):
+    assert client.patch('/api/v1/customers/999', json={'company': 'Acme'}).status_code == 404
+
+def test_put_cannot_set_the_version(client, create_customer):
+    customer = create_customer()
+
+    response = client.put(f"/api/v1/customers/{customer['id']}", json={'version': 7, 'name': 'B'})
+
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/customers/{customer['id']}").get_json()['version'] == customer['version']
+
+def test_put_with_stale_etag_is_412(client, create_customer):
+    customer = create_customer()
+    etag = client.get(f"/api/v1/customers/{customer['id']}").headers['ETag']
+    assert client.put(f"/api/v1/customers/{customer['id']}", json={'name': 'B'},
+                      headers={'If-Match': etag}).status_code == 200
+
+    response = client.put(f"/api/v1/customers/{customer['id']}", json={'name': 'C'}, headers={'If-Match': etag})
+
+    assert response.status_code == 412
+
+def test_put_user_cannot_set_the_version(client):
+    response = client.put('/api/v1/users/1', json={'version': 7, 'username': 'root'})
+
+    assert response.status_code == 400
+    assert client.get('/api/v1/users/1').get_json()['version'] == 1
+
+def test_put_user_password_is_hashed(client):
+    assert client.put('/api/v1/users/1', json={'password': 'new-password'}).status_code == 200
+
+    response = client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'new-password'})
+
+    assert response.status_code == 200
@@ -0,0 +1,81 @@
+"""Session tokens: single-use refresh tokens, logout and malformed tokens"""
+
+from sqlalchemy import event
+
+import tokens
+from models import db
+
+def refresh(client, refresh_token):
+    return client.post('/api/v1/auth/refresh', json={'refresh_token': refresh_token})
+
+def test_refresh_rotates_the_token_pair(client, login):
+    pair = login()
+
+    response = refresh(client, pair['refresh_token'])
+
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated['refresh_token'] != pair['refresh_token']
+    me = client.get('/api/v1/auth/me', headers={'Authorization': f"Bearer {rotated['access_token']}"})
+    assert me.status_code == 200
+    assert refresh(client, rotated['refresh_token']).status_code == 200
+
+def test_replayed_refresh_token_is_401(client, login):
+    pair = login()
+    assert refresh(client, pair['refresh_token']).status_code == 200
+
+    response = refresh(client, pair['refresh_token'])
+
+    assert response.status_code == 401
+
+def test_replay_is_refused_by_another_worker(client, login, monkeypatch):
+    pair = login()
+    assert refresh(client, pair['refresh_token']).status_code == 200
+
+    # Another process starts with an empty in-memory list and only shares the database
+    monkeypatch.setattr(tokens, 'revocations', tokens.TokenRevocationList())
+
+    assert refresh(client, pair['refresh_token']).status_code == 401
+
+def test_access_token_is_not_a_refresh_token(client, login):
+    assert refresh(client, login()['access_token']).status_code == 401
+
+def test_logout_revokes_both_tokens(client, login):
+    pair = login()
+    headers = {'Authorization': f"Bearer {pair['access_token']}"}
+
+    assert client.post('/api/v1/auth/logout', json={'refresh_token': pair['refresh_token']},
+                       headers=headers).status_code == 200
+
+    assert client.get('/api/v1/auth/me', headers=headers).status_code == 401
+    assert refresh(client, pair['refresh_token']).status_code == 401
+
+def test_non_ascii_token_is_401(client):
+    response = client.get('/api/v1/auth/me', headers={'Authorization': 'Bearer é.é'.encode('utf-8')})
+
+    assert response.status_code == 401
+    assert refresh(client, 'é.é').status_code == 401
+
+def test_pruning_the_table_does_not_hold_the_lock(app, monkeypatch):
+    revocations = tokens.TokenRevocationList(prune_every=1)
+    held = []
+    monkeypatch.setattr(revocations, '_prune_table', lambda now: held.append(revocations._lock.locked()))
+
+    with app.app_context():
+        assert revocations.revoke('expired', 0) is True
+        revocations.revoke_user(1, 60)
+
+    assert held == [False, False]
+    assert 'expired' not in revocations._revoked
+
+def test_unshared_revocations_stay_out_of_the_database(app, client, login):
+    app.config['TOKEN_REVOCATION_SHARED'] = False
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    pair = login()
+
+    assert refresh(client, pair['refresh_token']).status_code == 200
+    assert refresh(client, pair['refresh_token']).status_code == 401
+    assert client.get('/api/v1/auth/me', headers={'Authorization': f"Bearer {pair['access_token']}"}).status_code == 200
+    assert not [statement for statement in statements if 'revoked_tokens' in statement]
@@ -0,0 +1,63 @@
+"""Upsert by email: created / updated / unchanged, natively and via the select-then-write fallback"""
+
+import pytest
+
+import models
+
+@pytest.fixture(params=['native', 'fallback'])
+def upsert_path(request, monkeypatch):
+    if request.param == 'fallback':
+        # Treat SQLite like a dialect without ON CONFLICT
+        monkeypatch.setattr(models, 'UPSERT_DIALECTS', ())
+    return request.param
+
+def test_upsert_creates_then_updates(client, upsert_path):
+    url = '/api/v1/customers/by-email/ada@example.com'
+
+    created = client.put(url, json={'name': 'Ada', 'company': 'Acme'})
+    assert created.status_code == 201
+    assert created.get_json()['version'] == 1
+
+    updated = client.put(url, json={'name': 'Ada Lovelace', 'company': 'Acme'})
+    assert updated.status_code == 200
+    assert updated.get_json()['id'] == created.get_json()['id']
+    assert updated.get_json()['name'] == 'Ada Lovelace'
+    assert updated.get_json()['version'] == 2
+
+def test_repeated_upsert_is_a_no_op(client, upsert_path):
+    url = '/api/v1/customers/by-email/ada@example.com'
+    first = client.put(url, json={'name': 'Ada', 'phone': '555-0100'}).get_json()
+
+    again = client.put(url, json={'name': 'Ada', 'phone': '555-0100'})
+
+    assert again.status_code == 200
+    assert again.get_json()['version'] == first['version']
+    assert again.get_json()['updated_at'] == first['updated_at']
+
+def test_upsert_clears_omitted_fields(client, upsert_path):
+    url = '/api/v1/customers/by-email/ada@example.com'
+    client.put(url, json={'name': 'Ada', 'company': 'Acme'})
+
+    response = client.put(url, json={'name': 'Ada'})
+
+    assert response.status_code == 200
+    assert response.get_json()['company'] is None
+
+def test_upsert_without_name_is_400(client, upsert_path):
+    assert client.put('/api/v1/customers/by-email/ada@example.com', json={'company': 'Acme'}).status_code == 400
+
+def test_bulk_upsert_reports_each_status(client, upsert_path):
+    client.put('/api/v1/customers/by-email/ada@example.com', json={'name': 'Ada'})
+    client.put('/api/v1/customers/by-email/grace@example.com', json={'name': 'Grace'})
+
+    response = client.put('/api/v1/customers/by-email', json=[
+        {'email': 'ada@example.com', 'name': 'Ada'},
+        {'email': 'grace@example.com', 'name': 'Grace Hopper'},
+        {'email': 'alan@example.com', 'name': 'Alan'},
+        {'email': 'no-name@example.com'}
+    ])
+
+    report = response.get_json()
+    assert response.status_code == 200
+    assert (report['created'], report['updated'], report['unchanged'], report['failed']) == (1, 1, 1, 1)
+    assert [result['status'] for result in report['results']] == ['unchanged', 'updated', 'created', 'error']
@@ -0,0 +1,252 @@
+"""
+Signed stateless session tokens.
+
+Tokens are `base64url(claims).base64url(HMAC-SHA256(SECRET_KEY, claims))`, so
+checking one is a hash and a dict lookup: no database and no password
+verification. Revocation (logout, role changes, used refresh tokens) is a set
+of token ids plus a per-user "issued before" cutoff, pruned as tokens expire.
+With TOKEN_REVOCATION_SHARED on (the default), each revocation is written to
+the revoked_tokens table, and every process keeps an in-memory copy that
+reads new rows at most once per TOKEN_REVOCATION_SYNC_INTERVAL. That read is
+the one database query token checks make; access tokens revoked in another
+worker stop working within the interval, and refresh tokens are claimed with
+a unique insert, so each one is used once across all workers. A single
+process can turn sharing off and keep revocations in memory only.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Dict, Optional
+from flask import current_app, g, request
+from flask_restx import abort
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from models import db, RevokedToken
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, forged, expired or revoked"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class TokenRevocationList:
+    """
+    Revoked token ids and per-user cutoffs, kept only until the tokens
+    expire. This process's copy of the revoked_tokens table.
+    """
+
+    def __init__(self, prune_every: int = 1024):
+        self._revoked = {}   # jti -> exp
+        self._cutoffs = {}   # user id -> (revoke tokens issued at or before, until)
+        self._lock = threading.Lock()
+        self._prune_every = prune_every
+        self._writes = 0
+        self._synced_id = 0
+        self._synced_at = float('-inf')
+        self._sync_lock = threading.Lock()
+
+    def revoke(self, jti: str, exp: float, shared: bool = True) -> bool:
+        """
+        Revoke a single token until it would have expired anyway. Returns
+        False if it was already revoked, i.e. another request (or, when
+        shared, another worker) revoked it first. shared also writes it to
+        the revoked_tokens table.
+        """
+        claimed = self._store(jti=jti, expires_at=exp) if shared else True
+        with self._lock:
+            claimed = claimed and jti not in self._revoked
+            self._revoked[jti] = exp
+            pruned_at = self._maybe_prune()
+        if pruned_at is not None and shared:
+            self._prune_table(pruned_at)
+        return claimed
+
+    def revoke_user(self, user_id: int, max_ttl: float, shared: bool = True):
+        """Revoke every token issued to a user so far"""
+        now = time.time()
+        if shared:
+            self._store(user_id=user_id, issued_before=now, expires_at=now + max_ttl)
+        with self._lock:
+            self._cutoff(user_id, now, now + max_ttl)
+            pruned_at = self._maybe_prune()
+        if pruned_at is not None and shared:
+            self._prune_table(pruned_at)
+
+    def _cutoff(self, user_id: int, issued_before: float, until: float):
+        current = self._cutoffs.get(user_id)
+        if current is None or current[0] < issued_before:
+            self._cutoffs[user_id] = (issued_before, until)
+
+    def _store(self, **values) -> bool:
+        """Insert a revoked_tokens row on its own connection; False if the token id is already there"""
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(db.insert(RevokedToken).values(**values))
+        except IntegrityError:
+            return False
+        return True
+
+    def sync(self, interval: float):
+        """Load rows other processes added since the last sync, at most once per interval seconds"""
+        now = time.monotonic()
+        if now - self._synced_at < interval or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    db.select(RevokedToken.__table__)
+                    .where(RevokedToken.id > self._synced_id)
+                    .order_by(RevokedToken.id)
+                ).all()
+            with self._lock:
+                for row in rows:
+                    if row.jti is not None:
+                        self._revoked[row.jti] = row.expires_at
+                    else:
+                        self._cutoff(row.user_id, row.issued_before, row.expires_at)
+            if rows:
+                self._synced_id = rows[-1].id
+            self._synced_at = now
+        except SQLAlchemyError as e:
+            print(f"⚠️ Could not read token revocations: {e}")
+        finally:
+            self._sync_lock.release()
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        if claims['jti'] in self._revoked:
+            return True
+        cutoff = self._cutoffs.get(claims['sub'])
+        return cutoff is not None and claims['iat'] <= cutoff[0]
+
+    def _maybe_prune(self) -> Optional[float]:
+        """Drop expired entries every prune_every writes; returns the time pruned at, if any. Caller holds _lock."""
+        self._writes += 1
+        if self._writes % self._prune_every:
+            return None
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._cutoffs = {uid: c for uid, c in self._cutoffs.items() if c[1] > now}
+        return now
+
+    def _prune_table(self, now: float):
+        """Delete expired revoked_tokens rows, outside _lock so other revocations and syncs never wait on it"""
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(db.delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        except SQLAlchemyError as e:
+            print(f"⚠️ Could not prune token revocations: {e}")
+
+    def __len__(self):
+        return len(self._revoked) + len(self._cutoffs)
+
+
+revocations = TokenRevocationList()
+
+def _signature(secret: str, payload: str) -> str:
+    return _b64encode(hmac.new(secret.encode('utf-8'), payload.encode('ascii'), hashlib.sha256).digest())
+
+def issue_token(user, token_type: str = 'access', secret: str = None, ttl: float = None) -> str:
+    """Issue a signed token for a user ('access' or 'refresh')"""
+    config = current_app.config
+    secret = secret or config['SECRET_KEY']
+    if ttl is None:
+        ttl = config['ACCESS_TOKEN_TTL'] if token_type == 'access' else config['REFRESH_TOKEN_TTL']
+    now = round(time.time(), 3)
+    claims = {
+        'sub': user.id,
+        'role': user.role,
+        'typ': token_type,
+        'jti': os.urandom(9).hex(),
+        'iat': now,
+        'exp': now + ttl
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f'{payload}.{_signature(secret, payload)}'
+
+def decode_token(token: str, token_type: str = 'access', secret: str = None) -> Dict[str, Any]:
+    """Verify a token's signature, type, expiry and revocation; return its claims"""
+    secret = secret or current_app.config['SECRET_KEY']
+    payload, _, signature = token.partition('.')
+    # Tokens are base64url; other characters cannot be signed or compared
+    if not payload or not signature or not token.isascii():
+        raise TokenError('Malformed token')
+    if not hmac.compare_digest(signature, _signature(secret, payload)):
+        raise TokenError('Invalid token signature')
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise TokenError('Malformed token')
+    if claims.get('typ') != token_type:
+        raise TokenError(f'Wrong token type, expected {token_type}')
+    if claims['exp'] < time.time():
+        raise TokenError('Token expired')
+    if current_app.config['TOKEN_REVOCATION_SHARED']:
+        revocations.sync(current_app.config['TOKEN_REVOCATION_SYNC_INTERVAL'])
+    if revocations.is_revoked(claims):
+        raise TokenError('Token revoked')
+    return claims
+
+def revoke_token(claims: Dict[str, Any]) -> bool:
+    """Revoke one token by its claims; False if it was already revoked (e.g. a replayed refresh token)"""
+    return revocations.revoke(claims['jti'], claims['exp'], current_app.config['TOKEN_REVOCATION_SHARED'])
+
+def revoke_user_tokens(user_id: int):
+    """Revoke every outstanding token for a user, e.g. after a role change"""
+    revocations.revoke_user(user_id, current_app.config['REFRESH_TOKEN_TTL'], current_app.config['TOKEN_REVOCATION_SHARED'])
+
+def bearer_token(query_param: Optional[str] = None) -> Optional[str]:
+    """
+    The token from an `Authorization: Bearer <token>` header, if any, or
+    else from the `query_param` query parameter when one is named.
+    """
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        if query_param:
+            return request.args.get(query_param) or None
+        return None
+    return token.strip()
+
+def token_required(fn=None, roles=None, always=False, query_param=None):
+    """
+    Decorator that validates the bearer access token and stores its claims
+    in `g.token_claims`. Enforced when AUTH_TOKENS_REQUIRED is on (or
+    always=True); otherwise missing or invalid tokens are treated as
+    anonymous. `query_param` also accepts the token in the query string,
+    for clients that cannot set headers (EventSource). Usable as
+    @token_required or @token_required(roles=['admin']).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.token_claims = None
+            enforced = always or current_app.config['AUTH_TOKENS_REQUIRED']
+            token = bearer_token(query_param)
+            if token is None:
+                if enforced:
+                    abort(401, 'Missing bearer token')
+                return view(*args, **kwargs)
+            try:
+                claims = decode_token(token)
+            except TokenError as e:
+                if enforced:
+                    abort(401, str(e))
+                return view(*args, **kwargs)
+            if roles and claims['role'] not in roles:
+                abort(403, 'Insufficient role')
+            g.token_claims = claims
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator(fn) if fn is not None else decorator
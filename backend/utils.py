@@ -2,21 +2,127 @@
 Utility functions for the application.
 """
 
+import base64
 import hashlib
-from werkzeug.security import generate_password_hash, check_password_hash
+import io
+import json
+from datetime import datetime, timezone
+from hashing import get_hasher
 
 def hash_password(password):
     """
     Hash password using Werkzeug's secure password hashing.
-    This is more secure than SHA256 as it includes salt and uses PBKDF2.
+    This is more secure than SHA256 as it includes salt and uses PBKDF2/scrypt.
+    Runs on the shared hashing process pool with the configured method.
     """
-    return generate_password_hash(password)
+    return get_hasher().hash(password)
 
 def verify_password(password, password_hash):
     """Verify password against hash"""
-    return check_password_hash(password_hash, password)
+    return get_hasher().verify(password_hash, password)
 
 def generate_id(prefix="id"):
     """Generate a unique ID with prefix"""
     import uuid
-    return f"{prefix}_{uuid.uuid4().hex[:8]}"
\ No newline at end of file
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+def encode_cursor(*values):
+    """Encode keyset values into an opaque, URL-safe pagination cursor"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor back into its keyset values.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or not values:
+        raise ValueError('Invalid cursor')
+    return values
+
+def parse_limit(value, default, maximum):
+    """Parse a page size query parameter, clamped to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+def parse_fields(value, allowed):
+    """Parse a comma-separated fields query parameter; None means all fields"""
+    if value in (None, ''):
+        return None
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f'Unknown field: {name}')
+        if name not in fields:
+            fields.append(name)
+    if not fields:
+        raise ValueError('fields must name at least one field')
+    return fields
+
+def parse_sort(value, allowed):
+    """Parse a sort query parameter like '-created_at,name' into [(field, descending)]"""
+    if value in (None, ''):
+        return []
+    sort = []
+    for name in value.split(','):
+        name = name.strip()
+        descending = name.startswith('-')
+        name = name.lstrip('+-')
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f'Cannot sort by {name}')
+        if name not in [field for field, _ in sort]:
+            sort.append((name, descending))
+    return sort
+
+def parse_bool(value):
+    """Parse a boolean query parameter (true/false, 1/0, yes/no)"""
+    lowered = str(value).strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError('expected true or false')
+
+def parse_datetime(value):
+    """Parse an ISO 8601 date or datetime query parameter as naive UTC"""
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError('expected an ISO 8601 date or datetime')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def iter_ndjson(stream):
+    """
+    Lazily parse newline-delimited JSON from a binary stream. Yields one
+    value per non-blank line, or a ValueError for lines that fail to parse.
+    """
+    # Request input streams are unbuffered; iterating them reads byte by byte
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, buffer_size=64 * 1024)
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValueError(f'Invalid JSON on line {line_number}')
@@ -17,6 +17,10 @@ export interface LoginResponse {
     created_at: string;
     updated_at: string;
   };
+  access_token: string;
+  refresh_token: string;
+  token_type: string;
+  expires_in: number;
 }
 
 export interface User {
@@ -73,6 +77,11 @@ export interface UpdateCustomerData {
   is_active?: boolean;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 // Authentication API
 export const authAPI = {
   login: async (credentials: LoginCredentials): Promise<LoginResponse> => {
@@ -80,9 +89,18 @@ export const authAPI = {
     return response.data;
   },
 
+  refresh: async (refreshToken: string): Promise<LoginResponse> => {
+    const response = await api.post('/auth/refresh', { refresh_token: refreshToken });
+    return response.data;
+  },
+
   logout: async (): Promise<void> => {
-    // No backend logout endpoint yet, just clear token
-    localStorage.removeItem('authToken');
+    try {
+      await api.post('/auth/logout', { refresh_token: localStorage.getItem('refreshToken') });
+    } finally {
+      localStorage.removeItem('authToken');
+      localStorage.removeItem('refreshToken');
+    }
   },
 
   verify: async (): Promise<User> => {
@@ -98,8 +116,8 @@ export const authAPI = {
 
 // Users API
 export const usersAPI = {
-  getAll: async (): Promise<User[]> => {
-    const response = await api.get('/users');
+  getPage: async (after?: string, limit?: number): Promise<Page<User>> => {
+    const response = await api.get('/users', { params: { after, limit } });
     return response.data;
   },
 
@@ -125,9 +143,8 @@ export const usersAPI = {
 
 // Customers API
 export const customersAPI = {
-  getAll: async (search?: string): Promise<Customer[]> => {
-    const params = search ? { search } : {};
-    const response = await api.get('/customers', { params });
+  getPage: async (after?: string, limit?: number, search?: string): Promise<Page<Customer>> => {
+    const response = await api.get('/customers', { params: { after, limit, search } });
     return response.data;
   },
 
@@ -148,10 +165,5 @@ export const customersAPI = {
 
   delete: async (id: number): Promise<void> => {
     await api.delete(`/customers/${id}`);
-  },
-
-  search: async (query: string): Promise<Customer[]> => {
-    const response = await api.get('/customers', { params: { search: query } });
-    return response.data;
   }
 };
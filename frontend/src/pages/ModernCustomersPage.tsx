@@ -2,9 +2,14 @@ import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { customersAPI, type Customer } from '../api/api';
 
+// Customers fetched per request; more are loaded on demand
+const PAGE_SIZE = 50;
+
 const ModernCustomersPage: React.FC = () => {
   const navigate = useNavigate();
   const [customers, setCustomers] = useState<Customer[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [activeSearch, setActiveSearch] = useState<string | undefined>(undefined);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [error, setError] = useState('');
@@ -13,11 +18,14 @@ const ModernCustomersPage: React.FC = () => {
     loadCustomers();
   }, []);
 
+  // Load the first page, replacing the list
   const loadCustomers = async (search?: string) => {
     try {
       setLoading(true);
-      const data = await customersAPI.getAll(search);
-      setCustomers(data);
+      const page = await customersAPI.getPage(undefined, PAGE_SIZE, search || undefined);
+      setCustomers(page.items);
+      setNextCursor(page.next_cursor);
+      setActiveSearch(search || undefined);
     } catch (err: any) {
       setError('Failed to load customers');
     } finally {
@@ -25,6 +33,21 @@ const ModernCustomersPage: React.FC = () => {
     }
   };
 
+  // Append the page after the last one loaded
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoading(true);
+      const page = await customersAPI.getPage(nextCursor, PAGE_SIZE, activeSearch);
+      setCustomers(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err: any) {
+      setError('Failed to load more customers');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
     loadCustomers(searchTerm);
@@ -124,7 +147,7 @@ const ModernCustomersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Customers</p>
-              <p className="text-2xl font-bold text-gray-900">{customers.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{customers.length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -138,7 +161,7 @@ const ModernCustomersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Active</p>
-              <p className="text-2xl font-bold text-gray-900">{customers.filter(c => c.is_active).length}</p>
+              <p className="text-2xl font-bold text-gray-900">{customers.filter(c => c.is_active).length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -152,7 +175,7 @@ const ModernCustomersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">With Companies</p>
-              <p className="text-2xl font-bold text-gray-900">{customers.filter(c => c.company && c.company.trim()).length}</p>
+              <p className="text-2xl font-bold text-gray-900">{customers.filter(c => c.company && c.company.trim()).length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -257,6 +280,17 @@ const ModernCustomersPage: React.FC = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="px-6 py-4 border-t border-gray-200 text-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loading}
+                  className="px-6 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 font-medium rounded-lg transition-colors disabled:opacity-50"
+                >
+                  {loading ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -27,7 +27,8 @@ const ModernLoginPage: React.FC = () => {
 
     try {
       const response = await authAPI.login(formData);
-      localStorage.setItem('authToken', 'temp-token');
+      localStorage.setItem('authToken', response.access_token);
+      localStorage.setItem('refreshToken', response.refresh_token);
       localStorage.setItem('user', JSON.stringify(response.user));
       navigate('/dashboard');
     } catch (err: any) {
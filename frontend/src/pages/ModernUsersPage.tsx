@@ -1,8 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import { usersAPI, type User, type CreateUserData } from '../api/api';
 
+// Users fetched per request; more are loaded on demand
+const PAGE_SIZE = 50;
+
 const ModernUsersPage: React.FC = () => {
   const [users, setUsers] = useState<User[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [showCreateForm, setShowCreateForm] = useState(false);
@@ -18,11 +22,13 @@ const ModernUsersPage: React.FC = () => {
     loadUsers();
   }, []);
 
+  // Load the first page, replacing the list
   const loadUsers = async () => {
     try {
       setLoading(true);
-      const data = await usersAPI.getAll();
-      setUsers(data);
+      const page = await usersAPI.getPage(undefined, PAGE_SIZE);
+      setUsers(page.items);
+      setNextCursor(page.next_cursor);
     } catch (err: any) {
       setError('Failed to load users');
     } finally {
@@ -30,6 +36,21 @@ const ModernUsersPage: React.FC = () => {
     }
   };
 
+  // Append the page after the last one loaded
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoading(true);
+      const page = await usersAPI.getPage(nextCursor, PAGE_SIZE);
+      setUsers(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err: any) {
+      setError('Failed to load more users');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleCreateUser = async (e: React.FormEvent) => {
     e.preventDefault();
     
@@ -225,7 +246,7 @@ const ModernUsersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Users</p>
-              <p className="text-2xl font-bold text-gray-900">{users.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{users.length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -239,7 +260,7 @@ const ModernUsersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Active Users</p>
-              <p className="text-2xl font-bold text-gray-900">{users.filter(u => u.is_active).length}</p>
+              <p className="text-2xl font-bold text-gray-900">{users.filter(u => u.is_active).length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -253,7 +274,7 @@ const ModernUsersPage: React.FC = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Admins</p>
-              <p className="text-2xl font-bold text-gray-900">{users.filter(u => u.role === 'admin').length}</p>
+              <p className="text-2xl font-bold text-gray-900">{users.filter(u => u.role === 'admin').length}{nextCursor ? '+' : ''}</p>
             </div>
           </div>
         </div>
@@ -356,6 +377,17 @@ const ModernUsersPage: React.FC = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="px-6 py-4 border-t border-gray-200 text-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loading}
+                  className="px-6 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 font-medium rounded-lg transition-colors disabled:opacity-50"
+                >
+                  {loading ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>